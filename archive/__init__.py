@@ -0,0 +1,253 @@
+"""
+Tar archives, written and read as streams.
+
+Compressions:
+
+* `gzip` - compressed by blocks in parallel threads, each block being a separate gzip member, so the output is readable by any gzip implementation
+* `zstd` - requires `zstandard` package, compressed by its own threads
+* `none` - plain tar
+
+Archives are reproducible: entries are sorted, owners are dropped, and modification times are clamped to `SOURCE_DATE_EPOCH` if it's set.
+"""
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import gzip
+import io
+import os
+from pathlib import Path
+import queue
+import tarfile
+import threading
+from typing import BinaryIO, Iterator
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+compressions = ["gzip", "zstd", "none"]
+
+_block_size = 1 << 20
+_gzip_magic = b"\x1f\x8b"
+_zstd_magic = b"\x28\xb5\x2f\xfd"
+
+
+def compression_for(path: Path) -> str:
+    """
+    Returns compression by an archive's extension, `gzip` for other extensions.
+    """
+    name = path.name
+    if name.endswith((".tar.gz", ".tgz")):
+        return "gzip"
+    if name.endswith((".tar.zst", ".tzst")):
+        return "zstd"
+    if name.endswith(".tar"):
+        return "none"
+    # Archives were always compressed by gzip, before other compressions were supported.
+    return "gzip"
+
+
+def _default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def _gzip_member(block: bytes, level: int) -> bytes:
+    # Zero modification time keeps the output reproducible.
+    return gzip.compress(block, compresslevel=level, mtime=0)
+
+
+class ParallelGzipWriter:
+    """
+    Writable stream, compressing blocks of written data to gzip members in a thread pool, and writing them in order.
+
+    At most two blocks per worker are held in memory.
+    """
+    def __init__(self, fileobj: BinaryIO, *, level: int = 6, workers: int | None = None, block_size: int = _block_size):
+        self._fileobj = fileobj
+        self._level = level
+        self._block_size = block_size
+        workers = workers or _default_workers()
+        self._pool = ThreadPoolExecutor(workers) if workers > 1 else None
+        self._max_pending = workers * 2
+        self._pending: deque[Future] = deque()
+        self._buffer = bytearray()
+        self._members = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        if len(self._buffer) >= self._block_size:
+            view = memoryview(self._buffer)
+            start = 0
+            while len(self._buffer) - start >= self._block_size:
+                self._submit(bytes(view[start:start + self._block_size]))
+                start += self._block_size
+            view.release()
+            del self._buffer[:start]
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self.closed:
+            return
+        # Empty input still makes one member, so the output is a valid gzip file.
+        if self._buffer or self._members == 0:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        while self._pending:
+            self._fileobj.write(self._pending.popleft().result())
+        if self._pool is not None:
+            self._pool.shutdown()
+        self.closed = True
+
+    def __enter__(self) -> "ParallelGzipWriter":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _submit(self, block: bytes):
+        self._members += 1
+        if self._pool is None:
+            self._fileobj.write(_gzip_member(block, self._level))
+            return
+        self._pending.append(self._pool.submit(_gzip_member, block, self._level))
+        while len(self._pending) > self._max_pending:
+            self._fileobj.write(self._pending.popleft().result())
+
+
+class _Passthrough:
+    def __init__(self, fileobj: BinaryIO):
+        self._fileobj = fileobj
+
+    def write(self, data: bytes) -> int:
+        return self._fileobj.write(data)
+
+    def close(self):
+        pass
+
+
+def compressor(fileobj: BinaryIO, compression: str = "gzip", *, level: int | None = None, workers: int | None = None):
+    """
+    Returns writable stream, compressing into a file object. The stream must be closed to complete the output, which leaves the file object open.
+    """
+    if compression == "gzip":
+        return ParallelGzipWriter(fileobj, level=6 if level is None else level, workers=workers)
+    if compression == "zstd":
+        if zstandard is None:
+            raise Exception("Compression 'zstd' requires 'zstandard' package.")
+        threads = workers or _default_workers()
+        return zstandard.ZstdCompressor(level=3 if level is None else level, threads=threads if threads > 1 else 0).stream_writer(fileobj, closefd=False)
+    if compression == "none":
+        return _Passthrough(fileobj)
+    raise Exception(f"Unknown compression '{compression}'. Expected one of: {', '.join(compressions)}.")
+
+
+def decompressor(fileobj: BinaryIO) -> BinaryIO:
+    """
+    Returns readable stream, decompressing a file object, which compression is detected by its first bytes.
+    """
+    if hasattr(fileobj, "peek"):
+        magic = fileobj.peek(4)[:4]
+    elif fileobj.seekable():
+        position = fileobj.tell()
+        magic = fileobj.read(4)
+        fileobj.seek(position)
+    else:
+        fileobj = io.BufferedReader(fileobj)
+        magic = fileobj.peek(4)[:4]
+    if magic.startswith(_gzip_magic):
+        # Reads concatenated members as one stream.
+        return gzip.GzipFile(fileobj=fileobj, mode="rb")
+    if magic == _zstd_magic:
+        if zstandard is None:
+            raise Exception("Decompression of 'zstd' requires 'zstandard' package.")
+        return zstandard.ZstdDecompressor().stream_reader(fileobj, read_across_frames=True, closefd=False)
+    return fileobj
+
+
+def _normalize(info: tarfile.TarInfo) -> tarfile.TarInfo:
+    info.uid = 0
+    info.gid = 0
+    info.uname = ""
+    info.gname = ""
+    source_date_epoch = os.environ.get("SOURCE_DATE_EPOCH", None)
+    if source_date_epoch:
+        info.mtime = min(info.mtime, int(source_date_epoch))
+    return info
+
+
+def write_tar(fileobj: BinaryIO, entries: list[tuple[Path, str]], *, compression: str = "gzip", level: int | None = None, workers: int | None = None):
+    """
+    Writes a tar of `(path, name in archive)` entries into a file object. Directories are added recursively.
+    """
+    stream = compressor(fileobj, compression, level=level, workers=workers)
+    try:
+        # Stream mode of tarfile never seeks, so data flows right into the compressor.
+        with tarfile.open(fileobj=stream, mode="w|") as tar:
+            for path, arcname in entries:
+                # Directory contents are added in sorted order by tarfile.
+                tar.add(path, arcname=arcname, filter=_normalize)
+    finally:
+        stream.close()
+
+
+class _ChunkWriter:
+    def __init__(self, chunks: queue.Queue, cancelled: threading.Event):
+        self._chunks = chunks
+        self._cancelled = cancelled
+
+    def write(self, data: bytes) -> int:
+        if self._cancelled.is_set():
+            raise Exception("Archive is not consumed anymore.")
+        if data:
+            self._chunks.put(bytes(data))
+        return len(data)
+
+
+def iter_tar(entries: list[tuple[Path, str]], *, compression: str = "gzip", level: int | None = None, workers: int | None = None) -> Iterator[bytes]:
+    """
+    Yields chunks of a tar of `(path, name in archive)` entries, written by a thread, so the archive is never held in memory as a whole.
+    """
+    # Bounded, so the writer waits for a slow consumer.
+    chunks = queue.Queue(maxsize=16)
+    cancelled = threading.Event()
+    error = []
+
+    def write():
+        try:
+            write_tar(_ChunkWriter(chunks, cancelled), entries, compression=compression, level=level, workers=workers)
+        except BaseException as e:
+            error.append(e)
+        finally:
+            chunks.put(None)
+
+    thread = threading.Thread(target=write, daemon=True)
+    thread.start()
+    finished = False
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                finished = True
+                break
+            yield chunk
+    finally:
+        if not finished:
+            # Consumer has stopped early. Writer fails on its next write, after a free slot unblocks it.
+            cancelled.set()
+            while chunks.get() is not None:
+                pass
+        thread.join()
+    if error:
+        raise error[0]
+
+
+def extract_tar(fileobj: BinaryIO, path: Path):
+    """
+    Extracts a tar from a file object, reading it as a stream. Members which would be written outside of `path`, links to outside, and special files are refused.
+    """
+    with tarfile.open(fileobj=decompressor(fileobj), mode="r|") as tar:
+        tar.extractall(path=path, filter="data")
@@ -0,0 +1,71 @@
+"""
+Benchmark of archive compression throughput per number of workers.
+
+Usage: `python bench/archive_bench.py [--size-mb 256] [--workers 1,2,4,8] [--dir DIR]`.
+"""
+import argparse
+import os
+from pathlib import Path
+import random
+import sys
+import tarfile
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import archive
+
+
+def generate(source: Path, size_mb: int):
+    # Compressible, like build outputs: text with repeating tokens, and some random binary data.
+    words = [os.urandom(random.randint(2, 8)).hex() for _ in range(2000)]
+    for i in range(size_mb):
+        p = Path(source, f"dir_{i % 8}", f"file_{i}.{'bin' if i % 4 == 0 else 'txt'}")
+        p.parent.mkdir(parents=True, exist_ok=True)
+        if i % 4 == 0:
+            p.write_bytes(os.urandom(1 << 20))
+        else:
+            text = " ".join(random.choices(words, k=1 << 17)).encode()
+            p.write_bytes(text[:1 << 20])
+
+
+def report(name: str, size: int, elapsed: float, output: Path):
+    print(f"{name:>14} {elapsed:>8.3f}s {size / elapsed / 1024 / 1024:>9.1f} MB/s {output.stat().st_size / size:>7.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--dir", type=Path, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        source = Path(tmp, "source")
+        generate(source, args.size_mb)
+        size = args.size_mb * 1024 * 1024
+        output = Path(tmp, "output")
+        print(f"{'compression':>14} {'time':>9} {'throughput':>14} {'ratio':>7}  ({os.cpu_count()} CPUs)")
+
+        started = time.perf_counter()
+        with tarfile.open(output, "w:gz") as tar:
+            tar.add(source, arcname="source")
+        report("tarfile gzip", size, time.perf_counter() - started, output)
+
+        compressions = ["gzip"] + (["zstd"] if archive.zstandard is not None else [])
+        for compression in compressions:
+            for workers in [int(w) for w in args.workers.split(",")]:
+                started = time.perf_counter()
+                with output.open("wb") as f:
+                    archive.write_tar(f, [(source, "source")], compression=compression, workers=workers)
+                report(f"{compression} x{workers}", size, time.perf_counter() - started, output)
+
+        started = time.perf_counter()
+        with output.open("rb") as f:
+            archive.extract_tar(f, Path(tmp, "extracted"))
+        report("extract", size, time.perf_counter() - started, output)
+
+
+if __name__ == "__main__":
+    main()
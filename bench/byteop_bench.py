@@ -0,0 +1,52 @@
+"""
+Benchmark of coded structure and frame decoding.
+
+Usage: `python bench/byteop_bench.py [--sizes 1024,1048576,104857600] [--chunk 65536]`.
+"""
+import argparse
+from pathlib import Path
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import byteop
+
+
+def timed(f, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        f()
+    return (time.perf_counter() - started) / repeat
+
+
+def format_time(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}us"
+    return f"{seconds * 1e3:.2f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1024,1048576,104857600")
+    parser.add_argument("--chunk", type=int, default=65536)
+    args = parser.parse_args()
+
+    print(f"{'size':>10} {'unwrap':>10} {'view':>10} {'encode':>10} {'decode':>10} {'decode chunked':>15}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        payload = bytes(size)
+        repeat = max(3, min(100000, 10**8 // size))
+        coded = byteop.wrap_coded_structure(0, payload)
+        # Several frames of the size in one stream.
+        stream = byteop.encode_frames([(0, payload)] * 4)
+        chunks = [stream[i:i + args.chunk] for i in range(0, len(stream), args.chunk)]
+        unwrap = timed(lambda: byteop.unwrap_coded_structure(coded), repeat)
+        view = timed(lambda: byteop.unwrap_coded_view(coded), repeat)
+        encode = timed(lambda: byteop.encode_frame(0, payload), repeat)
+        decode = timed(lambda: byteop.FrameDecoder().feed(stream), repeat) / 4
+        decode_chunked = timed(lambda: list(byteop.iter_frames(chunks)), max(1, repeat // 10)) / 4
+        print(f"{size:>10} {format_time(unwrap):>10} {format_time(view):>10} {format_time(encode):>10} {format_time(decode):>10} {format_time(decode_chunked):>15}")
+
+
+if __name__ == "__main__":
+    main()
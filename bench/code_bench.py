@@ -0,0 +1,76 @@
+"""
+Benchmark of codesheet parsing and generation.
+
+Usage: `python bench/code_bench.py [--codes 100000] [--legacy-codes 10000]`. Legacy parsing is quadratic, so it's measured on fewer codes.
+"""
+import argparse
+from pathlib import Path
+import re
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from yelets_project import codesheet
+
+
+def generate(n: int) -> str:
+    return "".join(f"code_{i}_error\n" if i % 50 else "\n" for i in range(n))
+
+
+def legacy_parse(text: str) -> list[str]:
+    codes = []
+    for line in text.splitlines(keepends=True):
+        line = line.strip().lower()
+        if line:
+            if line in ["ok", "codenames"]:
+                raise Exception(f"Cannot use reserved codename '{line}'.")
+            if not re.match(r"^(?![0-9])(?<!_)([a-z0-9]+(?:_[a-z0-9]+)*)[^_]$", line):
+                raise Exception(f"Invalid codename: '{line}'.")
+            if line in codes:
+                raise Exception(f"Duplicate definition of a codename '{line}'.")
+        codes.append(line)
+    return codes
+
+
+def legacy_emit_py(codes: list[str], ind: str) -> str:
+    content = "ok = 0\n"
+    codenames = ""
+    for code, codename in enumerate(codes):
+        code += 1
+        content += f"{codename} = {code}\n"
+        codenames += f"{ind}{code}: \"{codename}\",\n"
+    content += """
+codenames: dict[int, str] = {{
+{codenames}}}""".format(codenames=codenames)
+    return content
+
+
+def timed(f, *args):
+    started = time.perf_counter()
+    result = f(*args)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--codes", type=int, default=100000)
+    parser.add_argument("--legacy-codes", type=int, default=10000)
+    args = parser.parse_args()
+
+    text = generate(args.legacy_codes)
+    legacy_parse_time, codes = timed(legacy_parse, text)
+    legacy_emit_time, _ = timed(legacy_emit_py, codes, "    ")
+    parse_time, _ = timed(codesheet.parse, text, "    ")
+    print(f"{args.legacy_codes} codes: legacy parse {legacy_parse_time:.3f}s, emit py {legacy_emit_time:.3f}s; parse {parse_time:.3f}s")
+
+    text = generate(args.codes)
+    parse_time, codenames = timed(codesheet.parse, text, "    ")
+    print(f"{args.codes} codes: parse {parse_time:.3f}s")
+    for extension in codesheet.emitters:
+        emit_time, content = timed(codesheet.emit, codenames, "    ", Path(f"codes.{extension}"))
+        print(f"{'':>8}emit {extension:<4} {emit_time:.3f}s, {len(content) / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark of file removal: `rm -rf` commands against in-process `fs.rm`.
+
+Usage: `python bench/fs_bench.py [--files 20000] [--paths 500] [--workers 1,4,8] [--dir DIR]`.
+"""
+import argparse
+import os
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import yelets_project
+from yelets import fs_module
+
+
+def generate(root: Path, files: int):
+    for i in range(files):
+        p = Path(root, f"dir_{i % 50}", f"sub_{i % 7}", f"file_{i}.txt")
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_bytes(b"x" * 100)
+
+
+def measure(name: str, fn):
+    started = time.perf_counter()
+    fn()
+    print(f"{name:>28} {time.perf_counter() - started:>8.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--paths", type=int, default=500)
+    parser.add_argument("--workers", default="1,4,8")
+    parser.add_argument("--dir", type=Path, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        yelets_project._project = SimpleNamespace(source=Path(tmp))
+        print(f"{args.paths} paths, one call each ({os.cpu_count()} CPUs)")
+        for name, remove in [
+            ("rm -rf", lambda p: subprocess.run(["rm", "-rf", str(Path(tmp, p))], check=True)),
+            ("fs.rm", fs_module.rm),
+        ]:
+            generate(Path(tmp, "paths"), args.paths)
+            paths = [f"paths/dir_{i % 50}/sub_{i % 7}/file_{i}.txt" for i in range(args.paths)]
+            measure(name, lambda: [remove(p) for p in paths])
+            fs_module.rm("paths")
+
+        print(f"tree of {args.files} files")
+        generate(Path(tmp, "tree"), args.files)
+        measure("rm -rf", lambda: subprocess.run(["rm", "-rf", str(Path(tmp, "tree"))], check=True))
+        for workers in [int(w) for w in args.workers.split(",")]:
+            generate(Path(tmp, "tree"), args.files)
+            measure(f"fs.rm x{workers}", lambda: fs_module.rm("tree", workers=workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Benchmark of remote command round trips against a local stand-in executor.
+
+Usage: `python bench/host_bench.py [--commands 500]`.
+"""
+import argparse
+from pathlib import Path
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "test"))
+
+import yelets_project
+from stub_executor import StubExecutor
+
+
+def run(executor: StubExecutor, commands: int, request) -> tuple[float, int]:
+    host = yelets_project.Host("127.0.0.1")
+    host.setExecutorSecret(executor.secret)
+    if request is not None:
+        host.request = request
+    connections = executor.connections
+    started = time.perf_counter()
+    for i in range(commands):
+        host.execute(f"command {i}", port=executor.port)
+    elapsed = time.perf_counter() - started
+    yelets_project._close_clients()
+    return elapsed, executor.connections - connections
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--commands", type=int, default=500)
+    args = parser.parse_args()
+
+    yelets_project._response = lambda *args: None
+    with StubExecutor(handler=lambda command, cwd: (0, command, "")) as executor:
+        print(f"{'client':>10} {'time':>9} {'per command':>12} {'connections':>12}")
+        for name, request in [("per call", lambda url, **kwargs: httpx.post(url, **kwargs)), ("pooled", None)]:
+            elapsed, connections = run(executor, args.commands, request)
+            print(f"{name:>10} {elapsed:>8.3f}s {elapsed / args.commands * 1000:>10.2f}ms {connections:>12}")
+
+
+if __name__ == "__main__":
+    main()
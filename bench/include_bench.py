@@ -0,0 +1,108 @@
+"""
+Benchmark of include strategies on an asset tree, and of parallel copying of a tree of small files.
+
+Usage: `python bench/include_bench.py [--size-mb 2048] [--files 16] [--small-files 20000] [--workers 1,2,4,8,16] [--dir DIR]`. Directory must be on the filesystem to measure, reflinks need btrfs or XFS.
+"""
+import argparse
+import os
+from pathlib import Path
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from yelets_project import filecopy
+from yelets_project.sync import BuildSync
+
+
+def generate(source: Path, size_mb: int, files: int):
+    block = os.urandom(1024 * 1024)
+    per_file = max(1, size_mb // files)
+    for i in range(files):
+        p = Path(source, f"assets_{i % 4}", f"asset_{i}.bin")
+        p.parent.mkdir(parents=True, exist_ok=True)
+        with p.open("wb") as f:
+            for _ in range(per_file):
+                f.write(block)
+
+
+def generate_small(source: Path, files: int):
+    # Shaped like `node_modules`: many directories of a few small files.
+    for i in range(files):
+        p = Path(source, f"package_{i // 100}", f"lib_{i // 10 % 10}", f"file_{i}.js")
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_bytes(os.urandom(512 + i % 8 * 512))
+
+
+def run_sync(source: Path, build_dir: Path, workers: int) -> float:
+    sync = BuildSync(build_dir, Path(build_dir.parent, "manifest.json"))
+    sync.workers = workers
+    started = time.perf_counter()
+    sync.prepare()
+    copies = []
+    for root, dirs, files in os.walk(source):
+        rel = Path(root).relative_to(source)
+        sync.mkdir(rel)
+        for filename in files:
+            copies.append((Path(root, filename), Path(rel, filename)))
+    sync.copy_all(copies)
+    sync.finish()
+    os.sync()
+    return time.perf_counter() - started
+
+
+def run(source: Path, dest: Path, strategy: str) -> tuple[float, int, dict[str, int]]:
+    used = {}
+    written = 0
+    started = time.perf_counter()
+    for root, dirs, files in os.walk(source):
+        rel = Path(root).relative_to(source)
+        Path(dest, rel).mkdir(parents=True, exist_ok=True)
+        for filename in files:
+            used_strategy, size = filecopy.copy_file(Path(root, filename), Path(dest, rel, filename), strategy)
+            used[used_strategy] = used.get(used_strategy, 0) + 1
+            written += size
+    # Written data must reach the disk for the timings to be comparable.
+    os.sync()
+    return time.perf_counter() - started, written, used
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--files", type=int, default=16)
+    parser.add_argument("--small-files", type=int, default=20000)
+    parser.add_argument("--workers", default="1,2,4,8,16")
+    parser.add_argument("--dir", type=Path, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        source = Path(tmp, "source")
+        generate(source, args.size_mb, args.files)
+        os.sync()
+
+        print(f"{'strategy':>10} {'time':>9} {'written':>12} used")
+        for strategy in filecopy.strategies:
+            dest = Path(tmp, strategy)
+            elapsed, written, used = run(source, dest, strategy)
+            used_str = ", ".join(f"{k} {v}" for k, v in used.items())
+            print(f"{strategy:>10} {elapsed:>8.3f}s {written / 1024 / 1024:>9.0f} MB {used_str}")
+            shutil.rmtree(dest)
+        shutil.rmtree(source)
+
+        source = Path(tmp, "small")
+        generate_small(source, args.small_files)
+        os.sync()
+        print(f"\n{args.small_files} small files")
+        print(f"{'workers':>10} {'time':>9} {'files/s':>12}")
+        for workers in [int(w) for w in args.workers.split(",")]:
+            build_dir = Path(tmp, "build")
+            elapsed = run_sync(source, build_dir, workers)
+            print(f"{workers:>10} {elapsed:>8.3f}s {args.small_files / elapsed:>12.0f}")
+            shutil.rmtree(build_dir)
+
+
+if __name__ == "__main__":
+    main()
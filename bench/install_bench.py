@@ -0,0 +1,72 @@
+"""
+Benchmark of module installs per download concurrency, against a local stand-in module server.
+
+Usage: `python bench/install_bench.py [--modules 32] [--size-kb 512] [--latency 0.05] [--concurrency 1,4,8]`.
+"""
+import argparse
+import asyncio
+import io
+import os
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "test"))
+
+import archive
+import location
+import module
+from stub_modules import StubModules
+
+
+def generate(tmp: Path, modules: int, size_kb: int) -> dict[str, bytes]:
+    archives = {}
+    for i in range(modules):
+        source = Path(tmp, "sources", f"m{i}")
+        source.mkdir(parents=True)
+        for j in range(8):
+            # Half random, half repeated, so archives are partly compressible.
+            Path(source, f"file_{j}.bin").write_bytes(os.urandom(size_kb * 64) + bytes(size_kb * 64))
+        f = io.BytesIO()
+        archive.write_tar(f, [(item, item.name) for item in sorted(source.iterdir())])
+        archives[f"example.m{i}=1.0.0"] = f.getvalue()
+    return archives
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modules", type=int, default=32)
+    parser.add_argument("--size-kb", type=int, default=512)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", default="1,4,8")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["HOME"] = str(Path(tmp, "home"))
+        location.init("install_bench")
+        archives = generate(Path(tmp), args.modules, args.size_kb)
+        size = sum(len(data) for data in archives.values())
+        modules = "".join(f"    m{i}: {{ \"id\": \"example.m{i}\", \"version\": \"1.0.0\" }},\n" for i in range(args.modules))
+        module._projectfile = Path(tmp, "projectfile")
+        module._projectfile.write_text(f"id = \"bench\"\nmodules = {{\n{modules}}}\n")
+        module._host = "127.0.0.1"
+        module._response = lambda *args: None
+        print(f"{args.modules} modules, {size / 1024 / 1024:.1f} MB, {args.latency * 1000:.0f}ms latency ({os.cpu_count()} CPUs)")
+        print(f"{'concurrency':>12} {'time':>9} {'throughput':>14}")
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            target = Path(tmp, f"install_{concurrency}")
+            target.mkdir()
+            os.chdir(target)
+            with StubModules(archives, delay=args.latency) as server:
+                module._port = server.port
+                started = time.perf_counter()
+                asyncio.run(module.cmd_install(concurrency))
+                elapsed = time.perf_counter() - started
+            print(f"{concurrency:>12} {elapsed:>8.3f}s {size / elapsed / 1024 / 1024:>9.1f} MB/s")
+        os.chdir(tmp)
+
+
+if __name__ == "__main__":
+    main()
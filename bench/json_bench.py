@@ -0,0 +1,78 @@
+"""
+Benchmark of JSON encoding in byteop, against the former two-pass encoding.
+
+Usage: `python bench/json_bench.py [--depth 6] [--width 8] [--models 100000]`. `orjson` is measured if it's installed.
+"""
+import argparse
+from enum import Enum
+import json
+from pathlib import Path
+import sys
+import time
+
+from pydantic import BaseModel
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import byteop
+
+
+class Status(str, Enum):
+    active = "active"
+    blocked = "blocked"
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+    status: Status
+    tags: list[str]
+
+
+def legacy_json_to_bytes(input):
+    return json.dumps(byteop.convert_enums(input)).encode()
+
+
+def legacy_models_to_bytes(models):
+    return json.dumps([x.model_dump() for x in models]).encode()
+
+
+def nested(depth: int, width: int):
+    if depth == 0:
+        return {"status": Status.active, "values": [1, 2, 3], "name": "leaf"}
+    return {f"key_{i}": nested(depth - 1, width) for i in range(width)}
+
+
+def timed(f, *args) -> float:
+    started = time.perf_counter()
+    f(*args)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("--models", type=int, default=100000)
+    args = parser.parse_args()
+
+    data = nested(args.depth, args.width)
+    models = [Item(id=i, name=f"item {i}", status=Status.blocked, tags=["a", "b"]) for i in range(args.models)]
+    backends = ["json"] + (["orjson"] if byteop.orjson is not None else [])
+
+    print(f"nested dict, depth {args.depth}, width {args.width}")
+    print(f"{'legacy':>10} {timed(legacy_json_to_bytes, data):.3f}s")
+    for backend in backends:
+        byteop.set_json_backend(backend)
+        print(f"{backend:>10} {timed(byteop.json_to_bytes, data):.3f}s")
+
+    print(f"\n{args.models} models")
+    print(f"{'legacy':>10} {timed(legacy_models_to_bytes, models):.3f}s")
+    for backend in backends:
+        byteop.set_json_backend(backend)
+        print(f"{backend:>10} {timed(byteop.models_to_bytes, models):.3f}s, streamed {timed(lambda: list(byteop.iter_json_bytes(models))):.3f}s")
+    byteop.set_json_backend("json")
+
+
+if __name__ == "__main__":
+    main()
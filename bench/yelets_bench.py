@@ -0,0 +1,133 @@
+"""
+Benchmark of Yelets translation: legacy regex line translator against the parser, and the line translation with the parser for the rest, which is used to compile Yelets code.
+
+Usage: `python bench/yelets_bench.py [lines ...]`, default sizes are 10k and 100k lines.
+"""
+import argparse
+from pathlib import Path
+import re
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from yelets import parser
+
+
+def legacy_translate(code: str) -> str:
+    """
+    Regex line translator, which was used before the parser.
+    """
+    result = ""
+    ind = 0
+    preserve_block_close = 0
+
+    for line in code.splitlines():
+        l = line.strip()
+        prefix = "    " * ind
+
+        if l == "}" or l == "},":
+            if ind:
+                ind -= 1
+            prefix = "    " * (ind)
+            if preserve_block_close:
+                preserve_block_close -= 1
+                result += prefix + l + "\n"
+            continue
+
+        dict_match = re.match(r"^\s*([A-z0-9_]+)\s*=\s*{\s*$", l)
+        if dict_match:
+            result += f"{prefix}{dict_match.group(1)} = " + "{\n"
+            preserve_block_close += 1
+            ind += 1
+            continue
+
+        subdict_match = re.match(r"^\s*\"?([A-z0-9_]+)\"?\s*:\s*{\s*$", l)
+        if subdict_match:
+            result += f"{prefix}\"{subdict_match.group(1)}\":" + " {\n"
+            preserve_block_close += 1
+            ind += 1
+            continue
+
+        subdict_direct_match = re.match(r"^\s*\"?([A-z0-9_]+)\"?\s*:\s*(.+)\s*$", l)
+        if subdict_direct_match:
+            result += f"{prefix}\"{subdict_direct_match.group(1)}\": {subdict_direct_match.group(2)}\n"
+            continue
+
+        function_match = re.match(r"^\s*([A-z0-9_]+)\s*=\s*fn\s*\((.*)\)\s*{\s*$", l)
+        if function_match:
+            result += f"{prefix}def {function_match.group(1)}({function_match.group(2)}):\n"
+            ind += 1
+            continue
+
+        import_match = re.match(r"^\s*([A-z0-9_]+)\s*=\s*@import\s*\(\"([A-z0-9_\-\.]+)\"\)\s*$", l)
+        if import_match:
+            continue
+
+        if_match = re.match(r"^\s*if\s*(.+)\s*{\s*$", l)
+        if if_match:
+            result += f"{prefix}if {if_match.group(1)}:\n"
+            ind += 1
+            continue
+
+        for_match = re.match(r"^\s*for\s*(.+)\s*{\s*$", l)
+        if for_match:
+            result += f"{prefix}for {for_match.group(1)}:\n"
+            ind += 1
+            continue
+
+        while_match = re.match(r"^\s*while\s*(.+)\s*{\s*$", l)
+        if while_match:
+            result += f"{prefix}while {while_match.group(1)}:\n"
+            ind += 1
+            continue
+
+        result += prefix + l + "\n"
+
+    return result
+
+
+def generate(lines: int) -> str:
+    """
+    Generates a projectfile with roughly given number of lines: half of it is a modules dictionary, and half are functions.
+    """
+    parts = ["project = @import(\"project\")\n", "id = \"bench\"\n", "modules = {\n"]
+    for i in range(lines // 8):
+        parts.append(f"    \"module_{i}\": {{\n        \"id\": \"example.module_{i}\",\n        \"version\": \"0.{i}.0\",\n    }},\n")
+    parts.append("}\n")
+    for i in range(lines // 20):
+        parts.append(f"build_{i} = fn(a) {{\n    project.info(\"build_{i}.py\")\n    x = [a, {i}, \"{i}\"]\n    if a > {i} {{\n        x = a + 1\n    }}\n    for i in range(3) {{\n        x = i * 2 + len(x)\n    }}\n    return x\n}}\n")
+    return "".join(parts)
+
+
+def measure(f, *args) -> tuple[float, object]:
+    started = time.perf_counter()
+    result = f(*args)
+    return time.perf_counter() - started, result
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("lines", type=int, nargs="*", default=[10_000, 100_000])
+    args = argument_parser.parse_args()
+
+    print(f"{'lines':>8} {'translator':>10} {'translate':>10} {'compile':>10} {'total':>10}")
+    for lines in args.lines:
+        code = generate(lines)
+        real_lines = code.count("\n")
+
+        translate_time, python_code = measure(legacy_translate, code)
+        compile_time, _ = measure(compile, python_code, "<bench>", "exec")
+        print(f"{real_lines:>8} {'legacy':>10} {translate_time:>9.3f}s {compile_time:>9.3f}s {translate_time + compile_time:>9.3f}s")
+
+        parse_time, (module, _) = measure(parser.parse, code)
+        compile_time, _ = measure(compile, module, "<bench>", "exec")
+        print(f"{real_lines:>8} {'parser':>10} {parse_time:>9.3f}s {compile_time:>9.3f}s {parse_time + compile_time:>9.3f}s")
+
+        translate_time, (translated, _) = measure(parser.translate, code)
+        compile_time, _ = measure(compile, translated, "<bench>", "exec")
+        print(f"{real_lines:>8} {'lines':>10} {translate_time:>9.3f}s {compile_time:>9.3f}s {translate_time + compile_time:>9.3f}s")
+
+
+if __name__ == "__main__":
+    main()
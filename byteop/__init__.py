@@ -1,14 +1,21 @@
 """
 Operations with bytes.
+
+JSON is encoded by the standard `json` module, or by `orjson` if it's installed and selected with `set_json_backend`.
 """
 
 from enum import Enum
 import struct
 import json
-from typing import Any, Sequence, TypeVar
+from typing import Any, Iterable, Iterator, Sequence, TypeVar
 
 from pydantic import BaseModel, ValidationError
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from error import CodeError
 from codes import model_validation_error
 
@@ -16,6 +23,8 @@ from codes import model_validation_error
 ENCODING = "utf-8"
 T_Model = TypeVar("T_Model", bound=BaseModel)
 
+_json_backend = "json"
+
 
 def bytes_to_model(model_type: type[T_Model], input: bytes) -> T_Model:
     try:
@@ -57,15 +66,75 @@ def string_to_bytes(input: str) -> bytes:
     return input.encode(ENCODING)
 
 
+def format_size(size: float) -> str:
+    """
+    Formats a number of bytes for humans.
+    """
+    if size < 1024:
+        return f"{size:.0f} B"
+    for unit in ["KB", "MB"]:
+        size /= 1024
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+    return f"{size / 1024:.1f} GB"
+
+
 def models_to_bytes(models: Sequence[BaseModel]) -> bytes:
-    return json.dumps([x.model_dump() for x in models]).encode(ENCODING)
+    return json_to_bytes(models)
 
 def model_to_bytes(model: BaseModel) -> bytes:
     return model.model_dump_json().encode(ENCODING)
 
 
+def set_json_backend(backend: str):
+    """
+    Selects JSON encoder: `json` or `orjson`. `orjson` is several times faster, but produces compact output, and doesn't support integers beyond 64 bits.
+    """
+    global _json_backend
+    if backend not in ("json", "orjson"):
+        raise Exception(f"unknown json backend '{backend}'")
+    if backend == "orjson" and orjson is None:
+        raise Exception("json backend 'orjson' is not installed")
+    _json_backend = backend
+
+def _json_default(obj: Any) -> Any:
+    # Called by the encoder only for objects it can't encode itself, so the structure is encoded in a single pass.
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
 def json_to_bytes(input: Any) -> bytes:
-    return json.dumps(convert_enums(input)).encode(ENCODING)
+    """
+    Encodes JSON, converting enums to their values, models to dicts, and sets and tuples to lists.
+    """
+    if _json_backend == "orjson":
+        return orjson.dumps(input, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(input, default=_json_default).encode(ENCODING)
+
+def iter_json_bytes(items: Iterable[Any], batch_size: int = 1000) -> Iterator[bytes]:
+    """
+    Encodes items as a JSON list, yielding a chunk per `batch_size` items, so the whole list is never held encoded in memory.
+    """
+    separator = b", " if _json_backend == "json" else b","
+    prefix = b"["
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            # Batch is encoded as a list, which brackets are replaced.
+            yield prefix + json_to_bytes(batch)[1:-1]
+            prefix = separator
+            batch.clear()
+    if batch:
+        yield prefix + json_to_bytes(batch)[1:-1] + b"]"
+    elif prefix == b"[":
+        yield b"[]"
+    else:
+        yield b"]"
 
 def bytes_to_json(input: bytes) -> Any:
     if input == bytes():
@@ -104,3 +173,107 @@ def unwrap_coded_structure(input: bytes) -> tuple[int, bytes]:
     if len(input) > 2:
         payload = input[2:]
     return code, payload
+
+def unwrap_coded_view(input: bytes | bytearray | memoryview) -> tuple[int, memoryview]:
+    """
+    Same as `unwrap_coded_structure`, but returns the payload as a view into the input, without copying it.
+    """
+    view = memoryview(input)
+    if len(view) < 2:
+        raise Exception("too short coded structure")
+    return struct.unpack_from("<H", view)[0], view[2:]
+
+def wrap_coded_structure(code: int, payload: bytes | bytearray | memoryview) -> bytes:
+    """
+    Makes coded structure out of code and payload.
+    """
+    return struct.pack("<H", code) + payload
+
+
+# Frame is a coded structure, prefixed with 4 bytes of payload length, so frames can follow each other in a stream.
+FRAME_HEADER = struct.Struct("<IH")
+
+def frame_header(code: int, size: int) -> bytes:
+    """
+    Returns header of a frame. Sending it followed by the payload avoids copying the payload into a frame.
+    """
+    return FRAME_HEADER.pack(size, code)
+
+def encode_frame(code: int, payload: bytes | bytearray | memoryview) -> bytes:
+    return FRAME_HEADER.pack(len(payload), code) + payload
+
+def encode_frames(frames: Iterable[tuple[int, bytes | bytearray | memoryview]]) -> bytes:
+    parts = []
+    for code, payload in frames:
+        parts.append(FRAME_HEADER.pack(len(payload), code))
+        parts.append(payload)
+    return b"".join(parts)
+
+class FrameDecoder:
+    """
+    Incremental decoder of a stream of frames, fed by chunks as they are read from a socket or a response body.
+
+    Frames lying whole within a chunk are returned as views into the chunk, so the chunk must not be modified while they are used. Frames split between chunks are assembled into a buffer of their exact size.
+    """
+    def __init__(self, max_size: int | None = None):
+        self.max_size = max_size
+        self._header = bytearray()
+        self._frame: bytearray | None = None
+        self._filled = 0
+        self._code = 0
+
+    @property
+    def pending(self) -> bool:
+        """
+        Whether a frame has been started, but not completed.
+        """
+        return self._frame is not None or len(self._header) > 0
+
+    def feed(self, data: bytes | bytearray | memoryview) -> list[tuple[int, memoryview]]:
+        """
+        Returns `(code, payload)` of frames completed by the data.
+        """
+        view = memoryview(data)
+        end = len(view)
+        pos = 0
+        frames = []
+        while pos < end:
+            if self._frame is None:
+                if not self._header and end - pos >= FRAME_HEADER.size:
+                    size, code = FRAME_HEADER.unpack_from(view, pos)
+                    pos += FRAME_HEADER.size
+                else:
+                    take = min(FRAME_HEADER.size - len(self._header), end - pos)
+                    self._header += view[pos:pos + take]
+                    pos += take
+                    if len(self._header) < FRAME_HEADER.size:
+                        break
+                    size, code = FRAME_HEADER.unpack(self._header)
+                    self._header.clear()
+                if self.max_size is not None and size > self.max_size:
+                    raise Exception(f"frame of {size} bytes exceeds maximum of {self.max_size} bytes")
+                if end - pos >= size:
+                    frames.append((code, view[pos:pos + size]))
+                    pos += size
+                    continue
+                self._frame = bytearray(size)
+                self._filled = 0
+                self._code = code
+            take = min(len(self._frame) - self._filled, end - pos)
+            self._frame[self._filled:self._filled + take] = view[pos:pos + take]
+            self._filled += take
+            pos += take
+            if self._filled == len(self._frame):
+                frames.append((self._code, memoryview(self._frame)))
+                self._frame = None
+        return frames
+
+def iter_frames(chunks: Iterable[bytes], max_size: int | None = None) -> Iterator[tuple[int, memoryview]]:
+    """
+    Decodes frames from chunks of a stream, raising if the stream ends within a frame.
+    """
+    decoder = FrameDecoder(max_size)
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    if decoder.pending:
+        raise Exception("stream ended within a frame")
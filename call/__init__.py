@@ -1,11 +1,27 @@
+import asyncio
+from collections import deque
+import os
 from pathlib import Path
+import queue
+import shlex
+import signal
 import subprocess
+import threading
+import time
+from typing import Callable
 
 
-def call(command: str, dir: Path | str | None = None) -> tuple[str, str, int]:
+def _args(command: str | list[str]) -> str | list[str]:
+    # Without a shell, a string command is a whole program name on POSIX, unlike on Windows, where the program parses it.
+    if isinstance(command, str) and os.name != "nt":
+        return shlex.split(command)
+    return command
+
+
+def call(command: str | list[str], dir: Path | str | None = None) -> tuple[str, str, int]:
     try:
         result = subprocess.run(
-            command,
+            _args(command),
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=True,
@@ -14,4 +30,173 @@ def call(command: str, dir: Path | str | None = None) -> tuple[str, str, int]:
         )
         return (result.stdout, result.stderr, result.returncode)
     except subprocess.CalledProcessError as e:
-        return (e.stdout, e.stderr, e.returncode)
\ No newline at end of file
+        return (e.stdout, e.stderr, e.returncode)
+
+
+class Result:
+    def __init__(self, stdout: str, stderr: str, retcode: int, wall_time: float, cpu_time: float | None, timed_out: bool, cancelled: bool):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.retcode = retcode
+        self.wall_time = wall_time
+        # User and system time of the process, unknown on Windows.
+        self.cpu_time = cpu_time
+        self.timed_out = timed_out
+        self.cancelled = cancelled
+
+
+def run(
+    command: str | list[str],
+    dir: Path | str | None = None,
+    *,
+    on_line: Callable[[str, str], None] | None = None,
+    tail: int = 10000,
+    timeout: float | None = None,
+    cancel: threading.Event | None = None,
+) -> Result:
+    """
+    Runs a command, passing each line of its output to `on_line` as `("stdout" | "stderr", line)` while it runs.
+
+    Only the last `tail` lines of stdout and of stderr are kept for the result. The process is killed after `timeout` seconds, when `cancel` is set, or when the waiting thread is interrupted.
+    """
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        _args(command),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+        cwd=dir,
+    )
+    lines = queue.Queue()
+
+    def pump(name, pipe):
+        for line in pipe:
+            lines.put((name, line))
+        lines.put((name, None))
+
+    for name, pipe in [("stdout", process.stdout), ("stderr", process.stderr)]:
+        threading.Thread(target=pump, args=(name, pipe), daemon=True).start()
+
+    output = {"stdout": deque(maxlen=tail), "stderr": deque(maxlen=tail)}
+    deadline = None if timeout is None else started + timeout
+    timed_out = False
+    cancelled = False
+    running = 2
+    try:
+        while running:
+            try:
+                # Wake up periodically to check the deadline and the cancellation.
+                name, line = lines.get(timeout=0.1)
+            except queue.Empty:
+                if deadline is not None and time.perf_counter() > deadline:
+                    timed_out = True
+                    break
+                if cancel is not None and cancel.is_set():
+                    cancelled = True
+                    break
+                continue
+            if line is None:
+                running -= 1
+                continue
+            output[name].append(line)
+            if on_line is not None:
+                on_line(name, line)
+    finally:
+        # Output is not finished, if the loop was left early.
+        if running:
+            _kill(process)
+        cpu_time = _reap(process)
+        # Otherwise pipes are still read by the threads, until children of the process, which inherited them, exit.
+        if not running:
+            for pipe in [process.stdout, process.stderr]:
+                pipe.close()
+    return Result(
+        "".join(output["stdout"]),
+        "".join(output["stderr"]),
+        process.returncode,
+        time.perf_counter() - started,
+        cpu_time,
+        timed_out,
+        cancelled,
+    )
+
+
+# Longest line of output read by `run_async`, longer lines fail the call.
+_line_limit = 1 << 24
+
+
+async def run_async(
+    command: str | list[str],
+    dir: Path | str | None = None,
+    *,
+    on_line: Callable[[str, str], None] | None = None,
+    tail: int = 10000,
+    timeout: float | None = None,
+) -> Result:
+    """
+    Runs a command like `run`, but in the running event loop instead of threads. The process is killed after `timeout` seconds, or when the awaiting task is cancelled.
+
+    CPU time is not measured, the process is reaped by the event loop.
+    """
+    started = time.perf_counter()
+    args = _args(command)
+    if isinstance(args, str):
+        process = await asyncio.create_subprocess_shell(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=dir, limit=_line_limit)
+    else:
+        process = await asyncio.create_subprocess_exec(*args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=dir, limit=_line_limit)
+    output = {"stdout": deque(maxlen=tail), "stderr": deque(maxlen=tail)}
+
+    async def pump(name, stream):
+        async for line in stream:
+            line = line.decode(errors="replace")
+            output[name].append(line)
+            if on_line is not None:
+                on_line(name, line)
+
+    timed_out = False
+    try:
+        try:
+            async with asyncio.timeout(timeout):
+                await asyncio.gather(pump("stdout", process.stdout), pump("stderr", process.stderr))
+                await process.wait()
+        except TimeoutError:
+            timed_out = True
+            process.kill()
+            await process.wait()
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+        raise
+    return Result(
+        "".join(output["stdout"]),
+        "".join(output["stderr"]),
+        process.returncode,
+        time.perf_counter() - started,
+        None,
+        timed_out,
+        False,
+    )
+
+
+def _kill(process: subprocess.Popen):
+    # `Popen.kill` polls the process first, which would reap it before its resource usage is read.
+    if os.name == "nt":
+        process.kill()
+    else:
+        try:
+            os.kill(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def _reap(process: subprocess.Popen) -> float | None:
+    """
+    Waits for the process, and returns its CPU time where it's available.
+    """
+    if not hasattr(os, "wait4"):
+        process.wait()
+        return None
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return usage.ru_utime + usage.ru_stime
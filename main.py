@@ -31,6 +31,7 @@ import location
 from model import Module, Project
 import module
 import yelets
+import yelets_project
 import os
 from pathlib import Path
 import re
@@ -48,6 +49,19 @@ target_version: str
 
 
 async def cmd_status():
+    projectfile = Path(cwd, "projectfile")
+    try:
+        project = Project.read_metadata(projectfile) if projectfile.exists() else None
+    except Exception as e:
+        # Status of the repository is shown anyway.
+        log.debug(f"status: {e}")
+        project = None
+    if project is not None:
+        response(f"{colorama.Fore.MAGENTA}== {colorama.Fore.YELLOW}{project.id}{colorama.Fore.RESET} {colorama.Fore.MAGENTA}=={colorama.Fore.RESET}")
+        for path, mod in project.modules.items():
+            response(f"{const.indentation}{path}: {mod.id}={mod.version}")
+        response()
+
     stdout, stderr, e = call("git status")
     if e > 0:
         response(f"project status finished with code #{e}")
@@ -123,11 +137,16 @@ async def execute_project_function(projectfile: Path, function_name: str, args:
         final_function = function
 
     try:
-        final_function()
+        result = final_function()
+        # Functions defined by `async fn` run in the event loop of the tool.
+        if inspect.isawaitable(result):
+            await result
     except Exception as e:
+        await yelets_project.afinish(failed=True)
         response(f"{colorama.Fore.RED}ERROR{colorama.Fore.RESET}")
         raise Exception(f"During execution of a function '{function_name}' at '{projectfile}', an error occurred: {e}") from e
     else:
+        await yelets_project.afinish()
         response(f"{colorama.Fore.GREEN}DONE{colorama.Fore.RESET}")
 
 
@@ -136,17 +155,26 @@ async def cmd_execute(function_name: str, args: YeletsFunctionArgs):
 
 
 async def cmd_execute_all(function_name: str, args: YeletsFunctionArgs):
-    i = 0
     # Collect projects.
+    projectfiles = []
     for source, subdirs, subfiles in cwd.walk():
         for file in subfiles:
             # @todo We should be able to search for `project`, `project.y`, `project.jai`, etc. Project file implementation does not matter as long as we have a driver for it. What matters, is complying to our standards - drivers should execute file in a way, that left us with a namespace map, with converted to python objects, including functions.
             if file == "projectfile":
-                projectfile = Path(source, file)
-                if i > 0:
-                    response()
-                await execute_project_function(projectfile, function_name, args)
-                i += 1
+                projectfiles.append(Path(source, file))
+
+    # Ids are read without execution, so the plan is known before any function has run. Projects with computed ids are listed by their location.
+    names = []
+    for projectfile in projectfiles:
+        project_id = yelets.read_literals(projectfile, ["id"]).get("id", None)
+        names.append(project_id if isinstance(project_id, str) and project_id else str(projectfile.parent.relative_to(cwd)))
+    response(f"Execute '{function_name}' for {len(projectfiles)} project(s): {', '.join(names)}.")
+    response()
+
+    for i, projectfile in enumerate(projectfiles):
+        if i > 0:
+            response()
+        await execute_project_function(projectfile, function_name, args)
 
 
 async def main():
@@ -156,6 +184,9 @@ async def main():
     parser.add_argument("-cwd", type=Path, dest="cwd", default=Path.cwd())
     parser.add_argument("-v, -version", type=str, default="0.0.0", dest="version")
     parser.add_argument("-d, -debug", action="store_true", dest="debug")
+    parser.add_argument("-no-cache", action="store_true", dest="no_cache", help="Do not use cache of compiled Yelets files.")
+    parser.add_argument("-clear-cache", action="store_true", dest="clear_cache", help="Clear cache of compiled Yelets files before the run.")
+    parser.add_argument("-j", "-jobs", type=int, default=None, dest="jobs", help="Jobs run at once by `cmd.parallel` and `cmd.callAll`, one per CPU by default.")
 
     subparsers = parser.add_subparsers(title="Commands", dest="command")
 
@@ -194,7 +225,8 @@ async def main():
     subparser.add_argument("upload_dir", type=Path)
 
     # `project install`
-    subparsers.add_parser("install", help="Installs/Refreshes all project-specified dependencies.")
+    subparser = subparsers.add_parser("install", help="Installs/Refreshes all project-specified dependencies.")
+    subparser.add_argument("-concurrency", type=int, default=4, dest="concurrency", help="Modules downloaded at once.")
 
     args = parser.parse_args()
     global cwd
@@ -206,6 +238,9 @@ async def main():
     global target_debug
     target_debug = args.debug
 
+    yelets.cache.init(location.user("cache/yelets"), enabled=not args.no_cache, clear_existing=args.clear_cache)
+    yelets.cmd_module.parallel_workers = args.jobs
+
     try:
         args_kw = args.kw
     except Exception:
@@ -241,9 +276,10 @@ async def main():
         case "upload":
             await module.cmd_upload(args.upload_dir)
         case "install":
-            await module.cmd_install()
+            await module.cmd_install(args.concurrency)
         case _:
             raise Exception(f"unrecognized command '{args.command}'")
+    log.debug(f"yelets cache: {yelets.cache.hits} hits, {yelets.cache.misses} misses")
     response()
 
 
@@ -13,8 +13,11 @@ class Module(BaseModel):
     version: str
 
     @classmethod
-    def read(cls, dir: Path) -> Self:
-        r = yelets.execute_file(dir)
+    def read(cls, f: Path) -> Self:
+        r = yelets.read_literals(f, ["id", "version"])
+        for key in ["id", "version"]:
+            if not isinstance(r.get(key, None), str):
+                raise Exception(f"Module at location '{f}' should define '{key}' as a string literal.")
         return cls(
             id=r["id"],
             version=r["version"],
@@ -27,6 +30,24 @@ class Project(BaseModel):
     modules: dict[Path, Module]
     context: dict
 
+    @classmethod
+    def read_metadata(cls, f: Path) -> Self:
+        """
+        Reads project's id and modules, without executing the projectfile.
+
+        Both must be defined as literals.
+        """
+        try:
+            ctx = yelets.read_literals(f, ["id", "modules"], strict=True)
+        except Exception as e:
+            raise Exception(f"Project at location '{f}' should define 'id' and 'modules' as literals: {e}") from e
+        return cls(
+            id=_validate_id(f, ctx),
+            source=f.parent,
+            modules=_read_modules(ctx),
+            context={},
+        )
+
     @classmethod
     def read(cls, f: Path, target_version, target_debug, cwd) -> Self:
         project = cls(
@@ -35,7 +56,7 @@ class Project(BaseModel):
             modules={},
             context={},
         )
-        project_imports = yelets_project.init(
+        yelets_project.init(
             response=response,
             project=project,
             cwd=cwd,
@@ -44,28 +65,33 @@ class Project(BaseModel):
             target_debug=target_debug,
         )
         imports = {
-            "project": project_imports,
+            # Resolved on access, so Yelets files imported by several projects see the current one.
+            "project": yelets_project.get_imports,
         }
         ctx = yelets.execute_file(f, imports)
 
-        project_id = ctx.get("id", "")
-        if not isinstance(project_id, str):
-            raise Exception(f"Invalid project name at location '{f}'.")
-        elif project_id == "":
-            raise Exception(f"Empty project name at location '{f}'.")
-        elif project_id is None or project_id == "":
-            raise Exception(f"Invalid project configuration at '{f}'.")
+        project.id = _validate_id(f, ctx)
+        project.context = ctx
+        project.modules = _read_modules(ctx)
 
-        modules = ctx.get("modules", {})
-        processed_modules = {}
-        for k, v in modules.items():
-            processed_modules[Path(k)] = Module(
-                id=v["id"],
-                version=v["version"],
-            )
+        return project
 
-        project.id = project_id
-        project.context = ctx
-        project.modules = processed_modules
 
-        return project
\ No newline at end of file
+def _validate_id(f: Path, ctx: dict) -> str:
+    project_id = ctx.get("id", "")
+    if not isinstance(project_id, str):
+        raise Exception(f"Invalid project name at location '{f}'.")
+    elif project_id == "":
+        raise Exception(f"Empty project name at location '{f}'.")
+    return project_id
+
+
+def _read_modules(ctx: dict) -> dict[Path, Module]:
+    modules = ctx.get("modules", {})
+    processed_modules = {}
+    for k, v in modules.items():
+        processed_modules[Path(k)] = Module(
+            id=v["id"],
+            version=v["version"],
+        )
+    return processed_modules
\ No newline at end of file
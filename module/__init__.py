@@ -1,19 +1,22 @@
 """
 Client to manage modules.
 """
-import io
+import asyncio
 from pathlib import Path
 import shutil
-import tarfile
-from typing import Callable
+import tempfile
+import time
+from typing import BinaryIO, Callable, Iterable
 
 from pydantic import BaseModel
+import archive
+import byteop
 import config
 import location
 import log
 import httpx
 
-from model import Project
+from model import Module, Project
 import xrandom
 import yelets
 
@@ -27,35 +30,82 @@ _cwd: Path
 _response: Callable
 
 
-def _request(route: str, data: bytes = bytes()) -> httpx.Response:
-    return httpx.request("post", f"http://{_host}:{_port}/{route}", content=data)
-
+# Downloaded archives larger than this are spooled to a temporary file.
+_spool_size = 8 << 20
 
-async def cmd_install():
-    project = Project.read(_projectfile, _target_version, _target_debug, _cwd)
-    for path, module in project.modules.items():
-        # request module tar from the server
-        log.info(f"download {module.id}={module.version} to '{path}'")
-        response = _request(f"download/@{module.id}={module.version}")
 
-        if response.status_code != 200:
-            log.error(f"failed to install module {module}")
-            continue
+def _request(route: str, data: bytes | Iterable[bytes] = bytes()) -> httpx.Response:
+    return httpx.request("post", f"http://{_host}:{_port}/{route}", content=data)
 
-        if path.exists():
-            trash_dir = location.user("trash")
-            trash_dir.mkdir(parents=True, exist_ok=True)
-            trash_path = Path(trash_dir, f"{path.name}_{xrandom.makeid()}")
-            log.info(f"move path '{path}' to trash '{trash_path}'")
-            shutil.move(path, trash_path)
 
-        # unwrap tar on the fly
-        with tarfile.open(fileobj=io.BytesIO(response.content), mode="r:gz") as tar:
-            tar.extractall(path=path)
+async def cmd_install(concurrency: int = 4):
+    """
+    Downloads modules of the project, at most `concurrency` at once, over shared keep-alive connections. Each module is extracted in a thread, while the next ones are downloaded.
+    """
+    project = Project.read_metadata(_projectfile)
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(base_url=f"http://{_host}:{_port}", timeout=None) as client:
+        sizes = await asyncio.gather(*(_install(client, semaphore, path, module) for path, module in project.modules.items()))
+    elapsed = time.perf_counter() - started
+    installed = [size for size in sizes if size is not None]
+    total = sum(installed)
+    message = f"Installed {len(installed)} module(s), {byteop.format_size(total)} in {elapsed:.2f}s ({byteop.format_size(total / elapsed if elapsed else 0)}/s)"
+    if len(installed) < len(sizes):
+        message += f", {len(sizes) - len(installed)} failed"
+    _response(message + ".")
+
+
+async def _install(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, path: Path, module: Module) -> int | None:
+    """
+    Returns size of the downloaded module, or `None` if it could not be installed.
+    """
+    # Archive is downloaded completely before the installed module is replaced, so a failed download leaves it intact.
+    spool = tempfile.SpooledTemporaryFile(max_size=_spool_size)
+    try:
+        # Semaphore bounds only downloads, so extraction doesn't hold a download slot.
+        async with semaphore:
+            log.info(f"download {module.id}={module.version} to '{path}'")
+            started = time.perf_counter()
+            try:
+                async with client.stream("POST", f"/download/@{module.id}={module.version}") as response:
+                    if response.status_code != 200:
+                        log.error(f"failed to install module {module}")
+                        return None
+                    async for chunk in response.aiter_bytes():
+                        spool.write(chunk)
+            except httpx.HTTPError as e:
+                log.error(f"failed to install module {module}: {e}")
+                return None
+            elapsed = time.perf_counter() - started
+
+        size = spool.tell()
+        spool.seek(0)
+        try:
+            await asyncio.to_thread(_extract, path, spool)
+        except Exception as e:
+            log.error(f"failed to extract module {module}: {e}")
+            return None
+    finally:
+        spool.close()
+    _response(f"{module.id}={module.version}: {byteop.format_size(size)} in {elapsed:.2f}s ({byteop.format_size(size / elapsed if elapsed else 0)}/s)")
+    return size
+
+
+def _extract(path: Path, fileobj: BinaryIO):
+    if path.exists():
+        trash_dir = location.user("trash")
+        trash_dir.mkdir(parents=True, exist_ok=True)
+        trash_path = Path(trash_dir, f"{path.name}_{xrandom.makeid()}")
+        log.info(f"move path '{path}' to trash '{trash_path}'")
+        shutil.move(path, trash_path)
+
+    # unwrap tar on the fly
+    archive.extract_tar(fileobj, path)
 
 
 async def cmd_add(dependency_name: str, dependency_version: str, output_dir: Path | None):
-    project = Project.read(_projectfile, _target_version, _target_debug, _cwd)
+    project = Project.read_metadata(_projectfile)
     # strategy: parse modules, remove old record, insert new modules record at the end of the file
     content = ""
     with _projectfile.open("r") as f:
@@ -126,21 +176,12 @@ async def cmd_add(dependency_name: str, dependency_version: str, output_dir: Pat
 
 
 async def cmd_upload(dir: Path):
-    data = _compress(dir)
-    r = _request("upload", data)
+    # Archive is sent while it's written.
+    r = _request("upload", archive.iter_tar([(item, item.name) for item in sorted(dir.iterdir())]))
     _response(r.status_code)
     _response(r.text)
 
 
-def _compress(dir: Path) -> bytes:
-    byte_stream = io.BytesIO()
-    with tarfile.open(fileobj=byte_stream, mode="w:gz") as tar:
-        for item in dir.iterdir():
-            tar.add(item, arcname=item.name)
-    byte_stream.seek(0)
-    return byte_stream.getvalue()
-
-
 def init(projectfile: Path, target_version: str, target_debug: bool, cwd: Path, response: Callable):
     global _projectfile
     global _target_version
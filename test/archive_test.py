@@ -0,0 +1,95 @@
+import gzip
+import io
+import os
+from pathlib import Path
+import tarfile
+
+import pytest
+
+import archive
+
+
+def _tree(root: Path):
+    Path(root, "dir", "sub").mkdir(parents=True)
+    Path(root, "dir", "b.txt").write_text("b" * 5000)
+    Path(root, "dir", "a.bin").write_bytes(os.urandom(300000))
+    Path(root, "dir", "sub", "c.txt").write_text("c")
+
+
+def test_parallel_gzip():
+    data = os.urandom(100000) + bytes(100000)
+    output = io.BytesIO()
+    with archive.ParallelGzipWriter(output, workers=4, block_size=30000) as writer:
+        for i in range(0, len(data), 7000):
+            writer.write(data[i:i + 7000])
+    # Members are concatenated, which is valid gzip.
+    assert gzip.decompress(output.getvalue()) == data
+
+    output = io.BytesIO()
+    archive.ParallelGzipWriter(output).close()
+    assert gzip.decompress(output.getvalue()) == b""
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd", "none"])
+def test_roundtrip(tmp_path: Path, compression: str):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    _tree(tmp_path)
+    output = io.BytesIO()
+    archive.write_tar(output, [(Path(tmp_path, "dir"), "dir")], compression=compression, workers=2)
+
+    output.seek(0)
+    archive.extract_tar(output, Path(tmp_path, "out"))
+    for rel in ["b.txt", "a.bin", "sub/c.txt"]:
+        assert Path(tmp_path, "out", "dir", rel).read_bytes() == Path(tmp_path, "dir", rel).read_bytes()
+
+    if compression == "gzip":
+        with tarfile.open(fileobj=io.BytesIO(output.getvalue()), mode="r:gz") as tar:
+            assert tar.getnames() == ["dir", "dir/a.bin", "dir/b.txt", "dir/sub", "dir/sub/c.txt"]
+
+
+def test_reproducible(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    _tree(tmp_path)
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1000")
+
+    def write() -> bytes:
+        output = io.BytesIO()
+        archive.write_tar(output, [(Path(tmp_path, "dir"), "dir")], workers=3)
+        return output.getvalue()
+
+    first = write()
+    os.utime(Path(tmp_path, "dir", "b.txt"), (5000, 5000))
+    assert write() == first
+
+
+def test_compression_for():
+    assert archive.compression_for(Path("a.tar.gz")) == "gzip"
+    assert archive.compression_for(Path("a.tar.zst")) == "zstd"
+    assert archive.compression_for(Path("a.tar")) == "none"
+    assert archive.compression_for(Path("dist.gz")) == "gzip"
+
+
+def test_iter_tar(tmp_path: Path):
+    _tree(tmp_path)
+    chunks = list(archive.iter_tar([(Path(tmp_path, "dir"), "dir")], compression="none"))
+    # Written by records, not as a whole.
+    assert len(chunks) > 1
+    archive.extract_tar(io.BytesIO(b"".join(chunks)), Path(tmp_path, "out"))
+    assert Path(tmp_path, "out", "dir", "sub", "c.txt").read_text() == "c"
+
+    # Writer stops, if the archive is not consumed to the end.
+    chunks = archive.iter_tar([(Path(tmp_path, "dir"), "dir")], compression="none")
+    next(chunks)
+    chunks.close()
+
+
+def test_extract_outside(tmp_path: Path):
+    output = io.BytesIO()
+    with tarfile.open(fileobj=output, mode="w:gz") as tar:
+        info = tarfile.TarInfo("../evil.txt")
+        info.size = 4
+        tar.addfile(info, io.BytesIO(b"evil"))
+    output.seek(0)
+    with pytest.raises(tarfile.OutsideDestinationError):
+        archive.extract_tar(output, Path(tmp_path, "out"))
+    assert not Path(tmp_path, "evil.txt").exists()
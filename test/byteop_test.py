@@ -0,0 +1,77 @@
+from enum import Enum
+import json
+
+from pydantic import BaseModel
+import pytest
+
+import byteop
+
+
+def test_coded_view():
+    data = byteop.wrap_coded_structure(7, b"payload")
+    assert byteop.unwrap_coded_structure(data) == (7, b"payload")
+    code, payload = byteop.unwrap_coded_view(data)
+    assert (code, payload.tobytes()) == (7, b"payload")
+    assert payload.obj is data
+    with pytest.raises(Exception, match="too short"):
+        byteop.unwrap_coded_view(b"x")
+
+
+def test_frames():
+    frames = [(0, b"first"), (1, b""), (2, bytes(range(256)) * 10)]
+    stream = byteop.encode_frames(frames)
+    assert stream == b"".join(byteop.encode_frame(code, payload) for code, payload in frames)
+
+    decoded = byteop.FrameDecoder().feed(stream)
+    assert [(code, bytes(payload)) for code, payload in decoded] == frames
+    # Whole frames are views into the fed data.
+    assert all(payload.obj is stream for _, payload in decoded)
+
+    for chunk_size in [1, 3, 7, 1000]:
+        chunks = [stream[i:i + chunk_size] for i in range(0, len(stream), chunk_size)]
+        assert [(code, bytes(payload)) for code, payload in byteop.iter_frames(chunks)] == frames
+
+    with pytest.raises(Exception, match="ended within a frame"):
+        list(byteop.iter_frames([stream[:-1]]))
+    with pytest.raises(Exception, match="exceeds maximum"):
+        byteop.FrameDecoder(max_size=100).feed(stream)
+
+
+class Color(Enum):
+    red = "red"
+    green = "green"
+
+
+class Item(BaseModel):
+    id: int
+    color: Color
+    tags: list[str]
+
+
+def test_json_to_bytes():
+    data = {"color": Color.red, "nested": [{"colors": (Color.green,)}, {1, 2}], "item": Item(id=1, color=Color.red, tags=["a"])}
+    assert json.loads(byteop.json_to_bytes(data)) == {"color": "red", "nested": [{"colors": ["green"]}, [1, 2]], "item": {"id": 1, "color": "red", "tags": ["a"]}}
+    # Output is the same as of the former two-pass encoding.
+    plain = {"color": Color.red, "values": [1, (2, 3)], 4: "key"}
+    assert byteop.json_to_bytes(plain) == json.dumps(byteop.convert_enums(plain)).encode()
+
+    models = [Item(id=i, color=Color.green, tags=[]) for i in range(3)]
+    assert json.loads(byteop.models_to_bytes(models)) == [{"id": i, "color": "green", "tags": []} for i in range(3)]
+    with pytest.raises(TypeError):
+        byteop.json_to_bytes(object())
+
+
+@pytest.mark.parametrize("backend", ["json", "orjson"])
+def test_iter_json_bytes(backend: str):
+    if backend == "orjson":
+        pytest.importorskip("orjson")
+    byteop.set_json_backend(backend)
+    try:
+        items = [{"id": i, "color": Color.red} for i in range(1000)]
+        chunks = list(byteop.iter_json_bytes(items, batch_size=300))
+        assert len(chunks) == 4
+        assert b"".join(byteop.iter_json_bytes(items, batch_size=500)) == byteop.json_to_bytes(items)
+        assert b"".join(chunks) == byteop.json_to_bytes(items)
+        assert b"".join(byteop.iter_json_bytes([])) == b"[]"
+    finally:
+        byteop.set_json_backend("json")
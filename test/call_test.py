@@ -0,0 +1,42 @@
+import sys
+import threading
+import time
+
+import call
+
+
+def test_call():
+    assert call.call("echo 'hello world'") == ("hello world\n", "", 0)
+    assert call.call([sys.executable, "-c", "import sys; sys.exit(3)"])[2] == 3
+
+
+def test_run():
+    lines = []
+    code = "import sys\nfor i in range(1000): print(i)\nprint('warning', file=sys.stderr)\nsum(range(10**7))\nsys.exit(2)"
+    result = call.run([sys.executable, "-c", code], on_line=lambda name, line: lines.append((name, line)), tail=3)
+    assert result.retcode == 2
+    assert result.stdout == "997\n998\n999\n"
+    assert result.stderr == "warning\n"
+    assert len(lines) == 1001
+    assert ("stderr", "warning\n") in lines
+    assert not result.timed_out and not result.cancelled
+    assert result.wall_time > 0
+    if result.cpu_time is not None:
+        assert 0 < result.cpu_time <= result.wall_time + 0.1
+
+
+def test_run_timeout():
+    started = time.perf_counter()
+    result = call.run([sys.executable, "-c", "print('started', flush=True)\nimport time\ntime.sleep(10)"], timeout=0.5)
+    assert result.timed_out
+    assert result.retcode != 0
+    assert result.stdout == "started\n"
+    assert time.perf_counter() - started < 3
+
+
+def test_run_cancel():
+    cancel = threading.Event()
+    threading.Timer(0.3, cancel.set).start()
+    result = call.run([sys.executable, "-c", "import time\ntime.sleep(10)"], cancel=cancel)
+    assert result.cancelled
+    assert result.wall_time < 3
@@ -0,0 +1,41 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from yelets_project import codesheet
+
+
+def test_parse():
+    assert codesheet.parse("error\n\nModel_Error\n", "    ") == ["error", "", "model_error"]
+    with pytest.raises(Exception, match="reserved"):
+        codesheet.parse("ok\n", "    ")
+    with pytest.raises(Exception, match="Invalid codename"):
+        codesheet.parse("_error\n", "    ")
+    with pytest.raises(Exception, match="Duplicate"):
+        codesheet.parse("error\nother\nerror\n", "    ")
+
+
+def test_read_shared(tmp_path: Path):
+    path = Path(tmp_path, "code.txt")
+    path.write_text("error\n")
+    codenames = codesheet.read(path, "    ")
+    assert codesheet.read(Path(tmp_path, ".", "code.txt"), "    ") is codenames
+    path.write_text("error\nother\n")
+    assert codesheet.read(path, "    ") == ["error", "other"]
+
+
+def test_emit():
+    codenames = ["error", "", "model_error"]
+    assert codesheet.emit(codenames, "    ", Path("codes.py")) == "ok = 0\nerror = 1\nmodel_error = 3\n\ncodenames: dict[int, str] = {\n    1: \"error\",\n    3: \"model_error\",\n}"
+    assert "export const model_error = 3;\n" in codesheet.emit(codenames, "    ", Path("codes.ts"))
+    h = codesheet.emit(codenames, "    ", Path("codes.h"))
+    assert "    model_error = 3,\n" in h
+    assert "    \"error\",\n    0,\n    \"model_error\",\n" in h
+    go = codesheet.emit(codenames, "    ", Path("x", "errs", "codes.go"))
+    assert go.startswith("package errs\n")
+    assert "\tModelError = 3\n" in go
+    assert "pub const MODEL_ERROR: i32 = 3;\n" in codesheet.emit(codenames, "    ", Path("codes.rs"))
+    assert json.loads(codesheet.emit(codenames, "    ", Path("codes.json"))) == {"ok": 0, "error": 1, "model_error": 3}
+    with pytest.raises(Exception, match="Unsupported codes extension"):
+        codesheet.emit(codenames, "    ", Path("codes.txt"))
@@ -0,0 +1,18 @@
+import sys
+from pathlib import Path
+
+# Tests import the tool's top-level packages directly.
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+import location
+
+
+@pytest.fixture(autouse=True)
+def user_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """
+    Keeps user files of the tool, like caches and trash, inside the test's directory.
+    """
+    monkeypatch.setenv("HOME", str(Path(tmp_path, "home")))
+    location.init("test")
@@ -0,0 +1,45 @@
+from pathlib import Path
+
+import pytest
+
+from model import Project
+from yelets import fs_module
+
+
+@pytest.fixture(autouse=True)
+def project(tmp_path: Path):
+    projectfile = Path(tmp_path, "projectfile")
+    projectfile.write_text("fs = @import(\"fs\")\nid = \"test\"\n")
+    return Project.read(projectfile, target_version="0.1.0", target_debug=False, cwd=tmp_path)
+
+
+def test_files(tmp_path: Path):
+    fs_module.mkdir("a/b", "c")
+    Path(tmp_path, "a", "b", "x.txt").write_text("x")
+    Path(tmp_path, "a", "y.txt").write_text("y")
+    assert fs_module.exists("a/b/x.txt")
+
+    fs_module.copy("a", "d")
+    fs_module.copy(["a/y.txt", "a/b"], "c")
+    fs_module.move("d/y.txt", "e/z.txt")
+    assert list(fs_module.walk("c", dirs=True)) == ["c/b", "c/b/x.txt", "c/y.txt"]
+    assert fs_module.glob("**/*.txt") == ["a/b/x.txt", "a/y.txt", "c/b/x.txt", "c/y.txt", "d/b/x.txt", "e/z.txt"]
+
+    fs_module.rm("a", "c/y.txt", "missing")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["c", "d", "e", "home", "projectfile"]
+    assert list(fs_module.walk("c")) == ["c/b/x.txt"]
+
+
+def test_rm_parallel(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(fs_module, "_parallel_delete_threshold", 10)
+    monkeypatch.setattr(fs_module, "_delete_chunk", 3)
+    for i in range(40):
+        p = Path(tmp_path, "tree", f"dir_{i % 4}", f"file_{i}")
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text("")
+    Path(tmp_path, "outside").mkdir()
+    Path(tmp_path, "tree", "link").symlink_to(Path(tmp_path, "outside"))
+    fs_module.rm("tree", workers=4)
+    assert not Path(tmp_path, "tree").exists()
+    # Linked directories are not followed.
+    assert Path(tmp_path, "outside").is_dir()
@@ -0,0 +1,188 @@
+import asyncio
+from pathlib import Path
+import time
+from typing import Iterable
+
+import pytest
+
+from error import CodeError
+from model import Project
+import yelets_project
+from stub_executor import StubExecutor
+
+
+@pytest.fixture(autouse=True)
+def project(tmp_path: Path):
+    projectfile = Path(tmp_path, "projectfile")
+    projectfile.write_text("project = @import(\"project\")\nid = \"test\"\n")
+    project = Project.read(projectfile, target_version="0.1.0", target_debug=False, cwd=tmp_path)
+    yield project
+    yelets_project.finish()
+
+
+@pytest.fixture
+def executor():
+    with StubExecutor() as executor:
+        yield executor
+
+
+def _host(executor: StubExecutor) -> yelets_project.Host:
+    host = yelets_project.Host("127.0.0.1")
+    host.setExecutorSecret(executor.secret)
+    host.setTimeout(5)
+    return host
+
+
+def test_execute(executor: StubExecutor):
+    host = _host(executor)
+    assert host.execute("echo hello", port=executor.port) == (0, "hello\n", "")
+    assert host.mustExecute("echo hello >&2", port=executor.port) == ("", "hello\n")
+    with pytest.raises(Exception, match="retcode 3"):
+        host.mustExecute("exit 3", port=executor.port)
+
+
+def test_connection_reuse(executor: StubExecutor):
+    hosts = [_host(executor), _host(executor)]
+    for i in range(10):
+        hosts[i % 2].execute("true", port=executor.port)
+    assert (executor.requests, executor.connections) == (10, 1)
+
+    # Connections are closed when the project function finishes.
+    yelets_project.finish()
+    hosts[0].execute("true", port=executor.port)
+    assert executor.connections == 2
+
+
+def test_group():
+    def handler(command: str, cwd: str | None) -> tuple[int, str, str]:
+        time.sleep(0.2)
+        return 0, command, ""
+
+    executors = [StubExecutor(handler=handler).start() for _ in range(4)]
+    try:
+        hosts = []
+        for executor in executors:
+            host = _host(executor)
+            host.setExecutorPort(executor.port)
+            hosts.append(host)
+        group = yelets_project.HostGroup(hosts)
+        started = time.perf_counter()
+        results = group.mustExecute("deploy")
+        assert time.perf_counter() - started < 0.6
+        assert [r.value for r in results] == [("deploy", "")] * 4
+        assert all(e.commands == ["deploy"] for e in executors)
+    finally:
+        for executor in executors:
+            executor.stop()
+
+
+def test_group_failures():
+    with StubExecutor(handler=lambda command, cwd: (0, "", "")) as executor:
+        ok = _host(executor)
+        ok.setExecutorPort(executor.port)
+        failing = yelets_project.Host("127.0.0.1")
+        failing.setExecutorSecret(executor.secret)
+        failing.setExecutorPort(executor.port)
+        failing.execute = lambda command, **kwargs: (1, "", "broken")
+
+        group = yelets_project.HostGroup([ok, failing, ok, ok])
+        group.setFailFast(False)
+        results = group.mustExecute("true")
+        assert [r.ok for r in results] == [True, False, True, True]
+        assert "broken" in str(results[1].error)
+
+        # Rolling by half of the group stops after the batch with a failure.
+        executor.requests = 0
+        group = yelets_project.HostGroup([ok, failing, ok, ok])
+        group.setBatch(0.5)
+        with pytest.raises(Exception, match="failed on 1 host"):
+            group.mustExecute("true")
+        assert executor.requests == 1
+
+
+def test_execute_stream(executor: StubExecutor, monkeypatch: pytest.MonkeyPatch):
+    received = []
+    monkeypatch.setattr(yelets_project, "_response", lambda message: received.append((time.perf_counter(), message)))
+    host = _host(executor)
+
+    started = time.perf_counter()
+    retcode, stdout, stderr = host.executeStream("echo first; echo warning >&2; sleep 0.5; seq 1 5000", port=executor.port, tail=3)
+    assert retcode == 0
+    assert stdout == "4998\n4999\n5000\n"
+    assert stderr == "warning\n"
+    lines = [message for _, message in received]
+    assert sorted(lines[1:3]) == ["[host 127.0.0.1] first", "[host 127.0.0.1] warning"]
+    assert len(lines) == 5003
+    # Output before the pause was forwarded before the command has finished.
+    assert received[2][0] - started < 0.4
+
+    with pytest.raises(Exception, match="retcode 2"):
+        host.mustExecute("exit 2", stream=True, port=executor.port)
+
+    assert host.mustExecute("echo started", stream=True, background=True, port=executor.port) == ("started\n", "")
+    assert executor.payloads[-1]["background"] is True
+
+
+def test_execute_stream_frames():
+    # Frames split between chunks are assembled.
+    with StubExecutor(chunk_size=3) as executor:
+        host = _host(executor)
+        assert host.executeStream("echo done", port=executor.port) == (0, "done\n", "")
+        with pytest.raises(Exception, match="retcode 4"):
+            host.mustExecute("exit 4", stream=True, port=executor.port)
+
+    def failing(command: str, cwd: str | None) -> Iterable[tuple[str, str | int]]:
+        yield "stdout", "started\n"
+        raise Exception("executor stopped")
+
+    with StubExecutor(stream_handler=failing) as executor:
+        with pytest.raises(CodeError, match="code 1, text executor stopped"):
+            _host(executor).executeStream("deploy", port=executor.port)
+
+
+def test_sync(executor: StubExecutor, tmp_path: Path):
+    local = Path(tmp_path, "dist")
+    remote = Path(tmp_path, "remote", "app")
+    Path(local, "static").mkdir(parents=True)
+    Path(local, "main.py").write_text("main")
+    Path(local, "static", "index.html").write_text("index")
+    Path(local, "static", "old.css").write_text("old")
+    host = _host(executor)
+    host.setExecutorPort(executor.port)
+
+    assert host.sync("dist", str(remote)) == (3, 0)
+    assert Path(remote, "static", "index.html").read_text() == "index"
+    # Archive is streamed while it's written.
+    assert executor.chunked == 1
+
+    Path(local, "main.py").write_text("changed")
+    Path(local, "static", "old.css").unlink()
+    Path(local, "static", "new.css").write_text("new")
+    assert host.sync("dist", str(remote)) == (2, 1)
+    assert Path(remote, "main.py").read_text() == "changed"
+    assert sorted(p.name for p in Path(remote, "static").iterdir()) == ["index.html", "new.css"]
+    assert sorted(p.name for p in remote.parent.iterdir()) == ["app"]
+
+    requests = executor.requests
+    assert host.sync("dist", str(remote)) == (0, 0)
+    assert executor.requests == requests + 1
+
+
+def test_execute_async():
+    def handler(command: str, cwd: str | None) -> tuple[int, str, str]:
+        time.sleep(0.2)
+        return 0, command, ""
+
+    async def deploy(hosts: list[yelets_project.Host], port: int) -> list[tuple[int, str, str]]:
+        try:
+            return await asyncio.gather(*(host.executeAsync(f"echo {i}", port=port) for i, host in enumerate(hosts)))
+        finally:
+            await yelets_project.afinish()
+
+    with StubExecutor(handler=handler) as executor:
+        started = time.perf_counter()
+        results = asyncio.run(deploy([_host(executor) for _ in range(4)], executor.port))
+        assert results == [(0, f"echo {i}", "") for i in range(4)]
+        # Requests overlap in one thread.
+        assert time.perf_counter() - started < 0.6
+        assert executor.requests == 4
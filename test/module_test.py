@@ -0,0 +1,72 @@
+import asyncio
+import io
+import os
+from pathlib import Path
+import time
+
+import pytest
+
+import archive
+import module
+from stub_modules import StubModules
+
+
+def _archive(source: Path) -> bytes:
+    f = io.BytesIO()
+    archive.write_tar(f, [(item, item.name) for item in sorted(source.iterdir())])
+    return f.getvalue()
+
+
+def test_install(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    archives = {}
+    for i in range(6):
+        source = Path(tmp_path, "sources", f"m{i}")
+        source.mkdir(parents=True)
+        Path(source, "main.y").write_text(f"x = {i}\n")
+        archives[f"example.m{i}=1.0.0"] = _archive(source)
+    modules = "".join(f"    m{i}: {{ \"id\": \"example.m{i}\", \"version\": \"1.0.0\" }},\n" for i in range(6))
+    projectfile = Path(tmp_path, "projectfile")
+    archives["example.broken=1.0.0"] = b"not an archive"
+    projectfile.write_text(f"id = \"test\"\nmodules = {{\n{modules}    missing: {{ \"id\": \"example.missing\", \"version\": \"1.0.0\" }},\n    broken: {{ \"id\": \"example.broken\", \"version\": \"1.0.0\" }},\n}}\n")
+    # Installed module is replaced.
+    Path(tmp_path, "m0").mkdir()
+    Path(tmp_path, "m0", "old.y").write_text("")
+
+    received = []
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(module, "_projectfile", projectfile, raising=False)
+    monkeypatch.setattr(module, "_host", "127.0.0.1", raising=False)
+    monkeypatch.setattr(module, "_response", received.append, raising=False)
+    # Archives are spooled to files.
+    monkeypatch.setattr(module, "_spool_size", 100)
+    with StubModules(archives, delay=0.2) as server:
+        monkeypatch.setattr(module, "_port", server.port, raising=False)
+        started = time.perf_counter()
+        asyncio.run(module.cmd_install(3))
+        elapsed = time.perf_counter() - started
+
+    assert [Path(tmp_path, f"m{i}", "main.y").read_text() for i in range(6)] == [f"x = {i}\n" for i in range(6)]
+    assert not Path(tmp_path, "m0", "old.y").exists()
+    # Six downloads of 0.2s, three at once, over kept-alive connections.
+    assert server.max_concurrent == 3
+    assert elapsed < 1
+    assert server.connections <= 4
+    assert received[-1].startswith("Installed 6 module(s)")
+    # Failed download and extraction don't stop other modules.
+    assert received[-1].endswith(", 2 failed.")
+
+
+def test_upload(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    source = Path(tmp_path, "source")
+    Path(source, "sub").mkdir(parents=True)
+    Path(source, "module.y").write_text("id = \"example.m\"\n")
+    Path(source, "sub", "data.bin").write_bytes(os.urandom(300000))
+    received = []
+    monkeypatch.setattr(module, "_host", "127.0.0.1", raising=False)
+    monkeypatch.setattr(module, "_response", received.append, raising=False)
+    with StubModules({}) as server:
+        monkeypatch.setattr(module, "_port", server.port, raising=False)
+        asyncio.run(module.cmd_upload(source))
+    assert received == [200, "uploaded"]
+    archive.extract_tar(io.BytesIO(server.uploads[0]), Path(tmp_path, "out"))
+    assert Path(tmp_path, "out", "sub", "data.bin").read_bytes() == Path(source, "sub", "data.bin").read_bytes()
@@ -0,0 +1,247 @@
+import asyncio
+import os
+import shutil
+from pathlib import Path
+import time
+
+import pytest
+
+from model import Project
+import yelets_project
+
+
+def _read(source: Path, code: str) -> Project:
+    projectfile = Path(source, "projectfile")
+    projectfile.write_text("project = @import(\"project\")\nid = \"test\"\n" + code)
+    return Project.read(projectfile, target_version="0.1.0", target_debug=False, cwd=source)
+
+
+def test_build_dir_lazy(tmp_path: Path):
+    Path(tmp_path, ".build").mkdir()
+    Path(tmp_path, ".build", "old.txt").write_text("old")
+    Path(tmp_path, "main.py").write_text("")
+
+    project = _read(tmp_path, "noop = fn() {}\nbuild = fn() { project.include(\"main.py\") }\n")
+    project.context["noop"]()
+    assert Path(tmp_path, ".build", "old.txt").exists()
+
+    project.context["build"]()
+    assert not Path(tmp_path, ".build", "old.txt").exists()
+    assert Path(tmp_path, ".build", "main.py").exists()
+
+
+def test_clean(tmp_path: Path):
+    Path(tmp_path, "main.py").write_text("")
+
+    project = _read(tmp_path, "build = fn() {\n    project.include(\"main.py\")\n    project.clean()\n}\n")
+    project.context["build"]()
+    assert not Path(tmp_path, ".build").exists()
+
+
+def test_incremental(tmp_path: Path):
+    source = Path(tmp_path, "source")
+    Path(source, "static", "css").mkdir(parents=True)
+    Path(source, "static", "index.html").write_text("index")
+    Path(source, "static", "css", "main.css").write_text("main")
+    Path(source, "static", "css", "old.css").write_text("old")
+    code = "build = fn() {\n    project.setIncremental()\n    project.include(\"static\")\n}\n"
+
+    def build():
+        _read(source, code).context["build"]()
+        yelets_project.finish()
+        return yelets_project._sync
+
+    sync = build()
+    assert (sync.files_written, sync.files_unchanged, sync.files_removed) == (3, 0, 0)
+
+    sync = build()
+    assert (sync.files_written, sync.files_unchanged, sync.files_removed) == (0, 3, 0)
+
+    # Touched, but not changed files are not copied.
+    os.utime(Path(source, "static", "index.html"), ns=(0, 0))
+    Path(source, "static", "css", "main.css").write_text("changed")
+    Path(source, "static", "css", "old.css").unlink()
+    sync = build()
+    assert (sync.files_written, sync.files_unchanged, sync.files_removed) == (1, 1, 1)
+    assert Path(source, ".build", "static", "css", "main.css").read_text() == "changed"
+    assert not Path(source, ".build", "static", "css", "old.css").exists()
+
+
+def test_include_strategy(tmp_path: Path):
+    Path(tmp_path, "static").mkdir()
+    Path(tmp_path, "static", "index.html").write_text("index")
+    Path(tmp_path, "main.py").write_text("main")
+
+    project = _read(tmp_path, "build = fn() {\n    project.setIncludeStrategy(\"hardlink\")\n    project.include(\"static\")\n    project.include(\"main.py\", strategy=\"symlink\")\n}\n")
+    project.context["build"]()
+    yelets_project.finish()
+    assert os.path.samefile(Path(tmp_path, ".build", "static", "index.html"), Path(tmp_path, "static", "index.html"))
+    assert Path(tmp_path, ".build", "main.py").is_symlink()
+    assert yelets_project._sync.files_linked == 2
+
+    with pytest.raises(Exception, match="Unknown include strategy"):
+        _read(tmp_path, "build = fn() { project.include(\"main.py\", strategy=\"move\") }\n").context["build"]()
+
+
+def test_include_parallel(tmp_path: Path):
+    Path(tmp_path, "static").mkdir()
+    for i in range(50):
+        Path(tmp_path, "static", f"{i:02}.txt").write_text(str(i))
+    # Dangling links fail to be copied.
+    Path(tmp_path, "static", "10_bad.txt").symlink_to(Path(tmp_path, "missing"))
+    Path(tmp_path, "static", "40_bad.txt").symlink_to(Path(tmp_path, "missing"))
+
+    project = _read(tmp_path, "build = fn() {\n    project.setIncludeWorkers(8)\n    project.include(\"static\")\n}\n")
+    with pytest.raises(Exception, match=r"10_bad\.txt.*And 1 more file\(s\) failed\."):
+        project.context["build"]()
+    yelets_project.finish(failed=True)
+    assert yelets_project._sync.files_written == 50
+    assert Path(tmp_path, ".build", "static", "49.txt").read_text() == "49"
+
+
+def test_include_glob(tmp_path: Path):
+    Path(tmp_path, "static", "a").mkdir(parents=True)
+    Path(tmp_path, "static", "__pycache__").mkdir()
+    Path(tmp_path, "static", "index.html").write_text("")
+    Path(tmp_path, "static", "a", "page.html").write_text("")
+    Path(tmp_path, "static", "a", "style.css").write_text("")
+    Path(tmp_path, "static", "__pycache__", "x.pyc").write_text("")
+    Path(tmp_path, ".buildignore").write_text("__pycache__/\n")
+
+    project = _read(tmp_path, "build = fn() {\n    project.include(\"static/**/*.html\")\n    project.include(\"static\", \"assets\")\n}\n")
+    project.context["build"]()
+    assert Path(tmp_path, ".build", "static", "index.html").exists()
+    assert Path(tmp_path, ".build", "static", "a", "page.html").exists()
+    assert not Path(tmp_path, ".build", "static", "a", "style.css").exists()
+    assert Path(tmp_path, ".build", "assets", "a", "style.css").exists()
+    assert not Path(tmp_path, ".build", "assets", "__pycache__").exists()
+
+    with pytest.raises(Exception, match="No files match"):
+        _read(tmp_path, "build = fn() { project.include(\"*.txt\") }\n").context["build"]()
+    with pytest.raises(Exception, match="cannot be altered"):
+        _read(tmp_path, "build = fn() { project.include(\"*.html\", \"x\") }\n").context["build"]()
+
+
+def test_include_python(tmp_path: Path):
+    source = Path(tmp_path, "source")
+    for rel in ["main.py", "requirements.txt", "ts.txt", "pkg/__init__.py", "pkg/sub/x.py", "scripts/run.py", ".venv/lib/site/__init__.py", "node_modules/a/index.js"]:
+        Path(source, rel).parent.mkdir(parents=True, exist_ok=True)
+        Path(source, rel).write_text("")
+
+    project = _read(source, "build = fn() { project.includePython() }\n")
+    project.context["build"]()
+    yelets_project.finish()
+    built = sorted(p.relative_to(Path(source, ".build")).as_posix() for p in Path(source, ".build").rglob("*") if p.is_file())
+    assert built == ["main.py", "pkg/__init__.py", "pkg/sub/x.py", "requirements.txt"]
+    # Root, the package candidates and the package contents, but nothing below `.venv` and `node_modules`.
+    assert yelets_project._tree.scans == 5
+
+
+def test_compile_python(tmp_path: Path):
+    Path(tmp_path, "main.py").write_text("x = 1\n")
+    Path(tmp_path, "bad.py").write_text("x = \n")
+
+    project = _read(tmp_path, "build = fn() {\n    project.include(\"main.py\")\n    project.compilePython(optimize=1, invalidation=\"checked-hash\", workers=2)\n}\n")
+    project.context["build"]()
+    pyc = next(Path(tmp_path, ".build", "__pycache__").glob("main.*.opt-1.pyc"))
+    # Flags of a checked hash-based pyc.
+    assert int.from_bytes(pyc.read_bytes()[4:8], "little") == 0b11
+
+    project = _read(tmp_path, "build = fn() {\n    project.include(\"bad.py\")\n    project.compilePython()\n}\n")
+    with pytest.raises(Exception, match="Failed to compile"):
+        project.context["build"]()
+
+
+def test_write_if_changed(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+    code = "build = fn() {\n    project.info(\"build.py\")\n    project.include(\"build.py\")\n}\n"
+
+    _read(tmp_path, code).context["build"]()
+    yelets_project.finish()
+    assert "timestamp = 1700000000" in Path(tmp_path, "build.py").read_text()
+    assert yelets_project._sync.outputs_written == 1
+    os.utime(Path(tmp_path, "build.py"), ns=(0, 0))
+
+    _read(tmp_path, code).context["build"]()
+    yelets_project.finish()
+    assert (yelets_project._sync.outputs_written, yelets_project._sync.outputs_unchanged) == (0, 1)
+    assert Path(tmp_path, "build.py").stat().st_mtime_ns == 0
+
+
+def test_cmd_call(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    project = _read(tmp_path, "cmd = @import(\"cmd\")\nbuild = fn() {\n    return cmd.call(\"echo built\")\n}\nslow = fn() { cmd.mustCall(\"sleep 5\", timeout=0.3) }\n")
+    received = []
+    monkeypatch.setattr(yelets_project, "_response", received.append)
+    assert project.context["build"]() == ("built\n", "", 0)
+    assert received[0] == "[test] built"
+    assert received[1].startswith("[test] command 'echo built' finished with retcode 0 in ")
+    with pytest.raises(Exception, match="timed out"):
+        project.context["slow"]()
+
+
+def test_cmd_parallel(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    project = _read(tmp_path, "cmd = @import(\"cmd\")\nthree = fn() { return 3 }\nbuild = fn() {\n    return cmd.parallel(\"sleep 0.3\", \"echo two\", three, workers=3)\n}\nall = fn() { return cmd.callAll(\"echo one\", \"sh -c 'exit 2'\") }\nbroken = fn() { cmd.parallel(\"false\", \"echo fine\", \"sh -c 'exit 3'\") }\nfast = fn() { cmd.parallel(\"false\", \"sleep 5\", \"echo never\", workers=2, failFast=True) }\n")
+    received = []
+    monkeypatch.setattr(yelets_project, "_response", received.append)
+    started = time.perf_counter()
+    assert project.context["build"]() == ["", "two\n", 3]
+    # Jobs overlap.
+    assert time.perf_counter() - started < 0.6
+    assert "[test:2] two" in received
+    assert project.context["all"]() == [("one\n", "", 0), ("", "", 2)]
+    with pytest.raises(Exception, match="2 of 3 jobs failed:\n1. 'false': Retcode 1: \n3. 'sh -c 'exit 3'': Retcode 3"):
+        project.context["broken"]()
+    started = time.perf_counter()
+    with pytest.raises(Exception, match="3 of 3 jobs failed:\n1. 'false': Retcode 1: \n2. 'sleep 5': Command 'sleep 5' was cancelled.\n3. 'echo never': Cancelled."):
+        project.context["fast"]()
+    assert time.perf_counter() - started < 2
+
+
+def test_cmd_call_async(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    project = _read(tmp_path, "cmd = @import(\"cmd\")\nbuild = async fn() {\n    return await cmd.gather(cmd.callAsync(\"sleep 0.3\"), cmd.callAsync(\"echo two\"), cmd.callAsync(\"sleep 0.3\"))\n}\nslow = async fn() { await cmd.mustCallAsync(\"sleep 5\", timeout=0.3) }\n")
+    received = []
+    monkeypatch.setattr(yelets_project, "_response", received.append)
+    started = time.perf_counter()
+    assert asyncio.run(project.context["build"]()) == [("", "", 0), ("two\n", "", 0), ("", "", 0)]
+    # Commands overlap in one thread.
+    assert time.perf_counter() - started < 0.6
+    assert "[test] two" in received
+    with pytest.raises(Exception, match="timed out"):
+        asyncio.run(project.context["slow"]())
+
+
+def test_read_metadata_computed(tmp_path: Path):
+    projectfile = Path(tmp_path, "projectfile")
+    projectfile.write_text("id = \"test\"\nver = \"1.0.0\"\nmodules = {\n    module_a: {\n        \"id\": \"example.module_a\",\n        \"version\": ver,\n    },\n}\n")
+    # Modules are never silently dropped.
+    with pytest.raises(Exception, match="should define 'id' and 'modules' as literals"):
+        Project.read_metadata(projectfile)
+
+
+def test_parallel_build(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    Path(tmp_path, ".build").mkdir()
+    for name in ["a.py", "b.py"]:
+        Path(tmp_path, name).write_text("")
+    project = _read(tmp_path, "cmd = @import(\"cmd\")\na = fn() { project.include(\"a.py\") }\nb = fn() { project.include(\"b.py\") }\nbuild = fn() { cmd.parallel(a, b, workers=2) }\n")
+    rmtree = shutil.rmtree
+
+    def slow_rmtree(*args, **kwargs):
+        time.sleep(0.1)
+        rmtree(*args, **kwargs)
+
+    monkeypatch.setattr(shutil, "rmtree", slow_rmtree)
+    project.context["build"]()
+    # Build directory is prepared once, by whichever job comes first.
+    assert sorted(p.name for p in Path(tmp_path, ".build").iterdir()) == ["a.py", "b.py"]
+
+
+def test_shared_import(tmp_path: Path):
+    Path(tmp_path, "common.y").write_text("project = @import(\"project\")\nwhere = fn() {\n    return project.build_dir\n}\n")
+    projects = []
+    for name in ["a", "b"]:
+        Path(tmp_path, name).mkdir()
+        projects.append(_read(Path(tmp_path, name), "common = @import(\"../common.y\")\nwhere = fn() { return common.where() }\n"))
+    # Imported once, and shared.
+    assert projects[0].context["common"] is projects[1].context["common"]
+    # Project, which is being executed, is seen by the shared file.
+    assert projects[1].context["where"]() == Path(tmp_path, "b", ".build")
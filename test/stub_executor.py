@@ -0,0 +1,223 @@
+"""
+Stand-in for the `executor` service, for tests and benchmarks.
+
+Serves `POST /main/execute` on localhost, answering with a coded structure, like the real service does. With `stream` in the payload, the answer is a stream of frames of `byteop`, carrying JSON of `{"stdout": line}` and `{"stderr": line}`, and ending with `{"retcode": code}`, or with a frame of code 1 and the error text, if the stream handler raises. With `chunk_size`, the stream is written in chunks of the size, which split frames.
+
+Serves `POST /main/syncManifest` and `POST /main/syncApply` for `Host.sync`. Bodies may be sent chunked.
+"""
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import io
+import json
+import os
+from pathlib import Path
+import queue
+import shutil
+import subprocess
+import tarfile
+import threading
+from typing import Callable, Iterable
+
+import byteop
+
+
+def run_command(command: str, cwd: str | None) -> tuple[int, str, str]:
+    result = subprocess.run(command, shell=True, capture_output=True, text=True, cwd=cwd)
+    return result.returncode, result.stdout, result.stderr
+
+
+def stream_command(command: str, cwd: str | None) -> Iterable[tuple[str, str | int]]:
+    """
+    Yields `("stdout" | "stderr", line)` while the command runs, and then `("retcode", retcode)`.
+    """
+    process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, cwd=cwd)
+    lines = queue.Queue()
+
+    def pump(name, pipe):
+        for line in pipe:
+            lines.put((name, line))
+        lines.put((name, None))
+
+    for name, pipe in [("stdout", process.stdout), ("stderr", process.stderr)]:
+        threading.Thread(target=pump, args=(name, pipe), daemon=True).start()
+    running = 2
+    while running:
+        name, line = lines.get()
+        if line is None:
+            running -= 1
+        else:
+            yield name, line
+    yield "retcode", process.wait()
+
+
+class StubExecutor:
+    def __init__(
+        self,
+        secret: str = "secret",
+        handler: Callable[[str, str | None], tuple[int, str, str]] = run_command,
+        stream_handler: Callable[[str, str | None], Iterable[tuple[str, str | int]]] = stream_command,
+        chunk_size: int | None = None,
+    ):
+        self.secret = secret
+        self.handler = handler
+        self.stream_handler = stream_handler
+        self.chunk_size = chunk_size
+        self.connections = 0
+        self.requests = 0
+        # Requests with chunked bodies.
+        self.chunked = 0
+        self.commands: list[str] = []
+        self.payloads: list[dict] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> "StubExecutor":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubExecutor":
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+def manifest(path: Path) -> dict[str, str]:
+    files = {}
+    if path.is_dir():
+        for root, dirs, filenames in os.walk(path):
+            for filename in filenames:
+                p = Path(root, filename)
+                with p.open("rb") as f:
+                    files[p.relative_to(path).as_posix()] = hashlib.file_digest(f, "sha256").hexdigest()
+    return files
+
+
+def apply_sync(body: bytes):
+    """
+    Applies changed files and deletions to a copy of the target directory, and swaps the copy in.
+    """
+    header_size = int.from_bytes(body[:4], "little")
+    header = json.loads(body[4:4 + header_size])
+    target = Path(header["path"])
+    staging = target.with_name(target.name + ".sync")
+    old = target.with_name(target.name + ".old")
+    shutil.rmtree(staging, ignore_errors=True)
+    if target.is_dir():
+        # Unchanged files are shared with the current directory, changed ones are replaced, not written through.
+        shutil.copytree(target, staging, copy_function=os.link)
+    else:
+        staging.mkdir(parents=True)
+    for rel in header["delete"]:
+        path = Path(staging, rel)
+        path.unlink(missing_ok=True)
+        # Remove directories left empty.
+        while path.parent != staging and not any(path.parent.iterdir()):
+            path = path.parent
+            path.rmdir()
+    with tarfile.open(fileobj=io.BytesIO(body[4 + header_size:]), mode="r:gz") as tar:
+        for member in tar:
+            Path(staging, member.name).unlink(missing_ok=True)
+            tar.extract(member, staging, filter="data")
+    if target.is_dir():
+        os.rename(target, old)
+    os.rename(staging, target)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def _make_handler(executor: StubExecutor):
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-alive, like the real service.
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately, which otherwise stalls on delayed acknowledgements.
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            executor._count("connections")
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            executor._count("requests")
+            body = self._read_body()
+            if self.headers.get("secret", None) != executor.secret:
+                self._reply(401, b"wrong secret")
+                return
+            if self.path == "/main/syncManifest":
+                self._reply(200, byteop.wrap_coded_structure(0, json.dumps({"files": manifest(Path(json.loads(body)["path"]))}).encode()))
+                return
+            if self.path == "/main/syncApply":
+                apply_sync(body)
+                self._reply(200, byteop.wrap_coded_structure(0, b""))
+                return
+            if self.path == "/main/execute":
+                payload = json.loads(body)
+                with executor._lock:
+                    executor.commands.append(payload["command"])
+                    executor.payloads.append(payload)
+                if payload.get("stream", False):
+                    self._stream(executor.stream_handler(payload["command"], payload.get("cwd", None)))
+                    return
+                retcode, stdout, stderr = executor.handler(payload["command"], payload.get("cwd", None))
+                data = json.dumps({"retcode": retcode, "stdout": stdout, "stderr": stderr}).encode()
+                self._reply(200, byteop.wrap_coded_structure(0, data))
+            else:
+                self._reply(404, b"not found")
+
+        def _read_body(self) -> bytes:
+            if self.headers.get("Transfer-Encoding", None) != "chunked":
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with executor._lock:
+                executor.chunked += 1
+            body = bytearray()
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                body += self.rfile.read(size)
+                self.rfile.readline()
+                if size == 0:
+                    return bytes(body)
+
+        def _stream(self, items: Iterable[tuple[str, str | int]]):
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for name, value in items:
+                    self._chunk(byteop.encode_frame(0, json.dumps({name: value}).encode()))
+            except Exception as e:
+                self._chunk(byteop.encode_frame(1, str(e).encode()))
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _chunk(self, data: bytes):
+            if executor.chunk_size is not None:
+                for i in range(0, len(data), executor.chunk_size):
+                    self._write_chunk(data[i:i + executor.chunk_size])
+            else:
+                self._write_chunk(data)
+
+        def _write_chunk(self, data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+        def _reply(self, status: int, data: bytes):
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
@@ -0,0 +1,97 @@
+"""
+Stand-in for the module server, for tests and benchmarks.
+
+Serves `POST /download/@id=version` on localhost, answering with the archive of the module, and `POST /upload`, keeping uploaded archives.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import time
+
+
+class StubModules:
+    def __init__(self, modules: dict[str, bytes], delay: float = 0):
+        # Archive by `id=version`.
+        self.modules = modules
+        self.delay = delay
+        self.connections = 0
+        self.downloads = 0
+        self.max_concurrent = 0
+        self.uploads: list[bytes] = []
+        self._concurrent = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> "StubModules":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubModules":
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def _make_handler(server: StubModules):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            with server._lock:
+                server.connections += 1
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            body = self._body()
+            if self.path == "/upload":
+                with server._lock:
+                    server.uploads.append(body)
+                self._reply(200, b"uploaded")
+                return
+            data = server.modules.get(self.path.removeprefix("/download/@"), None)
+            if data is None:
+                self._reply(404, b"not found")
+                return
+            with server._lock:
+                server.downloads += 1
+                server._concurrent += 1
+                server.max_concurrent = max(server.max_concurrent, server._concurrent)
+            try:
+                time.sleep(server.delay)
+                self._reply(200, data)
+            finally:
+                with server._lock:
+                    server._concurrent -= 1
+
+        def _body(self) -> bytes:
+            if self.headers.get("Transfer-Encoding", None) != "chunked":
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            body = bytearray()
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                body += self.rfile.read(size)
+                self.rfile.readline()
+                if size == 0:
+                    return bytes(body)
+
+        def _reply(self, status: int, data: bytes):
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
@@ -0,0 +1,43 @@
+from pathlib import Path
+import re
+
+from yelets_project.tree import Ignore, ProjectTree, translate
+
+
+def test_translate():
+    assert re.fullmatch(translate("static/**/*.html"), "static/index.html")
+    assert re.fullmatch(translate("static/**/*.html"), "static/a/b/index.html")
+    assert not re.fullmatch(translate("static/*.html"), "static/a/index.html")
+    assert re.fullmatch(translate("img/[!b]?.png"), "img/a1.png")
+    assert not re.fullmatch(translate("img/[!b]?.png"), "img/b1.png")
+    assert re.fullmatch(translate("a+b/**"), "a+b/c/d")
+
+
+def test_ignore():
+    ignore = Ignore(["# comment", "", ".venv", "__pycache__/", "/test/data", "*.pyc"])
+    assert ignore.match(".venv", True)
+    assert ignore.match("lib/.venv", False)
+    assert ignore.match("a/__pycache__", True)
+    assert not ignore.match("a/__pycache__", False)
+    assert ignore.match("test/data", True)
+    assert not ignore.match("other/test/data", True)
+    assert ignore.match("a/b.pyc", False)
+    assert not ignore.match("main.py", False)
+
+
+def test_glob(tmp_path: Path):
+    for rel in ["static/index.html", "static/a/page.html", "static/a/style.css", ".venv/lib/site.html", ".build/static/index.html", "static/__pycache__/x.html"]:
+        Path(tmp_path, rel).parent.mkdir(parents=True, exist_ok=True)
+        Path(tmp_path, rel).write_text("")
+    Path(tmp_path, ".buildignore").write_text(".venv\n__pycache__/\n")
+
+    tree = ProjectTree(tmp_path)
+    assert tree.glob("static/**/*.html") == ["static/index.html", "static/a/page.html"]
+    assert tree.glob("**/*.html") == ["static/index.html", "static/a/page.html"]
+    scans = tree.scans
+    assert tree.glob("static/*.html") == ["static/index.html"]
+    # Listings are reused, until a directory changes.
+    assert tree.scans == scans
+    Path(tmp_path, "static", "new.html").write_text("")
+    assert tree.glob("static/*.html") == ["static/index.html", "static/new.html"]
+    assert tree.scans == scans + 1
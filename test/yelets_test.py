@@ -0,0 +1,243 @@
+import ast
+import asyncio
+from pathlib import Path
+
+import pytest
+
+import yelets
+from yelets import cache
+
+
+def test_cache(tmp_path: Path):
+    cache.init(tmp_path)
+    try:
+        hits = cache.hits
+        misses = cache.misses
+        code = "os = @import(\"os\")\nx = 1\n"
+
+        assert yelets.execute(code)["x"] == 1
+        assert (cache.hits, cache.misses) == (hits, misses + 1)
+        assert yelets.execute(code)["x"] == 1
+        assert (cache.hits, cache.misses) == (hits + 1, misses + 1)
+        assert yelets.execute(code.replace("1", "2"))["x"] == 2
+        assert (cache.hits, cache.misses) == (hits + 1, misses + 2)
+
+        # Same code of another file is compiled with its own filename.
+        failing = "fail = fn() { raise ValueError() }\n"
+        for filename in ["a", "b"]:
+            with pytest.raises(ValueError) as e:
+                yelets.execute(failing, filename=filename)["fail"]()
+            assert e.traceback[-1].frame.code.raw.co_filename == filename
+
+        cache.clear()
+        assert not tmp_path.exists()
+        assert yelets.execute(code)["x"] == 1
+        assert (cache.hits, cache.misses) == (hits + 1, misses + 5)
+    finally:
+        cache.init(tmp_path, enabled=False)
+
+
+def test_parse_blocks():
+    r = yelets.execute("""
+classify = fn(n) {
+    if n > 10 {
+        return "big"
+    } else if n > 5 {
+        return "medium"
+    } else {
+        total = 0
+        for i in range(n) { total += i }
+        while total > 3 {
+            total -= 3
+        }
+        return total
+    }
+}
+""")
+    assert r["classify"](11) == "big"
+    assert r["classify"](6) == "medium"
+    assert r["classify"](4) == 3
+
+
+def test_parse_multiline():
+    r = yelets.execute("""
+modules = {
+    "module_a": {
+        id: "example.module_a",
+        "version": "latest",
+    },
+}
+numbers = max(
+    1,
+    2,
+)
+squares = {n: n * n for n in range(3)}
+half = .5 + 1.
+key = "k"
+inline = {key: 1, "id": key}
+""")
+    assert r["modules"] == {"module_a": {"id": "example.module_a", "version": "latest"}}
+    assert r["numbers"] == 2
+    assert r["squares"] == {0: 0, 1: 1, 2: 4}
+    assert r["half"] == 1.5
+    assert r["inline"] == {"k": 1, "id": "k"}
+
+
+def test_parse_line_numbers():
+    code = "x = 1\nfail = fn() {\n    raise ValueError(\"fail\")\n}\nfail()\n"
+    try:
+        yelets.execute(code, filename="projectfile")
+    except ValueError as e:
+        assert e.__traceback__ is not None
+        tb = e.__traceback__
+        while tb.tb_next is not None:
+            tb = tb.tb_next
+        assert tb.tb_frame.f_code.co_filename == "projectfile"
+        assert tb.tb_lineno == 3
+    else:
+        assert False
+
+
+def test_parse_error():
+    try:
+        yelets.execute("build = fn() {\n    x = (1,\n")
+    except Exception as e:
+        assert "line 3" in str(e)
+    else:
+        assert False
+
+
+def test_literals():
+    code = """
+project = @import("project")
+id = "example"
+version = "0.1.0"
+computed = os.getenv("HOME")
+build = fn() {
+    id = "inner"
+    project.info("build.py")
+}
+if True {
+    version = "0.2.0"
+}
+modules = {
+    module_a: {
+        id: "example.module_a",
+        "version": "latest",
+    },
+}
+"""
+    r = yelets.parser.literals(code)
+    assert r == {
+        "id": "example",
+        "version": "0.1.0",
+        "modules": {"module_a": {"id": "example.module_a", "version": "latest"}},
+    }
+    assert yelets.parser.literals(code, ["id"]) == {"id": "example"}
+    assert yelets.parser.literals(code, ["id", "modules"], strict=True)["id"] == "example"
+    with pytest.raises(Exception, match="'computed' is assigned a non-literal value at line 5"):
+        yelets.parser.literals(code, ["id", "computed"], strict=True)
+
+
+def test_parse_async():
+    r = yelets.execute("""
+double = async fn(n) {
+    return n * 2
+}
+both = async fn() {
+    return [await double(1), await double(2)]
+}
+""")
+    assert asyncio.run(r["both"]()) == [2, 4]
+    assert yelets.parser.literals("id = \"x\"\nbuild = async fn() { return 1 }\n") == {"id": "x"}
+
+
+def test_translate():
+    code = """
+os = @import("os")
+modules = {
+    module_a: {
+        id: "example.module_a",
+    },
+}
+classify = fn(n) {
+    if n > 1 {
+        return "many"
+    } else if n == 1 {
+        return "one"
+    }
+    return "none"
+}
+"""
+    translated, bindings = yelets.parser.translate(code)
+    assert isinstance(translated, str)
+    assert translated.count("\n") == code.count("\n")
+    module, parsed_bindings = yelets.parser.parse(code)
+    assert ast.dump(ast.parse(translated)) == ast.dump(module)
+    assert bindings == parsed_bindings == [("os", "os", 2)]
+
+    # Statements, which are not translated line by line, are parsed, and keep their lines.
+    code += "count = fn(n) { return n }\nlast = {\n    id: 1,\n}\n"
+    translated, bindings = yelets.parser.translate(code)
+    assert isinstance(translated, ast.Module)
+    module, _ = yelets.parser.parse(code)
+    assert ast.dump(translated) == ast.dump(module)
+    assert [node.lineno for node in translated.body] == [node.lineno for node in module.body]
+
+
+def test_parse_generators():
+    r = yelets.execute("""
+numbers = fn(n) {
+    for i in range(n) { yield i }
+    yield
+}
+chained = fn() {
+    yield from numbers(2)
+    yield 5, 6
+}
+echo = fn() {
+    received = yield
+    while True {
+        received = yield received * 2
+        total = (yield)
+    }
+}
+""")
+    assert list(r["numbers"](2)) == [0, 1, None]
+    assert list(r["chained"]()) == [0, 1, None, (5, 6)]
+    echo = r["echo"]()
+    next(echo)
+    assert echo.send(3) == 6
+
+
+def test_file_import(tmp_path: Path):
+    executed = []
+    imports = {"counter": {"tick": lambda: executed.append(1)}}
+    Path(tmp_path, "common").mkdir()
+    Path(tmp_path, "common", "common.y").write_text("counter = @import(\"counter\")\nutil = @import(\"./util.y\")\ncounter.tick()\ngreet = fn(name) {\n    return util.prefix + name\n}\n")
+    Path(tmp_path, "common", "util.y").write_text("prefix = \"hello, \"\n")
+    projects = []
+    for name in ["a", "b"]:
+        p = Path(tmp_path, name, "projectfile")
+        p.parent.mkdir()
+        p.write_text("common = @import(\"../common/common.y\")\nmessage = common.greet(\"" + name + "\")\n")
+        projects.append(yelets.execute_file(p, imports))
+    assert [project["message"] for project in projects] == ["hello, a", "hello, b"]
+    # Executed once, and shared.
+    assert len(executed) == 1
+    assert projects[0]["common"] is projects[1]["common"]
+
+    # Changed file is executed again.
+    Path(tmp_path, "common", "util.y").write_text("prefix = \"hi, \"\n")
+    Path(tmp_path, "common", "common.y").write_text(Path(tmp_path, "common", "common.y").read_text() + "\n")
+    assert yelets.execute_file(Path(tmp_path, "a", "projectfile"), imports)["message"] == "hi, a"
+    assert len(executed) == 2
+
+    Path(tmp_path, "common", "util.y").write_text("common = @import(\"./common.y\")\n")
+    Path(tmp_path, "common", "common.y").write_text(Path(tmp_path, "common", "common.y").read_text() + "\n")
+    with pytest.raises(Exception, match="circular import"):
+        yelets.execute_file(Path(tmp_path, "a", "projectfile"), imports)
+
+    Path(tmp_path, "a", "other").write_text("x = @import(\"./missing.y\")\n")
+    with pytest.raises(Exception, match="cannot import './missing.y' at line 1"):
+        yelets.execute_file(Path(tmp_path, "a", "other"), imports)
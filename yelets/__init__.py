@@ -5,16 +5,15 @@ We either panic, or return something meaningful.
 """
 
 import argparse
-from yelets import cmd_module, os_module
-from os import PathLike
-import os
+import ast
+import hashlib
+from yelets import cache, cmd_module, fs_module, os_module, parser
 from pathlib import Path
-import re
-import tarfile
-from typing import Any
+from types import CodeType
+from typing import Any, Callable, Collection
 
-import call
-from dotenv import load_dotenv
+# Bump on every change to the translation output, so cached code of the previous translator is never reused.
+TRANSLATOR_VERSION = 4
 
 
 class Namespace:
@@ -28,106 +27,134 @@ class Namespace:
             return self._data[__name]
 
 
-def to_python(code: str, imports: dict | None = None) -> tuple[str, dict]:
-    result = ""
-    ind = 0
-    preserve_block_close = 0
-    globs = {}
+class LazyNamespace:
+    """
+    Namespace, which contents are returned by a function on every access.
+    """
+    def __init__(self, provider: Callable[[], dict]) -> None:
+        self._provider = provider
 
-    for i, line in enumerate(code.splitlines()):
-        linenumber = i + 1
-        l = line.strip()
-        prefix = "    " * ind
-
-        if l == "}" or l == "},":
-            if ind:
-                ind -= 1
-            prefix = "    " * (ind)
-            if preserve_block_close:
-                preserve_block_close -= 1
-                result += prefix + l + "\n"
-            continue
+    def __getattribute__(self, __name: str) -> Any:
+        if __name.startswith("_"):
+            return super().__getattribute__(__name)
+        else:
+            return self._provider()[__name]
 
-        dict_match = re.match(r"^\s*([A-z0-9_]+)\s*=\s*{\s*$", l)
-        if dict_match:
-            result += f"{prefix}{dict_match.group(1)} = " + "{\n"
-            preserve_block_close += 1
-            ind += 1
-            continue
 
-        subdict_match = re.match(r"^\s*\"?([A-z0-9_]+)\"?\s*:\s*{\s*$", l)
-        if subdict_match:
-            result += f"{prefix}\"{subdict_match.group(1)}\":" + " {\n"
-            preserve_block_close += 1
-            ind += 1
-            continue
+def to_python(code: str, imports: dict | None = None) -> tuple[str, dict]:
+    module, bindings = parser.parse(code)
+    return ast.unparse(module), bind(bindings, imports)
 
-        subdict_direct_match = re.match(r"^\s*\"?([A-z0-9_]+)\"?\s*:\s*(.+)\s*$", l)
-        if subdict_direct_match:
-            result += f"{prefix}\"{subdict_direct_match.group(1)}\": {subdict_direct_match.group(2)}\n"
-            continue
 
-        function_match = re.match(r"^\s*([A-z0-9_]+)\s*=\s*fn\s*\((.*)\)\s*{\s*$", l)
-        if function_match:
-            result += f"{prefix}def {function_match.group(1)}({function_match.group(2)}):\n"
-            ind += 1
-            continue
+# (Resolved path, content hash): namespace of an imported Yelets file, shared by all files importing it during the run.
+_modules: dict[tuple[Path, str], Namespace] = {}
+_loading: set[Path] = set()
 
-        # for now, imports act as global namespace update, even if they are executed locally
-        import_match = re.match(r"^\s*([A-z0-9_]+)\s*=\s*@import\s*\(\"([A-z0-9_\-\.]+)\"\)\s*$", l)
-        if import_match:
-            varname = import_match.group(1)
-            importname = import_match.group(2)
-            if not imports or importname not in imports:
-                raise Exception(f"yelets: unrecognized import '{importname}' at line {linenumber}")
-            imp = imports[importname]
-            globs[varname] = Namespace(**imp)
-            continue
 
-        if_match = re.match(r"^\s*if\s*(.+)\s*{\s*$", l)
-        if if_match:
-            result += f"{prefix}if {if_match.group(1)}:\n"
-            ind += 1
-            continue
+def is_file_import(name: str) -> bool:
+    return name.startswith(("./", "../", "/")) or Path(name).is_absolute()
 
-        for_match = re.match(r"^\s*for\s*(.+)\s*{\s*$", l)
-        if for_match:
-            result += f"{prefix}for {for_match.group(1)}:\n"
-            ind += 1
-            continue
 
-        while_match = re.match(r"^\s*while\s*(.+)\s*{\s*$", l)
-        if while_match:
-            result += f"{prefix}while {while_match.group(1)}:\n"
-            ind += 1
+def bind(bindings: list[tuple[str, str, int]], imports: dict | None = None, base: Path | None = None) -> dict:
+    """
+    Resolves import bindings into a global namespace. File imports are relative to the `base` directory.
+
+    Imports given as functions returning a dict are resolved on every access.
+    """
+    globs = {}
+    for varname, importname, linenumber in bindings:
+        if is_file_import(importname):
+            if base is None:
+                raise Exception(f"yelets: file import '{importname}' at line {linenumber} requires the code to be read from a file")
+            p = Path(base, importname)
+            if not p.is_file():
+                raise Exception(f"yelets: cannot import '{importname}' at line {linenumber}, file '{p}' does not exist")
+            globs[varname] = import_file(p, imports)
             continue
+        if not imports or importname not in imports:
+            raise Exception(f"yelets: unrecognized import '{importname}' at line {linenumber}")
+        value = imports[importname]
+        globs[varname] = LazyNamespace(value) if callable(value) else Namespace(**value)
+    return globs
 
-        result += prefix + l + "\n"
 
-    return result, globs
+def compile_code(code: str, filename: str = "<yelets>") -> tuple[CodeType, list[tuple[str, str, int]]]:
+    """
+    Translates and compiles Yelets code, going through the on-disk cache.
+    """
+    key = cache.key(code, TRANSLATOR_VERSION, filename)
+    cached = cache.load(key)
+    if cached is not None:
+        return cached
+    try:
+        translated, bindings = parser.translate(code)
+        compiled = compile(translated, filename, "exec")
+    except Exception:
+        # Errors are reported by the parser, which reads the whole of the code, so the first error is reported with its Yelets location.
+        module, bindings = parser.parse(code)
+        compiled = compile(module, filename, "exec")
+    cache.store(key, compiled, bindings)
+    return compiled, bindings
 
 
 # Convert everything to python, and execute as python script.
 #
 # Returns resulting local namespace.
-def execute(code: str, imports: dict | None = None) -> dict:
+def execute(code: str, imports: dict | None = None, *, filename: str = "<yelets>", base: Path | None = None) -> dict:
     if imports is None:
         imports = {}
     builtin_imports = {
         "os": os_module.mod,
         "cmd": cmd_module.mod,
+        "fs": fs_module.mod,
     }
-    final_imports = dict(**builtin_imports, **imports)
-    python_code, globs = to_python(code, final_imports)
+    final_imports = {**builtin_imports, **imports}
+    compiled, bindings = compile_code(code, filename)
+    globs = bind(bindings, final_imports, base)
 
-    exec(python_code, globs)
+    exec(compiled, globs)
     return globs
 
 
 def execute_file(p: Path, imports: dict | None = None) -> dict:
     with p.open("r") as file:
         code = file.read()
-    return execute(code, imports)
+    return execute(code, imports, filename=str(p), base=p.parent)
+
+
+def import_file(p: Path, imports: dict | None = None) -> Namespace:
+    """
+    Executes an imported Yelets file once per run, and returns its namespace. A file changed during the run is executed again.
+
+    Imports of the file are bound from `imports` of its first importer, so imports which differ between importers, like `project`, must be given as functions, resolved on access.
+    """
+    path = p.resolve()
+    with path.open("rb") as file:
+        data = file.read()
+    key = (path, hashlib.sha256(data).hexdigest())
+    module = _modules.get(key, None)
+    if module is not None:
+        return module
+    if path in _loading:
+        raise Exception(f"yelets: circular import of '{path}'")
+    _loading.add(path)
+    try:
+        # Newlines are translated like for files read in text mode.
+        globs = execute(data.decode().replace("\r\n", "\n"), imports, filename=str(path), base=path.parent)
+    finally:
+        _loading.discard(path)
+    module = Namespace(**{name: value for name, value in globs.items() if not name.startswith("_")})
+    _modules[key] = module
+    return module
+
+
+def read_literals(p: Path, names: Collection[str] | None = None, *, strict: bool = False) -> dict:
+    """
+    Reads top-level assignments of literals from a file, without executing it. With `strict`, names assigned a non-literal value raise.
+    """
+    with p.open("r") as file:
+        code = file.read()
+    return parser.literals(code, names, strict=strict)
 
 
 def main():
@@ -0,0 +1,92 @@
+"""
+On-disk cache of compiled Yelets code.
+
+Entries are keyed by a hash of the translator version, the filename and the source code, so a file is translated and compiled only once until either changes. Each entry holds the marshalled Python code object together with the import bindings of the file.
+
+The cache is disabled until `init` is called.
+"""
+import hashlib
+import marshal
+import os
+from pathlib import Path
+import shutil
+import sys
+from types import CodeType
+
+import xrandom
+
+_magic = b"YLC1"
+
+_root: Path | None = None
+_dir: Path | None = None
+hits: int = 0
+misses: int = 0
+
+
+def init(dir: Path, *, enabled: bool = True, clear_existing: bool = False):
+    global _root
+    global _dir
+    _root = dir
+    # Marshalled code is specific to the interpreter version.
+    _dir = Path(dir, sys.implementation.cache_tag)
+    if clear_existing:
+        clear()
+    if not enabled:
+        _dir = None
+
+
+def enabled() -> bool:
+    return _dir is not None
+
+
+def key(code: str, translator_version: int, filename: str = "<yelets>") -> str:
+    # Filename is a part of the compiled code, and is named by tracebacks.
+    h = hashlib.sha256(f"{translator_version}\n{filename}\n".encode())
+    h.update(code.encode())
+    return h.hexdigest()
+
+
+def load(key: str) -> tuple[CodeType, list] | None:
+    """
+    Loads compiled code and bindings by a key.
+
+    Returns `None` on a miss, including corrupted or foreign entries.
+    """
+    global hits
+    global misses
+    if _dir is None:
+        return None
+    try:
+        with Path(_dir, key).open("rb") as f:
+            data = f.read()
+        if not data.startswith(_magic):
+            raise ValueError("bad magic")
+        compiled, bindings = marshal.loads(data[len(_magic):])
+        if not isinstance(compiled, CodeType):
+            raise ValueError("bad entry")
+    except (OSError, ValueError, EOFError, TypeError):
+        misses += 1
+        return None
+    hits += 1
+    return compiled, bindings
+
+
+def store(key: str, compiled: CodeType, bindings: list):
+    if _dir is None:
+        return
+    path = Path(_dir, key)
+    tmp_path = Path(_dir, f"{key}.{xrandom.makeid()}.tmp")
+    try:
+        _dir.mkdir(parents=True, exist_ok=True)
+        with tmp_path.open("wb") as f:
+            f.write(_magic + marshal.dumps((compiled, bindings)))
+        # Replace atomically, so concurrent runs never observe a partially written entry.
+        os.replace(tmp_path, path)
+    except OSError:
+        # Cache is an optimization - failure to write it must not fail the execution.
+        tmp_path.unlink(missing_ok=True)
+
+
+def clear():
+    if _root is not None and _root.exists():
+        shutil.rmtree(_root, ignore_errors=True)
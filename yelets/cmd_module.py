@@ -1,24 +1,42 @@
 """
 Yelets module to provide basic command helper functions.
 """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from os import PathLike
 import os
 from pathlib import Path
-import tarfile
+import threading
+from typing import Any, Awaitable, Callable
+import archive
 import call as native_call
+from yelets import fs_module
 import yelets_project
 
+# Jobs of `parallel` and `callAll` running at once, by default one per CPU. Set by `-jobs` option.
+parallel_workers: int | None = None
 
-def tar(source_dir: PathLike, output_filename: PathLike):
-    """Create a .tar.gz archive from the specified directory."""
-    with tarfile.open(Path(yelets_project.get_project().source, output_filename), "w:gz") as tar:
-        tar.add(Path(yelets_project.get_project().source, Path(yelets_project.get_project().source, source_dir)), arcname=os.path.basename(source_dir))
+# Output lines of concurrent jobs are printed whole.
+_response_lock = threading.Lock()
+
+
+def tar(source_dir: PathLike, output_filename: PathLike, *, compression: str | None = None, level: int | None = None, workers: int | None = None):
+    """
+    Create an archive from the specified directory.
+
+    Compression is `gzip`, `zstd` or `none`, by default chosen by the extension: `.tar.zst` or `.tar`, and `gzip` otherwise. Compression uses `workers` threads, by default one per CPU.
+    """
+    output = Path(yelets_project.get_project().source, output_filename)
+    if compression is None:
+        compression = archive.compression_for(output)
+    with output.open("wb") as f:
+        archive.write_tar(f, [(Path(yelets_project.get_project().source, source_dir), os.path.basename(source_dir))], compression=compression, level=level, workers=workers)
 
 
 def untar(tar_gz_path: PathLike, extract_path: PathLike):
-    """Extract a .tar.gz archive to the specified directory."""
-    with tarfile.open(Path(yelets_project.get_project().source, tar_gz_path), "r:gz") as tar:
-        tar.extractall(path=Path(yelets_project.get_project().source, extract_path))
+    """Extract an archive to the specified directory. Compression is detected from the contents."""
+    with Path(yelets_project.get_project().source, tar_gz_path).open("rb") as f:
+        archive.extract_tar(f, Path(yelets_project.get_project().source, extract_path))
 
 
 def trash(*paths: PathLike):
@@ -30,30 +48,149 @@ def trash(*paths: PathLike):
 
 
 def rm(*paths: PathLike):
-    new_paths = []
-    for p in paths:
-        new_paths.append(Path(yelets_project.get_project().source, p))
-    call(f"rm -rf {' '.join([str(x) for x in new_paths])}", yelets_project.get_project().source)
+    """Removes files and directories recursively, see `fs.rm`."""
+    fs_module.rm(*paths)
+
+
+def call(command: str, dir: Path | str | None = None, *, timeout: float | None = None, tail: int = 10000) -> tuple[str, str, int]:
+    """
+    Calls a command, showing its output, prefixed by the project id, while it runs.
+
+    Returns stdout and stderr, limited to `tail` last lines, and retcode. Raises if the command runs longer than `timeout` seconds.
+    """
+    project = yelets_project.get_project()
+    return _call(command, dir, f"[{project.id}]", timeout=timeout, tail=tail)
+
+
+def _call(command: str, dir: Path | str | None, prefix: str, *, timeout: float | None, tail: int, cancel: threading.Event | None = None) -> tuple[str, str, int]:
+    result = native_call.run(command, _dir(dir), on_line=_printer(prefix), tail=tail, timeout=timeout, cancel=cancel)
+    return _report(command, prefix, result, timeout)
+
+
+async def callAsync(command: str, dir: Path | str | None = None, *, timeout: float | None = None, tail: int = 10000) -> tuple[str, str, int]:
+    """
+    Awaitable `call`, which runs the command in the event loop, so other coroutines of `async fn` functions proceed meanwhile.
+    """
+    prefix = f"[{yelets_project.get_project().id}]"
+    result = await native_call.run_async(command, _dir(dir), on_line=_printer(prefix), tail=tail, timeout=timeout)
+    return _report(command, prefix, result, timeout)
+
+
+async def mustCallAsync(command: str, dir: Path | str | None = None, *, timeout: float | None = None):
+    _, stderr, retcode = await callAsync(command, dir, timeout=timeout)
+    if retcode != 0:
+        raise Exception(f"During call of command '{command}', an error occurred: {stderr}")
+
 
+async def gather(*awaitables: Awaitable) -> list[Any]:
+    """
+    Awaits calls of `async fn` functions and awaitable commands concurrently, and returns their results in order.
+    """
+    return list(await asyncio.gather(*awaitables))
 
-def call(command: str, dir: Path | str | None = None) -> tuple[str, str, int]:
+
+def _dir(dir: Path | str | None) -> Path:
+    source = yelets_project.get_project().source
     if dir is None:
-        d = yelets_project.get_project().source
-    else:
-        d = Path(yelets_project.get_project().source, dir)
-    return native_call.call(command, d)
+        return source
+    return Path(source, dir)
+
+
+def _printer(prefix: str) -> Callable[[str, str], None]:
+    response = yelets_project.get_response()
+
+    def on_line(_, line):
+        with _response_lock:
+            response(f"{prefix} {line.rstrip()}")
+
+    return on_line
 
 
-def mustCall(command: str, dir: Path | str | None = None):
-    _, stderr, retcode = call(command, dir)
+def _report(command: str, prefix: str, result: native_call.Result, timeout: float | None) -> tuple[str, str, int]:
+    message = f"{prefix} command '{command}' finished with retcode {result.retcode} in {result.wall_time:.2f}s"
+    if result.cpu_time is not None:
+        message += f", CPU {result.cpu_time:.2f}s"
+    with _response_lock:
+        yelets_project.get_response()(message)
+    if result.timed_out:
+        raise Exception(f"Command '{command}' timed out after {timeout}s.")
+    if result.cancelled:
+        raise Exception(f"Command '{command}' was cancelled.")
+    return result.stdout, result.stderr, result.retcode
+
+
+def mustCall(command: str, dir: Path | str | None = None, *, timeout: float | None = None):
+    _, stderr, retcode = call(command, dir, timeout=timeout)
     if retcode != 0:
         raise Exception(f"During call of command '{command}', an error occurred: {stderr}")
 
 
+def _workers(workers: int | None) -> int:
+    return workers or parallel_workers or os.cpu_count() or 1
+
+
+def callAll(*commands: str, dir: Path | str | None = None, workers: int | None = None, timeout: float | None = None, tail: int = 10000) -> list[tuple[str, str, int]]:
+    """
+    Calls commands concurrently, at most `workers` at once, and returns their `(stdout, stderr, retcode)` in the order of the commands.
+
+    Output lines are prefixed by the project id and the number of a command.
+    """
+    project = yelets_project.get_project()
+    with ThreadPoolExecutor(_workers(workers)) as pool:
+        futures = [pool.submit(_call, command, dir, f"[{project.id}:{i + 1}]", timeout=timeout, tail=tail) for i, command in enumerate(commands)]
+        return [future.result() for future in futures]
+
+
+def parallel(*jobs: str | Callable[[], Any], workers: int | None = None, failFast: bool = False, timeout: float | None = None) -> list[Any]:
+    """
+    Runs commands and functions concurrently, at most `workers` at once, and returns their results in the order of the jobs.
+
+    Result of a command is its stdout, and a command fails with a non-zero retcode. Failures of all jobs are raised together, after all jobs finish. With `failFast`, the first failure cancels the jobs which did not finish yet.
+    """
+    project = yelets_project.get_project()
+    cancel = threading.Event()
+
+    def run(i: int, job: str | Callable[[], Any]) -> Any:
+        if cancel.is_set():
+            raise Exception("Cancelled.")
+        try:
+            if callable(job):
+                return job()
+            stdout, stderr, retcode = _call(job, None, f"[{project.id}:{i + 1}]", timeout=timeout, tail=10000, cancel=cancel)
+            if retcode != 0:
+                raise Exception(f"Retcode {retcode}: {stderr.strip()}")
+            return stdout
+        except Exception:
+            if failFast:
+                cancel.set()
+            raise
+
+    with ThreadPoolExecutor(_workers(workers)) as pool:
+        futures = [pool.submit(run, i, job) for i, job in enumerate(jobs)]
+    results = []
+    failures = []
+    for i, (job, future) in enumerate(zip(jobs, futures)):
+        error = future.exception()
+        if error is None:
+            results.append(future.result())
+        else:
+            name = getattr(job, "__name__", "function") if callable(job) else f"'{job}'"
+            failures.append(f"{i + 1}. {name}: {error}")
+    if failures:
+        raise Exception(f"{len(failures)} of {len(jobs)} jobs failed:\n" + "\n".join(failures))
+    return results
+
+
 mod = {
     "tar": tar,
     "untar": untar,
     "trash": trash,
+    "rm": rm,
     "call": call,
     "mustCall": mustCall,
+    "callAll": callAll,
+    "parallel": parallel,
+    "callAsync": callAsync,
+    "mustCallAsync": mustCallAsync,
+    "gather": gather,
 }
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+Yelets module with file operations, made in-process instead of calling commands.
+
+Paths are relative to the project source. Functions taking several paths handle all of them in one call.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from os import PathLike
+import os
+from pathlib import Path
+import shutil
+import stat
+from typing import Iterator
+import yelets_project
+
+# Directories with at least this many files are deleted by a pool of threads.
+_parallel_delete_threshold = 1000
+# Files deleted by one task of the pool.
+_delete_chunk = 256
+
+
+def _path(p: PathLike) -> Path:
+    return Path(yelets_project.get_project().source, p)
+
+
+def exists(path: PathLike) -> bool:
+    return _path(path).exists()
+
+
+def mkdir(*paths: PathLike):
+    """
+    Creates directories, with missing parents. Existing directories are fine.
+    """
+    for p in paths:
+        _path(p).mkdir(parents=True, exist_ok=True)
+
+
+def rm(*paths: PathLike, workers: int | None = None):
+    """
+    Removes files and directories recursively. Missing paths are skipped.
+
+    Files of large directories are deleted by `workers` threads, by default one per CPU.
+    """
+    for p in paths:
+        p = _path(p)
+        try:
+            st = p.lstat()
+        except FileNotFoundError:
+            continue
+        if stat.S_ISDIR(st.st_mode):
+            _remove_tree(p, workers or os.cpu_count() or 1)
+        else:
+            _unlink(p)
+
+
+def _remove_tree(root: Path, workers: int):
+    files = []
+    dirs = []
+    _collect(str(root), files, dirs)
+    if workers > 1 and len(files) >= _parallel_delete_threshold:
+        with ThreadPoolExecutor(workers) as pool:
+            for _ in pool.map(_unlink_all, [files[i:i + _delete_chunk] for i in range(0, len(files), _delete_chunk)]):
+                pass
+    else:
+        _unlink_all(files)
+    # Children go before parents.
+    for d in dirs:
+        os.rmdir(d)
+
+
+def _collect(path: str, files: list[str], dirs: list[str]):
+    with os.scandir(path) as it:
+        for entry in it:
+            # Links to directories are removed, not followed.
+            if entry.is_dir(follow_symlinks=False):
+                _collect(entry.path, files, dirs)
+            else:
+                files.append(entry.path)
+    dirs.append(path)
+
+
+def _unlink_all(paths: list[str]):
+    for p in paths:
+        _unlink(p)
+
+
+def _unlink(p: str | Path):
+    try:
+        os.unlink(p)
+    except PermissionError:
+        # Read-only files cannot be deleted on Windows.
+        if os.name != "nt":
+            raise
+        os.chmod(p, stat.S_IWRITE)
+        os.unlink(p)
+
+
+def copy(source: PathLike | list[PathLike], dest: PathLike):
+    """
+    Copies a file or a directory to `dest`, or a list of them into the `dest` directory. Existing files are overwritten, metadata is kept.
+    """
+    dest = _path(dest)
+    if isinstance(source, list):
+        dest.mkdir(parents=True, exist_ok=True)
+        for s in source:
+            s = _path(s)
+            _copy(s, Path(dest, s.name))
+    else:
+        _copy(_path(source), dest)
+
+
+def _copy(source: Path, dest: Path):
+    if source.is_dir():
+        shutil.copytree(source, dest, symlinks=True, dirs_exist_ok=True)
+    else:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(source, dest, follow_symlinks=False)
+
+
+def move(source: PathLike | list[PathLike], dest: PathLike):
+    """
+    Moves a file or a directory to `dest`, or a list of them into the `dest` directory. Moves within a filesystem are renames.
+    """
+    dest = _path(dest)
+    if isinstance(source, list):
+        dest.mkdir(parents=True, exist_ok=True)
+        for s in source:
+            s = _path(s)
+            shutil.move(s, Path(dest, s.name))
+    else:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(_path(source), dest)
+
+
+def glob(pattern: str) -> list[str]:
+    """
+    Returns sorted posix paths matching a pattern, relative to the project source. `**` matches any number of directories.
+    """
+    source = yelets_project.get_project().source
+    return sorted(p.relative_to(source).as_posix() for p in source.glob(pattern))
+
+
+def walk(path: PathLike = ".", *, dirs: bool = False) -> Iterator[str]:
+    """
+    Yields posix paths of files under a directory, relative to the project source, and of directories too with `dirs`. Directories are listed lazily, while the paths are consumed.
+    """
+    source = yelets_project.get_project().source
+    root = _path(path)
+    prefix = root.relative_to(source).as_posix()
+    yield from _walk(str(root), "" if prefix == "." else prefix + "/", dirs)
+
+
+def _walk(path: str, prefix: str, dirs: bool) -> Iterator[str]:
+    with os.scandir(path) as it:
+        entries = sorted(it, key=lambda entry: entry.name)
+    for entry in entries:
+        rel = prefix + entry.name
+        if entry.is_dir(follow_symlinks=False):
+            if dirs:
+                yield rel
+            yield from _walk(entry.path, rel + "/", dirs)
+        else:
+            yield rel
+
+
+mod = {
+    "exists": exists,
+    "mkdir": mkdir,
+    "rm": rm,
+    "copy": copy,
+    "move": move,
+    "glob": glob,
+    "walk": walk,
+}
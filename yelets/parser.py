@@ -0,0 +1,1541 @@
+"""
+Yelets parser.
+
+Source is split into tokens by a single compiled regular expression, and then parsed in a single pass by a recursive descent parser, which builds Python AST nodes directly. Resulting module can be passed straight to `compile()`, line numbers of all nodes point to the Yelets source.
+
+Building the AST in Python is slower than compiling Python source, so `translate` translates lines one to one into Python source where it can, and parses only top-level statements which need the parser.
+
+Yelets statements and expressions are Python ones, with the following differences:
+* blocks are enclosed in curly braces instead of being defined by indentation: `if x { ... } else if y { ... } else { ... }`, `for x in y { ... }`, `while x { ... }`, `with x as y { ... }`
+* functions are defined by assignment: `name = fn(a, b=1) { ... }`, coroutine functions by `name = async fn(a) { ... }`
+* imports are bound by assignment: `name = @import("name")`, and Yelets files are imported by a relative or absolute path: `common = @import("./common.y")`
+* bare names used as keys of multi-line dictionary displays, starting a line, are strings: `{\n    id: "x",\n}` is `{"id": "x"}`, while `{id: "x"}` uses the value of `id`
+"""
+
+import ast
+import gc
+import re
+import sys
+from typing import Any, Collection
+
+# Tokens are tuples `(kind, value, line, col, end_line, end_col, offset)`. Kind of an operator is the operator itself.
+#
+# Names are matched first, as the most frequent tokens - unless they are string prefixes. A dot followed by a digit starts a number, not an operator.
+_token_re = re.compile(r"""
+    [ \t\f]*+(?:
+    (?P<name>[^\W\d]\w*+)(?!['"])
+    |(?P<op>\*\*=|//=|>>=|<<=|\.\.\.|->|:=|\*\*|//|<<|>>|<=|>=|==|!=|\+=|-=|\*=|/=|%=|&=|\|=|\^=|@=|[-+*/%@&|^~<>()\[\]{},:;=]|\.(?![0-9]))
+    |(?P<string>(?:[rRbBuUfF]{1,2})?(?:'''(?:[^'\\]|\\.|'(?!''))*'''|\"\"\"(?:[^"\\]|\\.|"(?!""))*\"\"\"|'(?:[^'\\\r\n]|\\.)*'|"(?:[^"\\\r\n]|\\.)*"))
+    |(?P<nl>\r?\n|\r)
+    |(?P<number>0[xX][0-9a-fA-F_]+|0[oO][0-7_]+|0[bB][01_]+|(?:[0-9][0-9_]*(?:\.[0-9_]*)?|\.[0-9][0-9_]*)(?:[eE][+-]?[0-9][0-9_]*)?[jJ]?)
+    |(?P<comment>\#[^\r\n]*)
+    |(?P<continuation>\\\r?\n)
+    |(?P<error>.)
+    |\Z)
+""", re.VERBOSE | re.DOTALL)
+
+_keywords = frozenset([
+    "False", "None", "True", "and", "as", "assert", "async", "await", "break", "continue", "del", "elif", "else", "except",
+    "finally", "fn", "for", "from", "global", "if", "import", "in", "is", "lambda", "nonlocal", "not", "or", "pass",
+    "raise", "return", "try", "while", "with", "yield",
+])
+
+_constants = {"None": None, "True": True, "False": False}
+
+_binary_ops = {
+    "|": (1, ast.BitOr),
+    "^": (2, ast.BitXor),
+    "&": (3, ast.BitAnd),
+    "<<": (4, ast.LShift),
+    ">>": (4, ast.RShift),
+    "+": (5, ast.Add),
+    "-": (5, ast.Sub),
+    "*": (6, ast.Mult),
+    "/": (6, ast.Div),
+    "//": (6, ast.FloorDiv),
+    "%": (6, ast.Mod),
+    "@": (6, ast.MatMult),
+}
+
+_unary_ops = {
+    "+": ast.UAdd,
+    "-": ast.USub,
+    "~": ast.Invert,
+}
+
+_compare_ops = {
+    "<": ast.Lt,
+    ">": ast.Gt,
+    "==": ast.Eq,
+    ">=": ast.GtE,
+    "<=": ast.LtE,
+    "!=": ast.NotEq,
+}
+
+_augassign_ops = {
+    "+=": ast.Add,
+    "-=": ast.Sub,
+    "*=": ast.Mult,
+    "/=": ast.Div,
+    "//=": ast.FloorDiv,
+    "%=": ast.Mod,
+    "@=": ast.MatMult,
+    "&=": ast.BitAnd,
+    "|=": ast.BitOr,
+    "^=": ast.BitXor,
+    "<<=": ast.LShift,
+    ">>=": ast.RShift,
+    "**=": ast.Pow,
+}
+
+# Tokens which, following a literal or a name, end an expression.
+_atom_ends = frozenset([",", ")", "]", "}", ":", "=", ";", "end"])
+
+# Tokens which end a simple statement.
+_statement_ends = frozenset(["nl", ";", "}", "end"])
+
+_opening_brackets = frozenset(["(", "[", "{"])
+_closing_brackets = frozenset([")", "]", "}"])
+
+_load = ast.Load()
+_store = ast.Store()
+_del = ast.Del()
+
+# Fields introduced in later versions of Python must be passed explicitly.
+_function_extra = {"type_params": []} if sys.version_info >= (3, 12) else {}
+
+
+def tokenize(code: str, line: int = 1) -> list[tuple]:
+    """
+    Splits code into tokens. Line numbers start at `line`.
+    """
+    tokens = []
+    append = tokens.append
+    line_start = 0
+    # Leading whitespace is a part of each match, so it never produces a match of its own.
+    for m in _token_re.finditer(code):
+        kind = m.lastgroup
+        if kind is None:
+            continue
+        value = m.group(kind)
+        end = m.end()
+        start = end - len(value)
+        col = start - line_start
+        if kind == "name" or kind == "number":
+            append((kind, value, line, col, line, col + len(value), start))
+        elif kind == "op":
+            append((value, value, line, col, line, col + len(value), start))
+        elif kind == "nl":
+            append(("nl", value, line, col, line, col + len(value), start))
+            line += 1
+            line_start = end
+        elif kind == "string":
+            newlines = value.count("\n")
+            if newlines:
+                start_line = line
+                line += newlines
+                line_start = start + value.rindex("\n") + 1
+                append(("string", value, start_line, col, line, end - line_start, start))
+            else:
+                append(("string", value, line, col, line, col + len(value), start))
+        elif kind == "continuation":
+            line += 1
+            line_start = end
+        elif kind == "error":
+            raise Exception(f"yelets: unexpected character '{value}' at line {line}, column {col + 1}")
+    append(("end", "", line, len(code) - line_start, line, len(code) - line_start, len(code)))
+    return tokens
+
+
+def parse(code: str) -> tuple[ast.Module, list[tuple[str, str, int]]]:
+    """
+    Parses Yelets code into a Python module.
+
+    Returns module and import bindings as a list of `(varname, importname, linenumber)`.
+    """
+    # Parsing allocates lots of nodes, and none of them are garbage - tracing them for cycles only slows the parsing down.
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        parser = _Parser(code, tokenize(code))
+        body = parser.parse_module()
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return ast.Module(body=body, type_ignores=[]), parser.bindings
+
+
+def literals(code: str, names: Collection[str] | None = None, *, strict: bool = False) -> dict[str, Any]:
+    """
+    Evaluates top-level assignments of literals, without executing the code.
+
+    Only assignments of given names are evaluated, or all of them, if names are not given. Names last assigned a non-literal value are omitted, or raise with `strict`.
+    """
+    parser = _Parser(code, tokenize(code))
+    result = parser.parse_literals(names)
+    if strict:
+        for name, line in parser.computed.items():
+            raise Exception(f"yelets: '{name}' is assigned a non-literal value at line {line}")
+    return result
+
+
+def translate(code: str) -> tuple[str | ast.Module, list[tuple[str, str, int]]]:
+    """
+    Translates Yelets code for `compile()`, keeping its line numbers.
+
+    Lines are translated one to one into Python source, and only top-level statements, which cannot be translated so, are parsed. Returns the source, or a module if any statement was parsed, and import bindings like `parse`.
+    """
+    if "\r" in code:
+        code = code.replace("\r\n", "\n")
+        if "\r" in code:
+            return parse(code)
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _translate_lines(code)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+# Line translation.
+#
+# Most Yelets lines are Python lines already, apart from block headers, closing braces of blocks, import bindings and bare dictionary keys, so they are translated by looking at a few regular expressions, and the source is compiled by Python itself. Lines are looked at with strings masked and comments removed.
+
+_line_string_re = re.compile(r"""(?:[rRbBuUfF]{1,2})?(?:'[^'\\]*(?:\\.[^'\\]*)*'|"[^"\\]*(?:\\.[^"\\]*)*")""")
+_line_bracket_re = re.compile(r"[()\[\]{}]")
+_line_header_re = re.compile(r"""
+    (?:(?P<close>\}[ \t\f]*)?(?P<keyword>if|while|for|with|elif|else[ \t\f]+if|else)\b[ \t\f]*(?P<expr>.*?)
+    |(?P<name>[^\W\d]\w*)[ \t\f]*=[ \t\f]*(?P<async>async[ \t\f]+)?fn[ \t\f]*\((?P<args>.*)\)
+    )[ \t\f]*\{$
+""", re.VERBOSE)
+_line_import_re = re.compile(r"""([^\W\d]\w*)[ \t\f]*=[ \t\f]*@[ \t\f]*import[ \t\f]*\([ \t\f]*((?:[rRbBuUfF]{1,2})?(?:'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"))[ \t\f]*\)[ \t\f]*(?:\#.*)?$""")
+# Words and characters, which only the parser handles.
+_line_unsupported_re = re.compile(r"\b(?:fn|def|class|try|except|finally|elif|async)\b|[@;\\]")
+# Statements, which are blocks unless they are block headers, and the type statement of Python.
+_line_compound_re = re.compile(r"(?:if|for|while|with|else|elif)\b|type[ \t\f]+[^\W\d]")
+# Words, which make bare names starting a line inside a dictionary display something else than keys.
+_line_display_re = re.compile(r"\b(?:for|lambda)\b")
+_line_key_re = re.compile(r"([^\W\d]\w*)[ \t\f]*:(?!=)")
+# Lines, which likely start a new top-level statement.
+_line_statement_re = re.compile(r"(?!(?:else|elif)\b)[^\W\d]")
+
+_line_pairs = {")": "(", "]": "[", "}": "{"}
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _mask(m: re.Match) -> str:
+    return "0" * len(m[0])
+
+
+def _check_header_part(text: str):
+    """
+    Checks that a condition or parameters of a block header are a Python expression by themselves.
+    """
+    if "{" in text or "}" in text or _line_unsupported_re.search(text):
+        raise _Unsupported()
+    depth = []
+    for c in _line_bracket_re.findall(text):
+        if c in _line_pairs:
+            if not depth or depth.pop() != _line_pairs[c]:
+                raise _Unsupported()
+        else:
+            depth.append(c)
+    if depth:
+        raise _Unsupported()
+
+
+def _translate_lines(code: str) -> tuple[str | ast.Module, list[tuple[str, str, int]]]:
+    lines = code.split("\n")
+    count = len(lines)
+    result = []
+    append = result.append
+    bindings = []
+    # Top-level statements parsed by the parser.
+    parsed = []
+    offsets = None
+    # Open blocks, true for `if` blocks, which `else` may follow.
+    blocks = []
+    # Open brackets of a statement spanning lines.
+    brackets = []
+    prefix = ""
+    # Whether the innermost block has no statements yet.
+    empty = False
+    # Whether the last line closed an `if` block.
+    after_if = False
+    # Last character of the last line with code.
+    last = ""
+    # First line of the current top-level statement.
+    start = 0
+    i = 0
+    while True:
+        try:
+            if i == count:
+                if blocks or brackets:
+                    # Unclosed blocks and brackets are reported by the parser.
+                    raise _Unsupported()
+                break
+            l = lines[i].strip(" \t\f")
+            if not l:
+                append(l)
+                i += 1
+                continue
+            line = l
+            if "\"" in l or "'" in l or "#" in l:
+                line = _line_string_re.sub("0", l)
+                hash = line.find("#")
+                if hash >= 0:
+                    line = line[:hash].rstrip(" \t\f")
+                    if not line:
+                        append("")
+                        i += 1
+                        continue
+                if "\"" in line or "'" in line:
+                    raise _Unsupported()
+            if not brackets:
+                if line[-1] == "{":
+                    m = _line_header_re.match(line)
+                    if m is not None:
+                        if line is not l:
+                            # Strings of the header are taken from the line itself.
+                            masked = _line_string_re.sub(_mask, l)
+                            hash = masked.find("#")
+                            source = _line_header_re.match((l[:hash] if hash >= 0 else l).rstrip(" \t\f"))
+                        else:
+                            source = m
+                        keyword = m["keyword"]
+                        if keyword is None:
+                            name = m["name"]
+                            if name in _keywords:
+                                raise _Unsupported()
+                            _check_header_part(m["args"])
+                            if not blocks:
+                                start = i
+                            header = ("async def " if m["async"] else "def ") + name + "(" + source["args"] + "):"
+                            kind = False
+                        elif keyword[:2] == "el":
+                            if m["close"] is not None:
+                                if not blocks or empty or not blocks[-1]:
+                                    raise _Unsupported()
+                                blocks.pop()
+                                prefix = "    " * len(blocks)
+                            elif not after_if or keyword == "elif":
+                                raise _Unsupported()
+                            if keyword == "else":
+                                if m["expr"]:
+                                    raise _Unsupported()
+                                header = "else:"
+                                kind = False
+                            else:
+                                if not m["expr"]:
+                                    raise _Unsupported()
+                                _check_header_part(m["expr"])
+                                header = "elif " + source["expr"] + ":"
+                                kind = True
+                        else:
+                            expr = m["expr"]
+                            # Python allows more than the parser in headers of `for` and `with`.
+                            if m["close"] is not None or not expr or (keyword == "for" and "*" in expr) or (keyword == "with" and expr[0] == "("):
+                                raise _Unsupported()
+                            _check_header_part(expr)
+                            if not blocks:
+                                start = i
+                            header = keyword + " " + source["expr"] + ":"
+                            kind = keyword == "if"
+                        append(prefix + header)
+                        blocks.append(kind)
+                        prefix = "    " * len(blocks)
+                        empty = True
+                        after_if = False
+                        last = "{"
+                        i += 1
+                        continue
+                elif line == "}":
+                    if not blocks or empty:
+                        raise _Unsupported()
+                    after_if = blocks.pop()
+                    prefix = "    " * len(blocks)
+                    append("")
+                    last = "}"
+                    i += 1
+                    continue
+                if _line_compound_re.match(line):
+                    raise _Unsupported()
+                if not blocks:
+                    start = i
+                after_if = False
+                if "@" in line:
+                    m = _line_import_re.match(l)
+                    if m is None:
+                        raise _Unsupported()
+                    try:
+                        name = ast.literal_eval(m[2])
+                    except (SyntaxError, ValueError):
+                        raise _Unsupported()
+                    if not isinstance(name, str) or m[1] in _keywords:
+                        raise _Unsupported()
+                    bindings.append((m[1], name, i + 1))
+                    append("")
+                    last = ")"
+                    i += 1
+                    continue
+                if _line_unsupported_re.search(line):
+                    raise _Unsupported()
+                empty = False
+                l = prefix + l
+            else:
+                if _line_unsupported_re.search(line):
+                    raise _Unsupported()
+                if "{" in brackets and _line_display_re.search(line):
+                    raise _Unsupported()
+                if brackets[-1] == "{" and (last == "{" or last == ","):
+                    m = _line_key_re.match(line)
+                    if m is not None and m[1] not in _keywords:
+                        # Bare names starting a line of a dictionary display are keys.
+                        l = "\"" + m[1] + "\"" + l[m.end(1):]
+            # Lines with balanced parentheses only are the most common, and parentheses in a wrong order fail to compile anyway.
+            if brackets or "{" in line or "}" in line or "[" in line or "]" in line or line.count("(") != line.count(")"):
+                for c in _line_bracket_re.findall(line):
+                    if c in _line_pairs:
+                        if not brackets or brackets.pop() != _line_pairs[c]:
+                            raise _Unsupported()
+                    else:
+                        brackets.append(c)
+                        if c == "{" and "lambda" in line:
+                            raise _Unsupported()
+            last = line[-1]
+            if last == ":" and not brackets:
+                raise _Unsupported()
+            append(l)
+            i += 1
+        except _Unsupported:
+            if offsets is None:
+                offsets = [0]
+                total = 0
+                for text in lines:
+                    total += len(text) + 1
+                    offsets.append(total)
+            del result[start:]
+            while bindings and bindings[-1][2] > start:
+                bindings.pop()
+            i = _parse_lines(code, lines, offsets, start, parsed, bindings)
+            result.extend([""] * (i - start))
+            blocks.clear()
+            brackets.clear()
+            prefix = ""
+            empty = False
+            after_if = False
+            last = ""
+            start = i
+    if not parsed:
+        return "\n".join(result), bindings
+    module = ast.parse("\n".join(result))
+    module.body = sorted(module.body + parsed, key=lambda node: node.lineno)
+    return module, bindings
+
+
+def _parse_lines(code: str, lines: list[str], offsets: list[int], start: int, parsed: list, bindings: list) -> int:
+    """
+    Parses top-level statements from a line up until the end of a line. Appends statements and import bindings to the lists, and returns the next line.
+    """
+    count = len(lines)
+    # Code up until the next line, which likely starts a statement, is parsed first, and the rest of it only if that fails.
+    end = start + 1
+    while end < count and not _line_statement_re.match(lines[end]):
+        end += 1
+    chunk = code[offsets[start]:offsets[end]]
+    try:
+        parser = _Parser(chunk, tokenize(chunk, start + 1))
+        body = parser.parse_line()
+    except Exception:
+        if end == count:
+            raise
+        end = count
+        chunk = code[offsets[start]:]
+        parser = _Parser(chunk, tokenize(chunk, start + 1))
+        body = parser.parse_line()
+    parsed.extend(body)
+    bindings.extend(parser.bindings)
+    tok = parser.tok
+    return end if tok[0] == "end" else tok[2] - 1
+
+
+class _Parser:
+    def __init__(self, code: str, tokens: list[tuple]):
+        self.code = code
+        self.tokens = tokens
+        self.i = 0
+        self.tok = tokens[0]
+        self.prev = tokens[0]
+        # Depth of brackets, within which new lines are insignificant.
+        self.depth = 0
+        # Whether the last parsed dictionary key was a bare name.
+        self.bare_key = False
+        self.bindings = []
+
+    # Tokens.
+
+    def advance(self) -> tuple:
+        tok = self.tok
+        self.prev = tok
+        i = self.i + 1
+        tokens = self.tokens
+        if self.depth:
+            while tokens[i][0] == "nl":
+                i += 1
+        self.i = i
+        self.tok = tokens[i]
+        return tok
+
+    def expect(self, kind: str) -> tuple:
+        if self.tok[0] != kind:
+            self.error(f"expected '{kind}'")
+        return self.advance()
+
+    def expect_name(self) -> tuple:
+        tok = self.tok
+        if tok[0] != "name" or tok[1] in _keywords:
+            self.error("expected name")
+        return self.advance()
+
+    def is_keyword(self, value: str) -> bool:
+        tok = self.tok
+        return tok[0] == "name" and tok[1] == value
+
+    def peek(self, offset: int = 1) -> tuple:
+        i = self.i + offset
+        if i < len(self.tokens):
+            return self.tokens[i]
+        return self.tokens[-1]
+
+    def open(self) -> tuple:
+        self.depth += 1
+        return self.advance()
+
+    def close(self, kind: str) -> tuple:
+        if self.tok[0] != kind:
+            self.error(f"expected '{kind}'")
+        self.depth -= 1
+        return self.advance()
+
+    def skip_newlines(self):
+        while self.tok[0] == "nl":
+            self.advance()
+
+    def error(self, message: str, tok: tuple | None = None):
+        if tok is None:
+            tok = self.tok
+        value = tok[1]
+        if tok[0] == "nl":
+            value = "new line"
+        elif tok[0] == "end":
+            value = "end of file"
+        raise Exception(f"yelets: {message}, got '{value}' at line {tok[2]}, column {tok[3] + 1}")
+
+    def finish(self, node, start):
+        """
+        Sets location of a node, starting at a token or a node, and ending at the last consumed token.
+        """
+        if isinstance(start, tuple):
+            node.lineno = start[2]
+            node.col_offset = start[3]
+        else:
+            node.lineno = start.lineno
+            node.col_offset = start.col_offset
+        prev = self.prev
+        node.end_lineno = prev[4]
+        node.end_col_offset = prev[5]
+        return node
+
+    # Statements.
+
+    def parse_module(self) -> list:
+        body = []
+        while True:
+            kind = self.tok[0]
+            if kind == "end":
+                return body
+            elif kind == "nl" or kind == ";":
+                self.advance()
+            elif kind == "}":
+                self.error("unmatched '}'")
+            else:
+                self.statement(body)
+
+    def parse_line(self) -> list:
+        """
+        Parses statements up until the end of the line, on which the last of them ends.
+        """
+        body = []
+        while True:
+            kind = self.tok[0]
+            if kind == "end":
+                return body
+            elif kind == "nl":
+                self.advance()
+                return body
+            elif kind == ";":
+                self.advance()
+            elif kind == "}":
+                self.error("unmatched '}'")
+            else:
+                self.statement(body)
+                if self.prev[0] == "nl":
+                    return body
+
+    def parse_literals(self, names: Collection[str] | None) -> dict[str, Any]:
+        result = {}
+        # Name: line of the last assignment, if it's not a literal.
+        self.computed = {}
+        while True:
+            tok = self.tok
+            kind = tok[0]
+            if kind == "end":
+                return result
+            elif kind == "nl" or kind == ";":
+                self.advance()
+                continue
+            name = tok[1]
+            if kind == "name" and name not in _keywords and (names is None or name in names) and self.peek()[0] == "=":
+                if self.peek(2)[0] != "@" and not self.function_follows():
+                    self.advance()
+                    self.advance()
+                    node = self.tuple_or_expression(self.test)
+                    try:
+                        if self.tok[0] not in _statement_ends:
+                            raise ValueError("not a single assignment")
+                        result[name] = ast.literal_eval(node)
+                        self.computed.pop(name, None)
+                    except ValueError:
+                        result.pop(name, None)
+                        self.computed[name] = tok[2]
+            self.skip_statement()
+
+    def skip_statement(self):
+        """
+        Skips tokens up until the end of the current statement, including all the blocks of it.
+        """
+        tokens = self.tokens
+        i = self.i
+        depth = 0
+        while True:
+            kind = tokens[i][0]
+            if kind in _opening_brackets:
+                depth += 1
+            elif kind in _closing_brackets:
+                depth -= 1
+                if depth < 0:
+                    self.error("unmatched bracket", tokens[i])
+            elif kind == "end":
+                break
+            elif (kind == "nl" or kind == ";") and depth == 0:
+                i += 1
+                break
+            i += 1
+        self.i = i
+        self.tok = tokens[i]
+
+    def block(self) -> list:
+        """
+        Parses statements enclosed in curly braces.
+        """
+        start = self.expect("{")
+        body = []
+        while True:
+            kind = self.tok[0]
+            if kind == "}":
+                self.advance()
+                break
+            elif kind == "nl" or kind == ";":
+                self.advance()
+            elif kind == "end":
+                self.error("unclosed block", start)
+            else:
+                self.statement(body)
+        if not body:
+            body.append(self.finish(ast.Pass(), self.prev))
+        return body
+
+    def statement(self, body: list):
+        tok = self.tok
+        if tok[0] == "name":
+            value = tok[1]
+            if value == "if":
+                body.append(self.if_statement())
+                return
+            elif value == "for":
+                body.append(self.for_statement())
+                return
+            elif value == "while":
+                body.append(self.while_statement())
+                return
+            elif value == "with":
+                body.append(self.with_statement())
+                return
+            elif value not in _keywords and self.peek()[0] == "=":
+                if self.function_follows():
+                    body.append(self.function_definition())
+                    return
+                elif self.peek(2)[0] == "@":
+                    self.import_binding()
+                    self.end_statement()
+                    return
+        while True:
+            body.append(self.simple_statement())
+            if self.tok[0] != ";":
+                break
+            self.advance()
+            if self.tok[0] in _statement_ends:
+                break
+        self.end_statement()
+
+    def end_statement(self):
+        kind = self.tok[0]
+        if kind == "nl" or kind == ";":
+            self.advance()
+        elif kind != "}" and kind != "end":
+            self.error("expected end of statement")
+
+    def if_statement(self) -> ast.If:
+        start = self.advance()
+        test = self.namedexpr()
+        body = self.block()
+        orelse = []
+        if self.else_follows():
+            self.advance()
+            if self.is_keyword("if"):
+                orelse.append(self.if_statement())
+            else:
+                orelse = self.block()
+        elif self.is_keyword("elif"):
+            orelse.append(self.if_statement())
+        return self.finish(ast.If(test=test, body=body, orelse=orelse), start)
+
+    def else_follows(self) -> bool:
+        """
+        Checks whether the next token is `else`, allowing it to be placed on the next line after a closing brace.
+        """
+        if self.is_keyword("else"):
+            return True
+        i = self.i
+        while self.tokens[i][0] == "nl":
+            i += 1
+        tok = self.tokens[i]
+        if tok[0] == "name" and tok[1] == "else":
+            self.skip_newlines()
+            return True
+        return False
+
+    def for_statement(self) -> ast.For:
+        start = self.advance()
+        target = self.target_list()
+        if not self.is_keyword("in"):
+            self.error("expected 'in'")
+        self.advance()
+        iter = self.tuple_or_expression(self.test)
+        body = self.block()
+        return self.finish(ast.For(target=target, iter=iter, body=body, orelse=[], type_comment=None), start)
+
+    def while_statement(self) -> ast.While:
+        start = self.advance()
+        test = self.namedexpr()
+        body = self.block()
+        return self.finish(ast.While(test=test, body=body, orelse=[]), start)
+
+    def with_statement(self) -> ast.With:
+        start = self.advance()
+        items = []
+        while True:
+            context_expr = self.test()
+            optional_vars = None
+            if self.is_keyword("as"):
+                self.advance()
+                optional_vars = self.to_store(self.bitor())
+            items.append(ast.withitem(context_expr=context_expr, optional_vars=optional_vars))
+            if self.tok[0] != ",":
+                break
+            self.advance()
+        body = self.block()
+        return self.finish(ast.With(items=items, body=body, type_comment=None), start)
+
+    def function_follows(self) -> bool:
+        """
+        Checks whether the current name is assigned a function, `name = fn` or `name = async fn`.
+        """
+        after = self.peek(2)
+        if after[0] != "name":
+            return False
+        if after[1] == "async":
+            after = self.peek(3)
+            return after[0] == "name" and after[1] == "fn"
+        return after[1] == "fn"
+
+    def function_definition(self) -> ast.FunctionDef | ast.AsyncFunctionDef:
+        start = self.advance()
+        self.advance()
+        is_async = self.is_keyword("async")
+        if is_async:
+            self.advance()
+        self.advance()
+        self.open_expect("(")
+        args = self.arguments(")")
+        self.close(")")
+        body = self.block()
+        node_type = ast.AsyncFunctionDef if is_async else ast.FunctionDef
+        return self.finish(node_type(name=start[1], args=args, body=body, decorator_list=[], returns=None, type_comment=None, **_function_extra), start)
+
+    def import_binding(self):
+        # For now, imports act as global namespace update, even if they are executed locally.
+        start = self.advance()
+        self.advance()
+        self.advance()
+        if not self.is_keyword("import"):
+            self.error("expected 'import'")
+        self.advance()
+        self.open_expect("(")
+        tok = self.expect("string")
+        self.close(")")
+        name = ast.literal_eval(tok[1])
+        if not isinstance(name, str):
+            self.error("expected import name", tok)
+        self.bindings.append((start[1], name, start[2]))
+
+    def open_expect(self, kind: str):
+        if self.tok[0] != kind:
+            self.error(f"expected '{kind}'")
+        self.open()
+
+    def simple_statement(self):
+        tok = self.tok
+        if tok[0] == "name":
+            value = tok[1]
+            if value == "pass":
+                self.advance()
+                return self.finish(ast.Pass(), tok)
+            elif value == "break":
+                self.advance()
+                return self.finish(ast.Break(), tok)
+            elif value == "continue":
+                self.advance()
+                return self.finish(ast.Continue(), tok)
+            elif value == "return":
+                self.advance()
+                result = None
+                if self.tok[0] not in _statement_ends:
+                    result = self.tuple_or_expression(self.star_or_test)
+                return self.finish(ast.Return(value=result), tok)
+            elif value == "del":
+                self.advance()
+                targets = []
+                while True:
+                    targets.append(self.to_store(self.bitor(), _del))
+                    if self.tok[0] != ",":
+                        break
+                    self.advance()
+                return self.finish(ast.Delete(targets=targets), tok)
+            elif value == "assert":
+                self.advance()
+                test = self.test()
+                msg = None
+                if self.tok[0] == ",":
+                    self.advance()
+                    msg = self.test()
+                return self.finish(ast.Assert(test=test, msg=msg), tok)
+            elif value == "raise":
+                self.advance()
+                exc = None
+                cause = None
+                if self.tok[0] not in _statement_ends:
+                    exc = self.test()
+                    if self.is_keyword("from"):
+                        self.advance()
+                        cause = self.test()
+                return self.finish(ast.Raise(exc=exc, cause=cause), tok)
+            elif value == "global" or value == "nonlocal":
+                self.advance()
+                names = [self.expect_name()[1]]
+                while self.tok[0] == ",":
+                    self.advance()
+                    names.append(self.expect_name()[1])
+                node = ast.Global(names=names) if value == "global" else ast.Nonlocal(names=names)
+                return self.finish(node, tok)
+            elif value == "import":
+                self.advance()
+                names = [self.alias(True)]
+                while self.tok[0] == ",":
+                    self.advance()
+                    names.append(self.alias(True))
+                return self.finish(ast.Import(names=names), tok)
+            elif value == "from":
+                return self.import_from()
+            elif value == "yield":
+                return self.finish(ast.Expr(value=self.yield_expression()), tok)
+            elif value in ("else", "elif", "fn"):
+                self.error("unexpected keyword")
+        return self.expression_statement()
+
+    def alias(self, dotted: bool) -> ast.alias:
+        start = self.tok
+        name = self.expect_name()[1]
+        if dotted:
+            while self.tok[0] == ".":
+                self.advance()
+                name += "." + self.expect_name()[1]
+        asname = None
+        if self.is_keyword("as"):
+            self.advance()
+            asname = self.expect_name()[1]
+        return self.finish(ast.alias(name=name, asname=asname), start)
+
+    def import_from(self) -> ast.ImportFrom:
+        start = self.advance()
+        level = 0
+        while self.tok[0] in (".", "..."):
+            level += len(self.advance()[1])
+        module = None
+        if not self.is_keyword("import"):
+            module = self.expect_name()[1]
+            while self.tok[0] == ".":
+                self.advance()
+                module += "." + self.expect_name()[1]
+        if not self.is_keyword("import"):
+            self.error("expected 'import'")
+        self.advance()
+        if self.tok[0] == "*":
+            star = self.advance()
+            names = [self.finish(ast.alias(name="*", asname=None), star)]
+        else:
+            parenthesized = self.tok[0] == "("
+            if parenthesized:
+                self.open()
+            names = [self.alias(False)]
+            while self.tok[0] == ",":
+                self.advance()
+                if parenthesized and self.tok[0] == ")":
+                    break
+                names.append(self.alias(False))
+            if parenthesized:
+                self.close(")")
+        return self.finish(ast.ImportFrom(module=module, names=names, level=level), start)
+
+    def expression_statement(self):
+        start = self.tok
+        first = self.tuple_or_expression(self.star_or_test)
+        kind = self.tok[0]
+        if kind == "=":
+            targets = [self.to_store(first)]
+            self.advance()
+            value = self.assigned_value()
+            while self.tok[0] == "=":
+                targets.append(self.to_store(value))
+                self.advance()
+                value = self.assigned_value()
+            return self.finish(ast.Assign(targets=targets, value=value, type_comment=None), start)
+        elif kind in _augassign_ops:
+            if not isinstance(first, (ast.Name, ast.Attribute, ast.Subscript)):
+                self.error("illegal target for augmented assignment", start)
+            self.to_store(first)
+            self.advance()
+            value = self.yield_expression() if self.is_keyword("yield") else self.tuple_or_expression(self.test)
+            return self.finish(ast.AugAssign(target=first, op=_augassign_ops[kind](), value=value), start)
+        elif kind == ":":
+            if not isinstance(first, (ast.Name, ast.Attribute, ast.Subscript)):
+                self.error("illegal target for annotation", start)
+            self.to_store(first)
+            self.advance()
+            annotation = self.test()
+            value = None
+            if self.tok[0] == "=":
+                self.advance()
+                value = self.assigned_value()
+            return self.finish(ast.AnnAssign(target=first, annotation=annotation, value=value, simple=int(isinstance(first, ast.Name))), start)
+        return self.finish(ast.Expr(value=first), start)
+
+    def assigned_value(self):
+        if self.is_keyword("yield"):
+            return self.yield_expression()
+        return self.tuple_or_expression(self.star_or_test)
+
+    def yield_expression(self) -> ast.Yield | ast.YieldFrom:
+        start = self.advance()
+        if self.is_keyword("from"):
+            self.advance()
+            return self.finish(ast.YieldFrom(value=self.test()), start)
+        value = None
+        if self.tok[0] not in _statement_ends and self.tok[0] != ")":
+            value = self.tuple_or_expression(self.star_or_test)
+        return self.finish(ast.Yield(value=value), start)
+
+    def to_store(self, node, ctx=_store):
+        """
+        Converts an expression to an assignment target.
+        """
+        if isinstance(node, (ast.Name, ast.Attribute, ast.Subscript)):
+            node.ctx = ctx
+        elif isinstance(node, (ast.Tuple, ast.List)) and ctx is _store:
+            node.ctx = ctx
+            for elt in node.elts:
+                self.to_store(elt, ctx)
+        elif isinstance(node, ast.Starred) and ctx is _store:
+            node.ctx = ctx
+            self.to_store(node.value, ctx)
+        else:
+            raise Exception(f"yelets: cannot assign to {type(node).__name__.lower()} at line {node.lineno}, column {node.col_offset + 1}")
+        return node
+
+    def target_list(self):
+        return self.to_store(self.tuple_or_expression(self.star_or_bitor))
+
+    # Expressions.
+
+    def tuple_or_expression(self, element):
+        """
+        Parses comma-separated elements, which form a tuple if there is more than one element or a trailing comma.
+        """
+        first = element()
+        if self.tok[0] != ",":
+            return first
+        elts = [first]
+        while self.tok[0] == ",":
+            self.advance()
+            kind = self.tok[0]
+            if kind in _statement_ends or kind in ("=", ")", "{") or kind in _augassign_ops or self.is_keyword("in"):
+                break
+            elts.append(element())
+        return self.finish(ast.Tuple(elts=elts, ctx=_load), first)
+
+    def star_or_test(self):
+        if self.tok[0] == "*":
+            start = self.advance()
+            return self.finish(ast.Starred(value=self.bitor(), ctx=_load), start)
+        return self.test()
+
+    def star_or_bitor(self):
+        if self.tok[0] == "*":
+            start = self.advance()
+            return self.finish(ast.Starred(value=self.bitor(), ctx=_load), start)
+        return self.bitor()
+
+    def star_or_namedexpr(self):
+        if self.tok[0] == "*":
+            start = self.advance()
+            return self.finish(ast.Starred(value=self.bitor(), ctx=_load), start)
+        return self.namedexpr()
+
+    def namedexpr(self):
+        node = self.test()
+        if self.tok[0] == ":=":
+            if not isinstance(node, ast.Name):
+                self.error("cannot use assignment expression with non-name")
+            self.advance()
+            node.ctx = _store
+            value = self.test()
+            return self.finish(ast.NamedExpr(target=node, value=value), node)
+        return node
+
+    def test(self):
+        tok = self.tok
+        kind = tok[0]
+        # Fast path for lone literals and names, which are the most of data displays.
+        if kind == "string" or kind == "number" or (kind == "name" and (tok[1] not in _keywords or tok[1] in _constants)):
+            after = self.tokens[self.i + 1][0]
+            if after in _atom_ends or (after == "nl" and not self.depth):
+                return self.atom()
+        elif kind == "name" and tok[1] == "lambda":
+            return self.lambda_expression()
+        node = self.or_test()
+        if self.is_keyword("if"):
+            self.advance()
+            test = self.or_test()
+            if not self.is_keyword("else"):
+                self.error("expected 'else'")
+            self.advance()
+            orelse = self.test()
+            return self.finish(ast.IfExp(test=test, body=node, orelse=orelse), node)
+        return node
+
+    def test_no_conditional(self):
+        if self.is_keyword("lambda"):
+            return self.lambda_expression()
+        return self.or_test()
+
+    def lambda_expression(self):
+        start = self.advance()
+        args = self.arguments(":", annotations=False)
+        self.expect(":")
+        body = self.test()
+        return self.finish(ast.Lambda(args=args, body=body), start)
+
+    def or_test(self):
+        node = self.and_test()
+        if not self.is_keyword("or"):
+            return node
+        values = [node]
+        while self.is_keyword("or"):
+            self.advance()
+            values.append(self.and_test())
+        return self.finish(ast.BoolOp(op=ast.Or(), values=values), node)
+
+    def and_test(self):
+        node = self.not_test()
+        if not self.is_keyword("and"):
+            return node
+        values = [node]
+        while self.is_keyword("and"):
+            self.advance()
+            values.append(self.not_test())
+        return self.finish(ast.BoolOp(op=ast.And(), values=values), node)
+
+    def not_test(self):
+        tok = self.tok
+        if tok[0] == "name" and tok[1] == "not":
+            self.advance()
+            operand = self.not_test()
+            return self.finish(ast.UnaryOp(op=ast.Not(), operand=operand), tok)
+        return self.comparison()
+
+    def comparison(self):
+        node = self.bitor()
+        ops = None
+        comparators = None
+        while True:
+            tok = self.tok
+            kind = tok[0]
+            if kind in _compare_ops:
+                op = _compare_ops[kind]()
+                self.advance()
+            elif kind == "name" and tok[1] == "in":
+                op = ast.In()
+                self.advance()
+            elif kind == "name" and tok[1] == "is":
+                self.advance()
+                if self.is_keyword("not"):
+                    self.advance()
+                    op = ast.IsNot()
+                else:
+                    op = ast.Is()
+            elif kind == "name" and tok[1] == "not" and self.peek()[0] == "name" and self.peek()[1] == "in":
+                self.advance()
+                self.advance()
+                op = ast.NotIn()
+            else:
+                break
+            if ops is None:
+                ops = []
+                comparators = []
+            ops.append(op)
+            comparators.append(self.bitor())
+        if ops is None:
+            return node
+        return self.finish(ast.Compare(left=node, ops=ops, comparators=comparators), node)
+
+    def bitor(self):
+        return self.binary(1)
+
+    def binary(self, min_precedence: int):
+        node = self.factor()
+        while True:
+            entry = _binary_ops.get(self.tok[0])
+            if entry is None or entry[0] < min_precedence:
+                return node
+            self.advance()
+            right = self.binary(entry[0] + 1)
+            node = self.finish(ast.BinOp(left=node, op=entry[1](), right=right), node)
+
+    def factor(self):
+        tok = self.tok
+        op = _unary_ops.get(tok[0])
+        if op is not None:
+            self.advance()
+            operand = self.factor()
+            return self.finish(ast.UnaryOp(op=op(), operand=operand), tok)
+        return self.power()
+
+    def power(self):
+        tok = self.tok
+        if tok[0] == "name" and tok[1] == "await":
+            self.advance()
+            node = self.finish(ast.Await(value=self.primary()), tok)
+        else:
+            node = self.primary()
+        if self.tok[0] == "**":
+            self.advance()
+            right = self.factor()
+            return self.finish(ast.BinOp(left=node, op=ast.Pow(), right=right), node)
+        return node
+
+    def primary(self):
+        node = self.atom()
+        while True:
+            kind = self.tok[0]
+            if kind == ".":
+                self.advance()
+                attr = self.expect_name()[1]
+                node = self.finish(ast.Attribute(value=node, attr=attr, ctx=_load), node)
+            elif kind == "(":
+                self.open()
+                args, keywords = self.call_arguments()
+                self.close(")")
+                node = self.finish(ast.Call(func=node, args=args, keywords=keywords), node)
+            elif kind == "[":
+                self.open()
+                index = self.subscript_list()
+                self.close("]")
+                node = self.finish(ast.Subscript(value=node, slice=index, ctx=_load), node)
+            else:
+                return node
+
+    def atom(self):
+        tok = self.tok
+        kind = tok[0]
+        if kind == "name":
+            value = tok[1]
+            if value in _keywords:
+                if value in _constants:
+                    self.advance()
+                    return ast.Constant(value=_constants[value], lineno=tok[2], col_offset=tok[3], end_lineno=tok[4], end_col_offset=tok[5])
+                self.error("unexpected keyword")
+            self.advance()
+            return ast.Name(id=value, ctx=_load, lineno=tok[2], col_offset=tok[3], end_lineno=tok[4], end_col_offset=tok[5])
+        elif kind == "string":
+            return self.strings()
+        elif kind == "number":
+            self.advance()
+            return ast.Constant(value=self.number(tok), lineno=tok[2], col_offset=tok[3], end_lineno=tok[4], end_col_offset=tok[5])
+        elif kind == "(":
+            return self.parenthesized()
+        elif kind == "[":
+            return self.list_display()
+        elif kind == "{":
+            return self.dict_or_set_display()
+        elif kind == "...":
+            self.advance()
+            return ast.Constant(value=Ellipsis, lineno=tok[2], col_offset=tok[3], end_lineno=tok[4], end_col_offset=tok[5])
+        self.error("unexpected token")
+
+    def number(self, tok: tuple):
+        text = tok[1]
+        try:
+            if text.isdigit():
+                return int(text)
+            last = text[-1]
+            if last == "j" or last == "J":
+                return complex(text.replace("_", ""))
+            if text[:2].lower() not in ("0x", "0o", "0b") and ("." in text or "e" in text or "E" in text):
+                return float(text)
+            return int(text, 0)
+        except ValueError:
+            self.error("invalid number", tok)
+
+    def strings(self):
+        start = self.advance()
+        if self.tok[0] != "string":
+            text = start[1]
+            first = text[0]
+            # Fast path for a plain single-quoted string.
+            if (first == "\"" or first == "'") and "\\" not in text and text[1:2] != first:
+                return ast.Constant(value=text[1:-1], lineno=start[2], col_offset=start[3], end_lineno=start[4], end_col_offset=start[5])
+        tokens = [start]
+        while self.tok[0] == "string":
+            tokens.append(self.advance())
+        for tok in tokens:
+            text = tok[1]
+            if text[0] != "\"" and text[0] != "'" and "f" in text[:2].lower():
+                return self.formatted_strings(tokens)
+        value = self.string_value(tokens[0])
+        for tok in tokens[1:]:
+            other = self.string_value(tok)
+            if type(other) is not type(value):
+                self.error("cannot mix bytes and nonbytes literals", tok)
+            value += other
+        return self.finish(ast.Constant(value=value), start)
+
+    def string_value(self, tok: tuple):
+        text = tok[1]
+        first = text[0]
+        if (first == "\"" or first == "'") and "\\" not in text:
+            if text.startswith(first * 3) and len(text) >= 6:
+                return text[3:-3]
+            return text[1:-1]
+        try:
+            return ast.literal_eval(text)
+        except (SyntaxError, ValueError) as e:
+            self.error(f"invalid string literal ({e})", tok)
+
+    def formatted_strings(self, tokens: list[tuple]):
+        # Formatted strings contain expressions of their own - let Python parse them, and relocate results to their real position.
+        first = tokens[0]
+        last = tokens[-1]
+        try:
+            node = ast.parse("(" + self.code[first[6]:last[6] + len(last[1])] + ")", mode="eval").body
+        except SyntaxError as e:
+            self.error(f"invalid formatted string ({e.msg})", first)
+        for child in ast.walk(node):
+            if "lineno" in child._attributes:
+                if child.lineno == 1:
+                    child.col_offset += first[3] - 1
+                if getattr(child, "end_lineno", None) == 1:
+                    child.end_col_offset += first[3] - 1
+                child.lineno += first[2] - 1
+                if getattr(child, "end_lineno", None) is not None:
+                    child.end_lineno += first[2] - 1
+        return node
+
+    def parenthesized(self):
+        start = self.open()
+        if self.tok[0] == ")":
+            self.close(")")
+            return self.finish(ast.Tuple(elts=[], ctx=_load), start)
+        if self.is_keyword("yield"):
+            node = self.yield_expression()
+            self.close(")")
+            return node
+        first = self.star_or_namedexpr()
+        if self.is_keyword("for") or self.is_keyword("async"):
+            generators = self.comprehension()
+            self.close(")")
+            return self.finish(ast.GeneratorExp(elt=first, generators=generators), start)
+        if self.tok[0] == ")":
+            self.close(")")
+            # Parentheses do not make a node, but in Python they are included into the location of a tuple.
+            if isinstance(first, ast.Tuple):
+                self.finish(first, start)
+            return first
+        elts = [first]
+        while self.tok[0] == ",":
+            self.advance()
+            if self.tok[0] == ")":
+                break
+            elts.append(self.star_or_namedexpr())
+        self.close(")")
+        return self.finish(ast.Tuple(elts=elts, ctx=_load), start)
+
+    def list_display(self):
+        start = self.open()
+        if self.tok[0] == "]":
+            self.close("]")
+            return self.finish(ast.List(elts=[], ctx=_load), start)
+        first = self.star_or_namedexpr()
+        if self.is_keyword("for") or self.is_keyword("async"):
+            generators = self.comprehension()
+            self.close("]")
+            return self.finish(ast.ListComp(elt=first, generators=generators), start)
+        elts = [first]
+        while self.tok[0] == ",":
+            self.advance()
+            if self.tok[0] == "]":
+                break
+            elts.append(self.star_or_namedexpr())
+        self.close("]")
+        return self.finish(ast.List(elts=elts, ctx=_load), start)
+
+    def dict_key(self):
+        tok = self.tok
+        # Bare names starting a line are keys by themselves, elsewhere they are expressions, like in Python.
+        if tok[0] == "name" and tok[1] not in _keywords and self.prev[4] < tok[2] and self.peek()[0] == ":":
+            self.advance()
+            self.bare_key = True
+            return ast.Constant(value=tok[1], lineno=tok[2], col_offset=tok[3], end_lineno=tok[4], end_col_offset=tok[5])
+        self.bare_key = False
+        return self.test()
+
+    def dict_or_set_display(self):
+        start = self.open()
+        kind = self.tok[0]
+        if kind == "}":
+            self.close("}")
+            return self.finish(ast.Dict(keys=[], values=[]), start)
+        if kind == "*":
+            return self.set_display(start, self.star_or_test())
+        if kind == "**":
+            self.advance()
+            key = None
+            value = self.bitor()
+        else:
+            key = self.dict_key()
+            if self.tok[0] != ":":
+                return self.set_display(start, key)
+            self.advance()
+            value = self.test()
+            if self.is_keyword("for") or self.is_keyword("async"):
+                # Keys of comprehensions are always expressions.
+                if self.bare_key:
+                    key = ast.Name(id=key.value, ctx=_load, lineno=key.lineno, col_offset=key.col_offset, end_lineno=key.end_lineno, end_col_offset=key.end_col_offset)
+                generators = self.comprehension()
+                self.close("}")
+                return self.finish(ast.DictComp(key=key, value=value, generators=generators), start)
+        keys = [key]
+        values = [value]
+        while self.tok[0] == ",":
+            self.advance()
+            kind = self.tok[0]
+            if kind == "}":
+                break
+            elif kind == "**":
+                self.advance()
+                keys.append(None)
+                values.append(self.bitor())
+            else:
+                keys.append(self.dict_key())
+                self.expect(":")
+                values.append(self.test())
+        self.close("}")
+        return self.finish(ast.Dict(keys=keys, values=values), start)
+
+    def set_display(self, start: tuple, first):
+        if self.is_keyword("for") or self.is_keyword("async"):
+            generators = self.comprehension()
+            self.close("}")
+            return self.finish(ast.SetComp(elt=first, generators=generators), start)
+        elts = [first]
+        while self.tok[0] == ",":
+            self.advance()
+            if self.tok[0] == "}":
+                break
+            elts.append(self.star_or_test())
+        self.close("}")
+        return self.finish(ast.Set(elts=elts), start)
+
+    def comprehension(self) -> list[ast.comprehension]:
+        generators = []
+        while True:
+            is_async = 0
+            if self.is_keyword("async"):
+                self.advance()
+                is_async = 1
+            if not self.is_keyword("for"):
+                break
+            self.advance()
+            target = self.target_list()
+            if not self.is_keyword("in"):
+                self.error("expected 'in'")
+            self.advance()
+            iter = self.or_test()
+            ifs = []
+            while self.is_keyword("if"):
+                self.advance()
+                ifs.append(self.test_no_conditional())
+            generators.append(ast.comprehension(target=target, iter=iter, ifs=ifs, is_async=is_async))
+        return generators
+
+    def subscript_list(self):
+        start = self.tok
+        first = self.subscript()
+        if self.tok[0] != ",":
+            return first
+        elts = [first]
+        while self.tok[0] == ",":
+            self.advance()
+            if self.tok[0] == "]":
+                break
+            elts.append(self.subscript())
+        return self.finish(ast.Tuple(elts=elts, ctx=_load), start)
+
+    def subscript(self):
+        start = self.tok
+        lower = None
+        if self.tok[0] != ":":
+            lower = self.star_or_namedexpr()
+            if self.tok[0] != ":":
+                return lower
+        self.advance()
+        upper = None
+        step = None
+        if self.tok[0] not in (":", ",", "]"):
+            upper = self.test()
+        if self.tok[0] == ":":
+            self.advance()
+            if self.tok[0] not in (",", "]"):
+                step = self.test()
+        return self.finish(ast.Slice(lower=lower, upper=upper, step=step), start)
+
+    def call_arguments(self) -> tuple[list, list]:
+        args = []
+        keywords = []
+        while self.tok[0] != ")":
+            tok = self.tok
+            kind = tok[0]
+            if kind == "*":
+                self.advance()
+                args.append(self.finish(ast.Starred(value=self.test(), ctx=_load), tok))
+            elif kind == "**":
+                self.advance()
+                keywords.append(self.finish(ast.keyword(arg=None, value=self.test()), tok))
+            elif kind == "name" and self.peek()[0] == "=" and tok[1] not in _keywords:
+                self.advance()
+                self.advance()
+                keywords.append(self.finish(ast.keyword(arg=tok[1], value=self.test()), tok))
+            else:
+                arg = self.namedexpr()
+                if self.is_keyword("for") or self.is_keyword("async"):
+                    generators = self.comprehension()
+                    arg = self.finish(ast.GeneratorExp(elt=arg, generators=generators), arg)
+                args.append(arg)
+            if self.tok[0] != ",":
+                break
+            self.advance()
+        return args, keywords
+
+    def arguments(self, end: str, annotations: bool = True) -> ast.arguments:
+        """
+        Parses parameters of a function or a lambda, up until `end` token.
+        """
+        posonlyargs = []
+        args = []
+        defaults = []
+        vararg = None
+        kwonlyargs = []
+        kw_defaults = []
+        kwarg = None
+        keyword_only = False
+        while self.tok[0] != end:
+            kind = self.tok[0]
+            if kind == "/":
+                if posonlyargs or not args or keyword_only:
+                    self.error("invalid '/' position")
+                self.advance()
+                posonlyargs = args
+                args = []
+            elif kind == "*":
+                if keyword_only:
+                    self.error("duplicate '*'")
+                self.advance()
+                keyword_only = True
+                if self.tok[0] == "name":
+                    vararg = self.parameter(annotations)
+            elif kind == "**":
+                self.advance()
+                kwarg = self.parameter(annotations)
+                if self.tok[0] == ",":
+                    self.advance()
+                break
+            else:
+                arg = self.parameter(annotations)
+                default = None
+                if self.tok[0] == "=":
+                    self.advance()
+                    default = self.test()
+                if keyword_only:
+                    kwonlyargs.append(arg)
+                    kw_defaults.append(default)
+                else:
+                    if default is None and defaults:
+                        self.error("parameter without a default follows parameter with a default")
+                    args.append(arg)
+                    if default is not None:
+                        defaults.append(default)
+            if self.tok[0] != ",":
+                break
+            self.advance()
+        return ast.arguments(posonlyargs=posonlyargs, args=args, vararg=vararg, kwonlyargs=kwonlyargs, kw_defaults=kw_defaults, kwarg=kwarg, defaults=defaults)
+
+    def parameter(self, annotations: bool) -> ast.arg:
+        tok = self.expect_name()
+        annotation = None
+        if annotations and self.tok[0] == ":":
+            self.advance()
+            annotation = self.test()
+        return self.finish(ast.arg(arg=tok[1], annotation=annotation, type_comment=None), tok)
@@ -1,19 +1,29 @@
+import compileall
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
 import json
+import math
 from os import PathLike
 import os
 from pathlib import Path
-import re
-import shutil
+import py_compile
 import subprocess
-from typing import TYPE_CHECKING, Callable
+import threading
+from typing import TYPE_CHECKING, Any, Callable
 
 import colorama
 import httpx
 
+import archive
 import byteop
 import call
 from error import CodeError
+import location
 import xtime
+from yelets_project import codesheet, filecopy, tree
+from yelets_project.sync import BuildSync
+from yelets_project.tree import ProjectTree
 
 if TYPE_CHECKING:
     from model import Project
@@ -26,8 +36,16 @@ _indentation: str
 _target_version: str
 _target_debug: bool
 _project_codes: list[str] | None
-_codename_rules: str
 _build_dir: Path
+_sync: BuildSync
+_reproducible_timestamp: bool
+_tree: ProjectTree
+_imports: dict
+# HTTP clients, shared by all hosts. Keyed by scheme, host, port and HTTP/2 usage.
+_clients: dict[tuple[str, str, int | None, bool], httpx.Client] = {}
+_clients_lock = threading.Lock()
+# Used only by coroutines, in the event loop of the project function.
+_async_clients: dict[tuple[str, str, int | None, bool], httpx.AsyncClient] = {}
 
 
 def get_cwd() -> Path:
@@ -38,6 +56,17 @@ def get_project() -> "Project":
     return _project
 
 
+def get_response() -> Callable:
+    return _response
+
+
+def get_imports() -> dict:
+    """
+    Returns the `project` import of the current project.
+    """
+    return _imports
+
+
 def init(*, response: Callable, project: "Project", cwd: Path, indentation: str, target_version: str, target_debug: bool):
     global _response
     global _project
@@ -46,27 +75,25 @@ def init(*, response: Callable, project: "Project", cwd: Path, indentation: str,
     global _target_version
     global _target_debug
     global _project_codes
-    global _codename_rules
     global _build_dir
+    global _sync
+    global _reproducible_timestamp
+    global _tree
+    global _imports
 
     _response = response
     _project = project
     _project_codes = None
     _cwd = cwd
-    _codename_rules = """{ind}1. alphanumeric
-{ind}2. lower case
-{ind}3. separated by underscores
-{ind}4. not starting with an underscore
-{ind}5. not ending with an underscore
-{ind}6. not starting with a digit"""
     _indentation = indentation
     _target_debug = target_debug
     _build_dir = Path(project.source, ".build")
-
-    # We recreate whole build dir - noone else should occupy it if we're about to use project utilities at full capacity.
-    if _build_dir.exists():
-        shutil.rmtree(_build_dir)
-    _build_dir.mkdir(parents=True, exist_ok=True)
+    # Build dir is prepared by the first build primitive, so functions which don't build anything never touch it.
+    manifest_name = hashlib.sha256(str(_build_dir.resolve()).encode()).hexdigest()
+    _sync = BuildSync(_build_dir, location.user(Path("cache", "build", f"{manifest_name}.json")))
+    # Tree is scanned on demand, and the scan is shared by all build primitives.
+    _tree = ProjectTree(project.source)
+    _reproducible_timestamp = False
 
     # Setup version.
     major, minor, patch = target_version.removeprefix("v").split(".")
@@ -77,102 +104,242 @@ def init(*, response: Callable, project: "Project", cwd: Path, indentation: str,
         raise Exception("Wrong version setup. Expected 'major.minor.patch' format.")
     _target_version = f"{major}.{minor}.{patch}"
 
-    return {
+    _imports = {
         "info": info,
         "code": code,
         "includePython": includePython,
+        "compilePython": compilePython,
         "include": include,
+        "clean": clean,
+        "setIncremental": setIncremental,
+        "setIncludeStrategy": setIncludeStrategy,
+        "setIncludeWorkers": setIncludeWorkers,
+        "setReproducibleTimestamp": setReproducibleTimestamp,
         "Host": Host,
+        "HostGroup": HostGroup,
         "project": _project,
         "cwd": _cwd,
         "target_version": _target_version,
         "target_debug": target_debug,
         "build_dir": _build_dir,
     }
+    return _imports
+
+
+def _prepare_build_dir():
+    _sync.prepare()
+
+
+def finish(failed: bool = False):
+    """
+    Finishes the build, made by a project function, and closes connections to hosts.
+    """
+    _close_clients()
+    if not _sync.prepared:
+        return
+    _sync.finish(failed)
+    message = f"Build: {_sync.files_written} file(s) written ({byteop.format_size(_sync.bytes_written)})"
+    if _sync.files_linked:
+        message += f", {_sync.files_linked} linked"
+    message += f", {_sync.files_unchanged} unchanged, {_sync.files_removed} removed."
+    if _sync.outputs_written or _sync.outputs_unchanged:
+        message += f" Generated: {_sync.outputs_written} written, {_sync.outputs_unchanged} unchanged."
+    _response(message)
+    for strategy, count in _sync.fallbacks.items():
+        _response(f"Include strategy '{strategy}' is not supported for {count} file(s), they were copied instead.")
+
+
+async def afinish(failed: bool = False):
+    """
+    Closes connections of coroutines, and finishes the build like `finish`.
+    """
+    for client in _async_clients.values():
+        await client.aclose()
+    _async_clients.clear()
+    finish(failed)
 
 
-def code(target: PathLike):
+def _client_key(url: str, http2: bool) -> tuple[str, str, int | None, bool]:
+    parsed = httpx.URL(url)
+    if http2:
+        try:
+            import h2
+        except ImportError:
+            raise Exception("HTTP/2 requires 'h2' package, install it with 'pip install httpx[http2]'.")
+    return parsed.scheme, parsed.host, parsed.port, http2
+
+
+def _client(url: str, http2: bool) -> httpx.Client:
+    """
+    Returns a keep-alive client for an URL, shared by all hosts with the same host and port until the project function finishes.
+    """
+    key = _client_key(url, http2)
+    # Hosts of a group make requests from several threads.
+    with _clients_lock:
+        client = _clients.get(key, None)
+        if client is None:
+            # Plain HTTP has no negotiation, so HTTP/2 is used with prior knowledge.
+            client = httpx.Client(http2=http2, http1=not (http2 and key[0] == "http"))
+            _clients[key] = client
+        return client
+
+
+def _async_client(url: str, http2: bool) -> httpx.AsyncClient:
+    """
+    Returns a keep-alive client for an URL like `_client`, for coroutines.
+    """
+    key = _client_key(url, http2)
+    client = _async_clients.get(key, None)
+    if client is None:
+        client = httpx.AsyncClient(http2=http2, http1=not (http2 and key[0] == "http"))
+        _async_clients[key] = client
+    return client
+
+
+def _close_clients():
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+def clean():
+    """
+    Removes the build directory. It will be created again by the next build primitive.
+    """
+    _response(f"Clean build directory '{_build_dir}'.")
+    _sync.clean()
+
+
+def setIncremental(enabled: bool = True):
     """
-    Build a codesheet, writing to given `target`.
+    Keeps the build directory between builds, and copies only changed files into it.
 
-    Built codesheet includes a programming-language-specific compile-time (or boot-time) constant definitions, and a dictionary-like definition, where the keys are codes, and the values are codenames.
+    Must be set before the first build primitive.
     """
+    if _sync.prepared:
+        raise Exception("Incremental mode must be set before the build directory is used.")
+    _sync.incremental = enabled
+
+
+def setIncludeStrategy(strategy: str):
+    """
+    Sets default strategy of putting files into the build directory: `copy`, `reflink`, `hardlink` or `symlink`.
+
+    Unsupported strategies fall back to `copy`.
+    """
+    filecopy.validate_strategy(strategy)
+    _sync.strategy = strategy
+
+
+def setIncludeWorkers(workers: int):
+    """
+    Sets number of threads, copying files of included directories. By default it's based on the number of CPUs, `1` disables parallel copying.
+    """
+    if not isinstance(workers, int) or workers < 1:
+        raise Exception(f"Include workers must be a positive integer, got '{workers}'.")
+    _sync.workers = workers
+
+
+def setReproducibleTimestamp(enabled: bool = True):
+    """
+    Makes build info use the time of the last commit instead of the current time, so repeated builds of the same commit produce the same files.
+
+    `SOURCE_DATE_EPOCH` environment variable, if set, is used in any case.
+    """
+    global _reproducible_timestamp
+    _reproducible_timestamp = enabled
+
+
+def _build_timestamp() -> int:
+    source_date_epoch = os.environ.get("SOURCE_DATE_EPOCH", None)
+    if source_date_epoch:
+        try:
+            return int(source_date_epoch)
+        except ValueError:
+            raise Exception(f"SOURCE_DATE_EPOCH must be an integer, got '{source_date_epoch}'.")
+    if _reproducible_timestamp:
+        stdout, stderr, retcode = call.call(["git", "log", "-1", "--format=%ct"], dir=_project.source)
+        if retcode != 0 or not stdout.strip():
+            raise Exception(f"Cannot get time of the last commit of '{_project.source}' for a reproducible timestamp: {stderr.strip()}")
+        return int(stdout.strip())
+    return xtime.timestamp()
+
+
+def code(*targets: PathLike):
+    """
+    Build a codesheet, writing to given `targets`.
+
+    Built codesheet includes a programming-language-specific compile-time (or boot-time) constant definitions, and a dictionary-like definition, where the keys are codes, and the values are codenames. Supported extensions are `py`, `js`, `ts`, `h`, `go`, `rs` and `json`.
+    """
+    _prepare_build_dir()
     global _project_codes
     if _project_codes is None:
-        _project_codes = []
         # note that we always search `code.txt` under the current working directory...
         code_path = Path(_cwd, "code.txt")
         # ... or under the parent
         if not code_path.exists():
             code_path = Path(_cwd, "../code.txt")
+        _project_codes = codesheet.read(code_path, _indentation) if code_path.exists() else []
 
-        if code_path.exists():
-            with code_path.open("r") as file:
-                lines = file.readlines()
-                for line in lines:
-                    line = line.strip().lower()
-                    # Codes must be parsed strictly. We want our `codes.txt` file to look clean.
-                    # We add even empty lines - codes must be correctly enumerated. Later empty lines will be replaced by empty lines during code-file generation.
-                    if line:
-                        if line in ["ok", "codenames"]:
-                            raise Exception(f"Cannot use reserved codename '{line}'.")
-                        if not re.match(r"^(?![0-9])(?<!_)([a-z0-9]+(?:_[a-z0-9]+)*)[^_]$", line):
-                            raise Exception(f"Invalid codename: '{line}'. Codename rules:\n{_codename_rules.format(ind=_indentation)}")
-                        if line in _project_codes:
-                            raise Exception(f"Duplicate definition of a codename '{line}'.")
-
-                    _project_codes.append(line)
-
-    _response(f"Generate codes to '{target}'.")
-    target = Path(_project.source, target)
-    extension = target.suffix.removeprefix(".")
-    content = ""
-    codenames = ""
-    # Codes must be already valid at this point.
-    if extension == "py":
-        content += "ok = 0\n"
-        for code, codename in enumerate(_project_codes):
-            code += 1
-            content += f"{codename} = {code}\n"
-            codenames += f"{_indentation}{code}: \"{codename}\",\n"
+    for target in targets:
+        _response(f"Generate codes to '{target}'.")
+        target = Path(_project.source, target)
+        _sync.write(target, codesheet.emit(_project_codes, _indentation, target))
 
-        content += """
-codenames: dict[int, str] = {{
-{codenames}}}""".format(codenames=codenames)
 
-    elif extension in ["js", "ts"]:
-        content += "export const ok = 0;\n"
-        for code, codename in enumerate(_project_codes):
-            code += 1
-            content += f"export const {codename} = {code};\n"
-            codenames += f"{_indentation}{code}: \"{codename}\",\n"
-
-        content += """
-export const codenames = {{
-{codenames}}};""".format(codenames=codenames)
-
-    else:
-        raise Exception(f"Unsupported codes extension '{extension}' at location '{target}'.")
-    with target.open("w+") as f:
-        f.write(content)
+def includePython():
+    """
+    Includes `requirements.txt`, top-level Python files and top-level packages.
+    """
+    _prepare_build_dir()
+    # Only the root and its direct children are listed, using the shared tree scan.
+    dirs, files = _tree.listdir("")
+    for filename in files:
+        # include requirements and all python filenames
+        if filename == "requirements.txt" or filename.endswith(".py"):
+            include(filename)
+    # search only top-level modules to include, which names are valid identifiers - this skips `.venv`, `.git` and alike without listing them
+    for dirname in dirs:
+        if dirname.isidentifier() and "__init__.py" in _tree.listdir(dirname)[1]:
+            include(dirname)
+
+
+_invalidation_modes = {
+    "timestamp": py_compile.PycInvalidationMode.TIMESTAMP,
+    "checked-hash": py_compile.PycInvalidationMode.CHECKED_HASH,
+    "unchecked-hash": py_compile.PycInvalidationMode.UNCHECKED_HASH,
+}
+
+
+def compilePython(*, optimize: int = 0, invalidation: str | None = None, workers: int = 0):
+    """
+    Byte-compiles Python files in the build directory, so deployed services don't compile them on start.
 
+    Bytecode is specific to the Python version of the build, which must match the one used to run the build output.
 
-def includePython():
-    for root, dirs, files in os.walk(_project.source):
-        if Path(root) == _project.source:
-            for filename in files:
-                # include requirements and all python filenames
-                if filename in "requirements.txt" or filename.endswith(".py"):
-                    include(filename)
-        # search only top-level modules to include
-        elif Path(root).parent == _project.source:
-            for filename in files:
-                if filename == "__init__.py":
-                    include(Path(root).name)
+    `invalidation` is `timestamp`, `checked-hash` or `unchecked-hash`. By default it's `timestamp`, unless `SOURCE_DATE_EPOCH` is set for a reproducible build, then it's `checked-hash`. `workers` of `0` means the number of CPUs.
+    """
+    if optimize not in (0, 1, 2):
+        raise Exception(f"Python optimization level must be 0, 1 or 2, got '{optimize}'.")
+    if invalidation is not None and invalidation not in _invalidation_modes:
+        raise Exception(f"Unknown Python invalidation mode '{invalidation}'. Expected one of: {', '.join(_invalidation_modes)}.")
+    _prepare_build_dir()
+    _response(f"Compile Python files in '{_build_dir}'.")
+    ok = compileall.compile_dir(
+        _build_dir,
+        quiet=1,
+        optimize=optimize,
+        workers=workers,
+        invalidation_mode=_invalidation_modes[invalidation] if invalidation else None,
+    )
+    if not ok:
+        raise Exception(f"Failed to compile Python files in '{_build_dir}'.")
 
 
 def info(target: PathLike):
-    build_timestamp = xtime.timestamp()
+    _prepare_build_dir()
+    build_timestamp = _build_timestamp()
 
     _response(f"Generate build info to '{target}'.")
     target = Path(_project.source, target)
@@ -187,41 +354,55 @@ def info(target: PathLike):
         content = f"// {auto_message}\nconst project_id = \"{_project.id}\";\nconst version = \"{_target_version}\";\nconst timestamp = {build_timestamp};\nconst debug = {'true' if _target_debug else 'false'};\nexport {BRACKET_LEFT} project_id, version, timestamp, debug {BRACKET_RIGHT};\n"
     else:
         raise Exception(f"Unsupported build info extension '{extension}' at location '{target}'.")
-    with target.open("w+") as f:
-        f.write(content)
+    _sync.write(target, content)
 
 
-# @todo we also need to use glob as target, like `buildInclude("*.html")`, but in such a case we should disallow `dest`
-def include(target: Path | str, dest: Path | str | None = None):
+def include(target: Path | str, dest: Path | str | None = None, *, strategy: str | None = None):
     """
     Includes target into a build directory.
+
+    Target is a file, a directory, or a glob pattern, like `static/**/*.html`. Files matched by a pattern keep their paths, so destination can't be altered for patterns. Directories and patterns skip files ignored by `.buildignore`.
+
+    Strategy overrides the one set by `setIncludeStrategy`.
     """
+    if strategy is not None:
+        filecopy.validate_strategy(strategy)
+    _prepare_build_dir()
     target = Path(target)
     real_target = Path(_project.source, target)
+    rel_target = os.path.normpath(target).replace(os.sep, "/")
+    if rel_target == ".":
+        rel_target = ""
 
     message = f"Include target '{target}'."
     if dest:
         message += f" Destination is altered to '{dest}'."
     _response(message)
 
-    if not real_target.exists():
+    if tree.is_glob(rel_target):
+        if dest:
+            raise Exception(f"Include destination cannot be altered for a pattern '{target}'.")
+        matches = _tree.glob(rel_target)
+        if not matches:
+            raise Exception(f"No files match include pattern '{target}'.")
+        _sync.copy_all([(Path(_project.source, rel), Path(rel)) for rel in matches], strategy)
+    elif not real_target.exists():
         raise Exception(f"Cannot find include path '{real_target}'.")
     elif real_target.is_dir():
-        if dest == ".":
-            # We cannot just copytree, or an "already-existing" error will be raised. Instead, we will copy everything from the target directory to the build directory.
-            for item in os.listdir(real_target):
-                item_path = Path(real_target, item)
-                dest_path = Path(_build_dir, item)
-                if item_path.is_dir():
-                    shutil.copytree(item_path, dest_path)
-                else:
-                    shutil.copy2(item_path, dest_path)
-        else:
-            shutil.copytree(real_target, Path(_build_dir, dest if dest else target))
+        # Destination of '.' means that contents of the target directory are copied right into the build directory.
+        dest_dir = Path(dest if dest else target)
+        copies = []
+        # Walk is sorted, which makes the order of copies, and so the reported error, stable.
+        for root, dirs, files in _tree.walk(rel_target):
+            rel = root[len(rel_target):].lstrip("/")
+            _sync.mkdir(Path(dest_dir, rel))
+            for filename in files:
+                copies.append((Path(_project.source, root, filename), Path(dest_dir, rel, filename)))
+        _sync.copy_all(copies, strategy)
     else:
         if dest == ".":
             raise Exception(f"Include destination of '.' is not allowed for files.")
-        shutil.copy2(real_target, Path(_build_dir, dest if dest else target))
+        _sync.copy(real_target, Path(dest if dest else target), strategy)
 
 
 class Host:
@@ -232,13 +413,38 @@ class Host:
         self._host: str = host
         self._executor_secret: str | None = None
         self._user: str | None = None
+        self._executor_port: int = 6650
+        self._timeout: httpx.Timeout | None = None
+        self._http2: bool = False
+
+    @property
+    def name(self) -> str:
+        return self._host
 
     def setExecutorSecret(self, secret: str):
         self._executor_secret = secret
 
+    def setExecutorPort(self, port: int):
+        """
+        Sets port of `executor` service, used when `execute` is called without a port.
+        """
+        self._executor_port = port
+
     def setUser(self, user: str):
         self._user = user
 
+    def setTimeout(self, timeout: float | None, *, connect: float | None = None):
+        """
+        Sets timeout of requests in seconds, `None` disables it. Connect timeout defaults to the same value.
+        """
+        self._timeout = httpx.Timeout(timeout, connect=connect if connect is not None else timeout)
+
+    def setHttp2(self, enabled: bool = True):
+        """
+        Uses HTTP/2 for requests. Plain HTTP servers must accept HTTP/2 without an upgrade.
+        """
+        self._http2 = enabled
+
     def scp(self, from_path: PathLike, to_path: PathLike, *, port: int = 22):
         if not self._user:
             raise Exception(f"please set user first using a function `host.setUser()`")
@@ -254,18 +460,33 @@ class Host:
             raise Exception(f"[host {self._host}] scp failed with retcode {retcode} and error {stderr}")
 
     def request(self, url: str, **kwargs) -> httpx.Response:
-        return httpx.post(url, **kwargs)
+        """
+        Makes a POST request, reusing connections.
+        """
+        if self._timeout is not None:
+            kwargs.setdefault("timeout", self._timeout)
+        return _client(url, self._http2).post(url, **kwargs)
 
-    def mustExecute(self, command: str, **kwargs) -> tuple[str, str]:
-        retcode, stdout, stderr = self.execute(command, **kwargs)
+    async def requestAsync(self, url: str, **kwargs) -> httpx.Response:
+        """
+        Awaitable `request`.
+        """
+        if self._timeout is not None:
+            kwargs.setdefault("timeout", self._timeout)
+        return await _async_client(url, self._http2).post(url, **kwargs)
+
+    def mustExecute(self, command: str, *, stream: bool = False, **kwargs) -> tuple[str, str]:
+        """
+        Executes a command, raising if it fails. With `stream`, `executeStream` is used.
+        """
+        retcode, stdout, stderr = self.executeStream(command, **kwargs) if stream else self.execute(command, **kwargs)
         if retcode != 0:
             raise Exception(f"retcode {retcode} while executing command '{command}', with stderr {stderr}")
         return stdout, stderr
 
-    def execute(self, command: str, *, background: bool = False, cwd: str | None = None, port: int = 6650) -> tuple[int, str, str]:
-        """
-        Executes a command on the remote server, using `executor` service.
-        """
+    def _execute_request(self, command: str, background: bool, cwd: str | None, port: int | None, stream: bool) -> tuple[str, dict]:
+        if port is None:
+            port = self._executor_port
         if not self._executor_secret:
             raise Exception(f"please set executor secret first using a function `host.setExecutorSecret()`")
         payload = {
@@ -274,6 +495,8 @@ class Host:
         }
         if cwd:
             payload["cwd"] = cwd
+        if stream:
+            payload["stream"] = True
 
         response_message = f"[host {self._host}] execute command '{command}'"
         if background:
@@ -283,18 +506,230 @@ class Host:
         if cwd is not None:
             response_message += f", cwd '{cwd}'"
         _response(response_message)
+        return f"http://{self._host}:{port}/main/execute", payload
 
-        r = self.request(f"http://{self._host}:{port}/main/execute", json=payload, headers={"secret": self._executor_secret})
-        if r.status_code != 200:
-            raise Exception(f"status error while executing: status {r.status_code}, text {r.text}")
-
-        code, data = byteop.unwrap_coded_structure(r.content)
-        if code != 0:
-            data = data.decode()
-            raise CodeError(1, f"code error while executing: code {code}, text {data}")
-
-        data = json.loads(data)
+    def execute(self, command: str, *, background: bool = False, cwd: str | None = None, port: int | None = None) -> tuple[int, str, str]:
+        """
+        Executes a command on the remote server, using `executor` service.
+        """
+        url, payload = self._execute_request(command, background, cwd, port, False)
+        r = self.request(url, json=payload, headers={"secret": self._executor_secret})
+        data = json.loads(str(self._unwrap(r, "executing"), byteop.ENCODING))
         retcode = data["retcode"]
         stdout = data["stdout"]
         stderr = data["stderr"]
-        return retcode, stdout, stderr
\ No newline at end of file
+        return retcode, stdout, stderr
+
+    async def executeAsync(self, command: str, *, background: bool = False, cwd: str | None = None, port: int | None = None) -> tuple[int, str, str]:
+        """
+        Awaitable `execute`.
+        """
+        url, payload = self._execute_request(command, background, cwd, port, False)
+        r = await self.requestAsync(url, json=payload, headers={"secret": self._executor_secret})
+        data = json.loads(str(self._unwrap(r, "executing"), byteop.ENCODING))
+        return data["retcode"], data["stdout"], data["stderr"]
+
+    def executeStream(self, command: str, *, background: bool = False, cwd: str | None = None, port: int | None = None, tail: int = 1000) -> tuple[int, str, str]:
+        """
+        Executes a command like `execute`, but receives output while the command runs, and forwards its lines to the response as they arrive.
+
+        Output is received as frames of `byteop`: frames of code 0 carry JSON of `{"stdout": line}`, `{"stderr": line}` or `{"retcode": code}`, and a frame of another code carries the text of an error.
+
+        Only the last `tail` lines of stdout and of stderr are kept for the returned value.
+        """
+        url, payload = self._execute_request(command, background, cwd, port, True)
+        kwargs = {}
+        if self._timeout is not None:
+            kwargs["timeout"] = self._timeout
+        stdout = deque(maxlen=tail)
+        stderr = deque(maxlen=tail)
+        retcode = None
+        with _client(url, self._http2).stream("POST", url, json=payload, headers={"secret": self._executor_secret}, **kwargs) as r:
+            if r.status_code != 200:
+                r.read()
+                raise Exception(f"status error while executing: status {r.status_code}, text {r.text}")
+            for code, frame in byteop.iter_frames(r.iter_bytes()):
+                if code != 0:
+                    raise CodeError(1, f"code error while executing: code {code}, text {str(frame, byteop.ENCODING)}")
+                retcode = self._stream_item(frame, stdout, stderr, retcode)
+
+        if retcode is None:
+            raise Exception(f"[host {self._host}] output of command '{command}' ended without a retcode")
+        return retcode, "".join(stdout), "".join(stderr)
+
+    def _stream_item(self, frame: memoryview, stdout: deque, stderr: deque, retcode: int | None) -> int | None:
+        """
+        Handles a frame of streamed output, and returns the retcode, if the frame has one.
+        """
+        item = json.loads(str(frame, byteop.ENCODING))
+        if "stdout" in item:
+            stdout.append(item["stdout"])
+            _response(f"[host {self._host}] {item['stdout'].rstrip()}")
+        elif "stderr" in item:
+            stderr.append(item["stderr"])
+            _response(f"[host {self._host}] {item['stderr'].rstrip()}")
+        elif "retcode" in item:
+            retcode = item["retcode"]
+        return retcode
+
+    def sync(self, local: PathLike, remote: str, *, port: int | None = None) -> tuple[int, int]:
+        """
+        Makes a remote directory a copy of a local one, using `executor` service.
+
+        Hashes of files are compared with the remote ones, then only changed files are sent, as one compressed archive streamed while it's written, and files missing locally are deleted. The remote side applies changes to a copy of the directory, and swaps the copy in, so the directory is never seen partially updated.
+
+        Returns number of sent and deleted files.
+        """
+        if port is None:
+            port = self._executor_port
+        if not self._executor_secret:
+            raise Exception(f"please set executor secret first using a function `host.setExecutorSecret()`")
+        local_path = Path(get_project().source, local)
+        if not local_path.is_dir():
+            raise Exception(f"Cannot find sync directory '{local_path}'.")
+        url = f"http://{self._host}:{port}/main"
+        headers = {"secret": self._executor_secret}
+
+        r = self.request(f"{url}/syncManifest", json={"path": remote}, headers=headers)
+        remote_files: dict[str, str] = json.loads(str(self._unwrap(r, "syncing"), byteop.ENCODING))["files"]
+        local_files = {}
+        for root, dirs, files in os.walk(local_path):
+            dirs.sort()
+            for filename in sorted(files):
+                p = Path(root, filename)
+                with p.open("rb") as f:
+                    local_files[p.relative_to(local_path).as_posix()] = hashlib.file_digest(f, "sha256").hexdigest()
+        changed = [rel for rel, digest in local_files.items() if remote_files.get(rel, None) != digest]
+        deleted = sorted(remote_files.keys() - local_files.keys())
+        _response(f"[host {self._host}] sync '{local}' to '{remote}': {len(changed)} changed, {len(deleted)} deleted, {len(local_files) - len(changed)} unchanged")
+        if not changed and not deleted:
+            return 0, 0
+
+        # Body is a length-prefixed JSON header, followed by a gzipped tar of changed files.
+        header = json.dumps({"path": remote, "delete": deleted}).encode()
+
+        def body():
+            yield len(header).to_bytes(4, "little") + header
+            yield from archive.iter_tar([(Path(local_path, rel), rel) for rel in changed])
+
+        r = self.request(f"{url}/syncApply", content=body(), headers=headers)
+        self._unwrap(r, "syncing")
+        return len(changed), len(deleted)
+
+    def _unwrap(self, r: httpx.Response, action: str) -> memoryview:
+        """
+        Returns the payload of a coded structure of a response, as a view into the response body.
+        """
+        if r.status_code != 200:
+            raise Exception(f"status error while {action}: status {r.status_code}, text {r.text}")
+        code, data = byteop.unwrap_coded_view(r.content)
+        if code != 0:
+            raise CodeError(1, f"code error while {action}: code {code}, text {str(data, byteop.ENCODING)}")
+        return data
+
+
+class HostResult:
+    """
+    Result of an operation on a host of a group. Hosts, which were not reached because of a failure, are skipped.
+    """
+    def __init__(self, host: Host, *, value: Any = None, error: Exception | None = None, skipped: bool = False):
+        self.host = host
+        self.value = value
+        self.error = error
+        self.skipped = skipped
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.skipped
+
+
+class HostGroup:
+    """
+    Runs operations on several hosts concurrently.
+
+    Hosts are processed in batches, one after another, and hosts of a batch are processed in parallel. By default the whole group is one batch, and an operation stops at the first failed batch.
+    """
+    def __init__(self, hosts: list[Host]):
+        self._hosts: list[Host] = list(hosts)
+        self._parallel: int = 8
+        self._batch: int | float | None = None
+        self._fail_fast: bool = True
+
+    def setParallel(self, parallel: int):
+        """
+        Sets maximum number of hosts processed at the same time.
+        """
+        if not isinstance(parallel, int) or parallel < 1:
+            raise Exception(f"Host group parallelism must be a positive integer, got '{parallel}'.")
+        self._parallel = parallel
+
+    def setBatch(self, batch: int | float | None):
+        """
+        Sets size of a batch, either as a number of hosts, or as a fraction of the group, like `0.1` for rolling by 10%. `None` makes the whole group one batch.
+        """
+        if batch is not None and (batch <= 0 or (isinstance(batch, float) and batch > 1)):
+            raise Exception(f"Host group batch must be a positive number of hosts, or a fraction up to 1, got '{batch}'.")
+        self._batch = batch
+
+    def setFailFast(self, enabled: bool = True):
+        """
+        With fail-fast, hosts not yet started are skipped after a failure, and the failure is raised. Otherwise every host is processed, and failures are only reported in the results.
+        """
+        self._fail_fast = enabled
+
+    def execute(self, command: str, **kwargs) -> list[HostResult]:
+        return self.run(lambda host: host.execute(command, **kwargs), f"execute '{command}'")
+
+    def mustExecute(self, command: str, **kwargs) -> list[HostResult]:
+        return self.run(lambda host: host.mustExecute(command, **kwargs), f"execute '{command}'")
+
+    def scp(self, from_path: PathLike, to_path: PathLike, **kwargs) -> list[HostResult]:
+        return self.run(lambda host: host.scp(from_path, to_path, **kwargs), f"scp '{from_path}'")
+
+    def sync(self, local: PathLike, remote: str, **kwargs) -> list[HostResult]:
+        return self.run(lambda host: host.sync(local, remote, **kwargs), f"sync '{local}'")
+
+    def run(self, fn: Callable[[Host], Any], name: str = "run") -> list[HostResult]:
+        """
+        Calls a function for every host, and returns results in the order of hosts.
+        """
+        results: list[HostResult | None] = [None] * len(self._hosts)
+        failed = False
+        for batch in self._batches():
+            with ThreadPoolExecutor(min(self._parallel, len(batch))) as pool:
+                futures = {pool.submit(fn, self._hosts[i]): i for i in batch}
+                for future in as_completed(futures):
+                    i = futures[future]
+                    try:
+                        results[i] = HostResult(self._hosts[i], value=future.result())
+                    except Exception as e:
+                        results[i] = HostResult(self._hosts[i], error=e)
+                        if self._fail_fast and not failed:
+                            failed = True
+                            for f in futures:
+                                f.cancel()
+            if failed:
+                break
+        results = [r if r is not None else HostResult(self._hosts[i], skipped=True) for i, r in enumerate(results)]
+
+        errors = [r for r in results if r.error is not None]
+        skipped = sum(1 for r in results if r.skipped)
+        message = f"[group] {name}: {len(results) - len(errors) - skipped} ok, {len(errors)} failed"
+        if skipped:
+            message += f", {skipped} skipped"
+        _response(message + ".")
+        if errors and self._fail_fast:
+            first = errors[0]
+            raise Exception(f"[group] {name} failed on {len(errors)} host(s), first is '{first.host.name}': {first.error}") from first.error
+        return results
+
+    def _batches(self) -> list[range]:
+        count = len(self._hosts)
+        if count == 0:
+            return []
+        size = count
+        if isinstance(self._batch, float):
+            size = max(1, math.ceil(count * self._batch))
+        elif self._batch is not None:
+            size = self._batch
+        return [range(start, min(start + size, count)) for start in range(0, count, size)]
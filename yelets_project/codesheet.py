@@ -0,0 +1,146 @@
+"""
+Codesheets - constants for codes listed in `code.txt`, generated for different languages.
+
+Each line of `code.txt` is a codename, and its line number is the code. Empty lines reserve their codes. Code `0` is always `ok`.
+
+A `code.txt` is parsed once per run, and shared by all projects using it.
+"""
+import json
+import os
+from pathlib import Path
+import re
+from typing import Callable
+
+reserved = {"ok", "codenames"}
+
+rules = """{ind}1. alphanumeric
+{ind}2. lower case
+{ind}3. separated by underscores
+{ind}4. not starting with an underscore
+{ind}5. not ending with an underscore
+{ind}6. not starting with a digit"""
+
+_codename_re = re.compile(r"^(?![0-9])(?<!_)([a-z0-9]+(?:_[a-z0-9]+)*)[^_]$")
+
+# Resolved path: (size, modification time, codenames).
+_parsed: dict[Path, tuple[int, int, list[str]]] = {}
+
+
+def read(path: Path, indentation: str) -> list[str]:
+    """
+    Returns codenames of a `code.txt`, where an index is a code minus one, and empty strings are reserved codes.
+    """
+    path = path.resolve()
+    st = os.stat(path)
+    parsed = _parsed.get(path, None)
+    if parsed is not None and parsed[0] == st.st_size and parsed[1] == st.st_mtime_ns:
+        return parsed[2]
+    with path.open("r") as f:
+        codenames = parse(f.read(), indentation)
+    _parsed[path] = (st.st_size, st.st_mtime_ns, codenames)
+    return codenames
+
+
+def parse(text: str, indentation: str) -> list[str]:
+    codenames = []
+    seen = set()
+    for line in text.splitlines():
+        line = line.strip().lower()
+        # Codes must be parsed strictly. We want our `codes.txt` file to look clean.
+        # We add even empty lines - codes must be correctly enumerated. Later empty lines are skipped during code-file generation.
+        if line:
+            if line in reserved:
+                raise Exception(f"Cannot use reserved codename '{line}'.")
+            if not _codename_re.match(line):
+                raise Exception(f"Invalid codename: '{line}'. Codename rules:\n{rules.format(ind=indentation)}")
+            if line in seen:
+                raise Exception(f"Duplicate definition of a codename '{line}'.")
+            seen.add(line)
+        codenames.append(line)
+    return codenames
+
+
+def _codes(codenames: list[str]):
+    for i, codename in enumerate(codenames):
+        if codename:
+            yield i + 1, codename
+
+
+def _camel(codename: str) -> str:
+    return "".join(part.capitalize() for part in codename.split("_"))
+
+
+def _emit_py(codenames: list[str], ind: str, target: Path) -> list[str]:
+    constants = ["ok = 0\n"]
+    entries = []
+    for code, codename in _codes(codenames):
+        constants.append(f"{codename} = {code}\n")
+        entries.append(f"{ind}{code}: \"{codename}\",\n")
+    return [*constants, "\ncodenames: dict[int, str] = {\n", *entries, "}"]
+
+
+def _emit_js(codenames: list[str], ind: str, target: Path) -> list[str]:
+    constants = ["export const ok = 0;\n"]
+    entries = []
+    for code, codename in _codes(codenames):
+        constants.append(f"export const {codename} = {code};\n")
+        entries.append(f"{ind}{code}: \"{codename}\",\n")
+    return [*constants, "\nexport const codenames = {\n", *entries, "};"]
+
+
+def _emit_h(codenames: list[str], ind: str, target: Path) -> list[str]:
+    constants = [f"{ind}ok = 0,\n"]
+    # Array is indexed by code, reserved codes are null.
+    entries = [f"{ind}\"ok\",\n"]
+    for codename in codenames:
+        if codename:
+            constants.append(f"{ind}{codename} = {len(entries)},\n")
+            entries.append(f"{ind}\"{codename}\",\n")
+        else:
+            entries.append(f"{ind}0,\n")
+    return ["#pragma once\n\nenum {\n", *constants, "};\n\nstatic const char* const codenames[] = {\n", *entries, "};\n"]
+
+
+def _emit_go(codenames: list[str], ind: str, target: Path) -> list[str]:
+    # Package is named after the directory, as Go expects.
+    package = target.parent.name if target.parent.name.isidentifier() else "codes"
+    constants = ["\tOk = 0\n"]
+    entries = []
+    for code, codename in _codes(codenames):
+        constants.append(f"\t{_camel(codename)} = {code}\n")
+        entries.append(f"\t{code}: \"{codename}\",\n")
+    return [f"package {package}\n\nconst (\n", *constants, ")\n\nvar Codenames = map[int]string{\n", *entries, "}\n"]
+
+
+def _emit_rs(codenames: list[str], ind: str, target: Path) -> list[str]:
+    constants = ["pub const OK: i32 = 0;\n"]
+    entries = []
+    for code, codename in _codes(codenames):
+        constants.append(f"pub const {codename.upper()}: i32 = {code};\n")
+        entries.append(f"{ind}({code}, \"{codename}\"),\n")
+    return [*constants, "\npub const CODENAMES: &[(i32, &str)] = &[\n", *entries, "];\n"]
+
+
+def _emit_json(codenames: list[str], ind: str, target: Path) -> list[str]:
+    codes = {"ok": 0}
+    codes.update((codename, code) for code, codename in _codes(codenames))
+    return [json.dumps(codes, indent=ind), "\n"]
+
+
+emitters: dict[str, Callable[[list[str], str, Path], list[str]]] = {
+    "py": _emit_py,
+    "js": _emit_js,
+    "ts": _emit_js,
+    "h": _emit_h,
+    "go": _emit_go,
+    "rs": _emit_rs,
+    "json": _emit_json,
+}
+
+
+def emit(codenames: list[str], indentation: str, target: Path) -> str:
+    extension = target.suffix.removeprefix(".")
+    emitter = emitters.get(extension, None)
+    if emitter is None:
+        raise Exception(f"Unsupported codes extension '{extension}' at location '{target}'.")
+    return "".join(emitter(codenames, indentation, target))
@@ -0,0 +1,108 @@
+"""
+Strategies to put a file into a build directory.
+
+* `copy` - copies contents, in kernel with `copy_file_range` where it's available
+* `reflink` - clones the file on copy-on-write filesystems (btrfs, XFS, APFS-like), sharing data blocks with the source until either is modified
+* `hardlink` - makes the destination another name of the source, so modifications of either are seen by both
+* `symlink` - makes the destination a symbolic link to the source
+
+Every strategy, except `copy`, falls back to `copy` if the filesystem or platform does not support it.
+"""
+import errno
+import os
+from pathlib import Path
+import shutil
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+strategies = ["copy", "reflink", "hardlink", "symlink"]
+
+# `FICLONE` ioctl request from `linux/fs.h`.
+_ficlone = 0x40049409
+
+# Errors, meaning that an operation is not supported for the given files, rather than that something is wrong with them.
+_unsupported_errnos = {
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    errno.EMLINK,
+    errno.EBADF,
+}
+if hasattr(errno, "ENOTSUP"):
+    _unsupported_errnos.add(errno.ENOTSUP)
+
+
+def validate_strategy(strategy: str):
+    if strategy not in strategies:
+        raise Exception(f"Unknown include strategy '{strategy}'. Expected one of: {', '.join(strategies)}.")
+
+
+def copy_file(source: Path, dest: Path, strategy: str = "copy") -> tuple[str, int]:
+    """
+    Puts a source file to a non-existing destination using a strategy.
+
+    Returns actually used strategy, and number of bytes of file data written.
+    """
+    if strategy == "hardlink":
+        try:
+            os.link(source, dest)
+            return "hardlink", 0
+        except OSError as e:
+            _raise_if_supported(e)
+    elif strategy == "symlink":
+        try:
+            os.symlink(Path(source).resolve(), dest)
+            return "symlink", 0
+        except OSError as e:
+            _raise_if_supported(e)
+    elif strategy == "reflink":
+        if _reflink(source, dest):
+            shutil.copystat(source, dest)
+            return "reflink", 0
+    return "copy", _copy(source, dest)
+
+
+def _raise_if_supported(e: OSError):
+    if e.errno not in _unsupported_errnos:
+        raise e
+
+
+def _reflink(source: Path, dest: Path) -> bool:
+    if fcntl is None:
+        return False
+    with open(source, "rb") as fsrc, open(dest, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), _ficlone, fsrc.fileno())
+            return True
+        except OSError as e:
+            _raise_if_supported(e)
+    os.unlink(dest)
+    return False
+
+
+def _copy(source: Path, dest: Path) -> int:
+    size = 0
+    copied = False
+    if hasattr(os, "copy_file_range"):
+        with open(source, "rb") as fsrc, open(dest, "wb") as fdst:
+            try:
+                while True:
+                    n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), 1 << 30)
+                    if n == 0:
+                        break
+                    size += n
+                copied = True
+            except OSError as e:
+                _raise_if_supported(e)
+    if not copied:
+        # Uses `sendfile` or `fcopyfile` where it's available.
+        shutil.copyfile(source, dest)
+        size = os.stat(dest).st_size
+    shutil.copystat(source, dest)
+    return size
@@ -0,0 +1,247 @@
+"""
+Synchronization of files into a build directory.
+
+In the default mode the build directory is recreated, and every included file is copied. In the incremental mode the build directory is kept between builds, together with a manifest of what was copied where, so only changed files are copied, and outputs which are not included anymore are removed.
+
+Files of a directory are copied by a pool of threads, since copying many small files is bound by the latency of per-file syscalls rather than by the disk.
+
+Generated files are written only if their content has changed, so their modification times, and caches depending on them, stay valid between builds.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+import threading
+
+from yelets_project import filecopy
+
+_manifest_version = 1
+
+
+class BuildSync:
+    def __init__(self, build_dir: Path, manifest_path: Path):
+        self.build_dir = build_dir
+        self.manifest_path = manifest_path
+        self.incremental = False
+        self.strategy = "copy"
+        self.workers = default_workers()
+        self.prepared = False
+        # Entries are `destination: [source, size, mtime_ns, sha256 or None, destination_mtime_ns]`, where destination is relative to the build directory.
+        self._previous: dict[str, list] = {}
+        self._current: dict[str, list] = {}
+        self.files_written = 0
+        self.bytes_written = 0
+        self.files_linked = 0
+        self.files_unchanged = 0
+        self.files_removed = 0
+        self.outputs_written = 0
+        self.outputs_unchanged = 0
+        # Number of files per strategy, which had to fall back to a copy.
+        self.fallbacks: dict[str, int] = {}
+        # Build primitives may run in parallel jobs of a project function.
+        self._lock = threading.Lock()
+
+    def prepare(self):
+        if self.prepared:
+            return
+        with self._lock:
+            if self.prepared:
+                return
+            self._previous = self._load_manifest() if self.incremental else {}
+            if not self._previous:
+                # Without a manifest we don't know what's inside - noone else should occupy the build dir.
+                if self.build_dir.exists():
+                    shutil.rmtree(self.build_dir)
+                self.manifest_path.unlink(missing_ok=True)
+            self.build_dir.mkdir(parents=True, exist_ok=True)
+            self.prepared = True
+
+    def clean(self):
+        if self.build_dir.exists():
+            shutil.rmtree(self.build_dir)
+        self.manifest_path.unlink(missing_ok=True)
+        self._previous = {}
+        self._current = {}
+        self.prepared = False
+
+    def mkdir(self, dest: Path):
+        Path(self.build_dir, dest).mkdir(parents=True, exist_ok=True)
+
+    def copy(self, source: Path, dest: Path, strategy: str | None = None):
+        """
+        Copies a source file to a destination relative to the build directory, unless the destination is up to date.
+
+        See `filecopy` for strategies, by default the strategy of this sync is used.
+        """
+        self._apply(self._put(source, dest, strategy or self.strategy))
+
+    def copy_all(self, files: list[tuple[Path, Path]], strategy: str | None = None):
+        """
+        Copies source files to destinations like `copy`, using up to `workers` threads.
+
+        Every file is attempted even if some fail. Then the error of the first failed file, in the order of `files`, is raised.
+        """
+        strategy = strategy or self.strategy
+        if self.workers <= 1 or len(files) <= 1:
+            results = [self._try_put(source, dest, strategy) for source, dest in files]
+        else:
+            with ThreadPoolExecutor(min(self.workers, len(files))) as pool:
+                results = list(pool.map(lambda f: self._try_put(f[0], f[1], strategy), files))
+
+        errors = []
+        for (source, _), (result, error) in zip(files, results):
+            if error is None:
+                self._apply(result)
+            else:
+                errors.append((source, error))
+        if errors:
+            source, error = errors[0]
+            message = f"Cannot include '{source}': {error}"
+            if len(errors) > 1:
+                message += f" And {len(errors) - 1} more file(s) failed."
+            raise Exception(message) from error
+
+    def _try_put(self, source: Path, dest: Path, strategy: str) -> tuple[tuple | None, Exception | None]:
+        try:
+            return self._put(source, dest, strategy), None
+        except Exception as e:
+            return None, e
+
+    def _put(self, source: Path, dest: Path, strategy: str) -> tuple[str, list, str, str | None, int]:
+        """
+        Does the filesystem part of a copy, without touching the state of the sync, so it can be called from multiple threads.
+
+        Returns destination key, manifest entry, requested strategy, used strategy (`None` if the destination is up to date), and number of bytes written.
+        """
+        key = dest.as_posix()
+        real_dest = Path(self.build_dir, dest)
+        st = os.stat(source)
+        source_str = str(source)
+        previous = self._previous.get(key, None)
+        if previous is not None and previous[0] == source_str:
+            dest_mtime_ns = _mtime_ns(real_dest)
+            if dest_mtime_ns == previous[4]:
+                if previous[1] == st.st_size and previous[2] == st.st_mtime_ns:
+                    return key, previous, strategy, None, 0
+                # Source was touched, but maybe not changed - compare contents.
+                if previous[1] == st.st_size:
+                    digest = _digest(source)
+                    if digest == (previous[3] or _digest(real_dest)):
+                        return key, [source_str, st.st_size, st.st_mtime_ns, digest, dest_mtime_ns], strategy, None, 0
+
+        real_dest.parent.mkdir(parents=True, exist_ok=True)
+        # Destination is always replaced, and never written through - it might be a link.
+        if os.path.lexists(real_dest):
+            if real_dest.is_dir() and not real_dest.is_symlink():
+                shutil.rmtree(real_dest)
+            else:
+                real_dest.unlink()
+        used_strategy, size = filecopy.copy_file(source, real_dest, strategy)
+        return key, [source_str, st.st_size, st.st_mtime_ns, None, _mtime_ns(real_dest)], strategy, used_strategy, size
+
+    def write(self, path: Path, content: str | bytes) -> bool:
+        """
+        Writes a generated file, unless it already has the same content. Text is written with platform line endings.
+
+        Returns whether the file was written.
+        """
+        if isinstance(content, str):
+            content = content.replace("\n", os.linesep).encode()
+        try:
+            # Size is compared first, so most changed files are detected without reading them.
+            if os.stat(path).st_size == len(content):
+                with open(path, "rb") as f:
+                    if f.read() == content:
+                        with self._lock:
+                            self.outputs_unchanged += 1
+                        return False
+        except FileNotFoundError:
+            pass
+        # Replace atomically, so readers never observe a partially written file.
+        tmp_path = Path(path.parent, f".{path.name}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.outputs_written += 1
+        return True
+
+    def finish(self, failed: bool = False):
+        """
+        Removes outputs, which were not included during this build, and saves the manifest.
+
+        If the build has failed, nothing is removed, since it's unknown what would have been included.
+        """
+        if not self.prepared:
+            return
+        if self.incremental:
+            if failed:
+                entries = dict(self._previous)
+                entries.update(self._current)
+            else:
+                entries = self._current
+                for key in self._previous.keys() - self._current.keys():
+                    self._remove(key)
+            self._save_manifest(entries)
+        self.prepared = False
+
+    def _apply(self, result: tuple[str, list, str, str | None, int]):
+        key, entry, strategy, used_strategy, size = result
+        with self._lock:
+            if used_strategy is None:
+                self.files_unchanged += 1
+            elif used_strategy == "copy":
+                self.files_written += 1
+                self.bytes_written += size
+                if strategy != "copy":
+                    self.fallbacks[strategy] = self.fallbacks.get(strategy, 0) + 1
+            else:
+                self.files_linked += 1
+            self._current[key] = entry
+
+    def _remove(self, key: str):
+        path = Path(self.build_dir, key)
+        if os.path.lexists(path) and not path.is_dir():
+            path.unlink()
+            self.files_removed += 1
+        # Remove directories left empty.
+        parent = path.parent
+        while parent != self.build_dir and parent.is_dir() and not any(parent.iterdir()):
+            parent.rmdir()
+            parent = parent.parent
+
+    def _load_manifest(self) -> dict[str, list]:
+        try:
+            with self.manifest_path.open("r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get("version", None) != _manifest_version or manifest.get("build_dir", None) != str(self.build_dir) or not self.build_dir.is_dir():
+            return {}
+        return manifest.get("entries", {})
+
+    def _save_manifest(self, entries: dict[str, list]):
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with tmp_path.open("w") as f:
+            json.dump({"version": _manifest_version, "build_dir": str(self.build_dir), "entries": entries}, f)
+        os.replace(tmp_path, self.manifest_path)
+
+
+def default_workers() -> int:
+    # Copying is I/O bound, so there are more threads than cores.
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def _mtime_ns(path: Path) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _digest(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
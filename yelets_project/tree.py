@@ -0,0 +1,185 @@
+"""
+Scan of a project tree, shared by build primitives.
+
+Directory listings are made with `os.scandir` once, and kept together with the directory's modification time, so later lookups only `stat` the directory, and see files created by the build in the meantime. Ignored entries are dropped from listings, so ignored directories are never entered.
+
+Ignore rules are read from `.buildignore` at the project root, with a subset of `.gitignore` syntax:
+
+* `#` starts a comment line
+* `name` ignores files and directories with that name at any depth
+* `path/name` and `/name` are relative to the project root
+* trailing `/` matches only directories
+* `*`, `?`, `[...]` match within a path segment, `**` matches any number of segments
+
+`.build` at the project root is always ignored.
+"""
+import os
+from pathlib import Path
+import re
+
+ignore_filename = ".buildignore"
+
+_default_ignore = ["/.build/"]
+
+
+def is_glob(pattern: str) -> bool:
+    return any(c in pattern for c in "*?[")
+
+
+def translate(pattern: str) -> str:
+    """
+    Translates a glob pattern over posix relative paths into a regular expression.
+    """
+    result = ""
+    segments = pattern.split("/")
+    for i, segment in enumerate(segments):
+        last = i == len(segments) - 1
+        if segment == "**":
+            # Any number of segments, including none.
+            result += ".*" if last else "(?:[^/]+/)*"
+            continue
+        j = 0
+        while j < len(segment):
+            c = segment[j]
+            if c == "*":
+                result += "[^/]*"
+            elif c == "?":
+                result += "[^/]"
+            elif c == "[":
+                end = segment.find("]", j + 2 if segment[j + 1:j + 2] in ("!", "^") else j + 1)
+                if end == -1:
+                    result += re.escape(c)
+                else:
+                    body = segment[j + 1:end]
+                    if body[0] in "!^":
+                        body = "^" + body[1:]
+                    result += "[" + body.replace("\\", "\\\\") + "]"
+                    j = end
+            else:
+                result += re.escape(c)
+            j += 1
+        if not last:
+            result += "/"
+    return result
+
+
+class Ignore:
+    """
+    All ignore rules, compiled into two expressions - for any entry and for directories only.
+    """
+    def __init__(self, rules: list[str]):
+        any_patterns = []
+        dir_patterns = []
+        for rule in rules:
+            rule = rule.strip()
+            if not rule or rule.startswith("#"):
+                continue
+            if rule.startswith("!"):
+                raise Exception(f"Negated ignore rules are not supported, got '{rule}'.")
+            patterns = any_patterns
+            if rule.endswith("/"):
+                patterns = dir_patterns
+                rule = rule.rstrip("/")
+            if "/" in rule:
+                patterns.append(translate(rule.lstrip("/")))
+            else:
+                patterns.append("(?:.*/)?" + translate(rule))
+        self._any = re.compile("|".join(any_patterns)) if any_patterns else None
+        self._dir = re.compile("|".join(any_patterns + dir_patterns)) if any_patterns or dir_patterns else None
+
+    @classmethod
+    def read(cls, root: Path) -> "Ignore":
+        rules = list(_default_ignore)
+        try:
+            with Path(root, ignore_filename).open("r") as f:
+                rules.extend(f.read().splitlines())
+        except FileNotFoundError:
+            pass
+        return cls(rules)
+
+    def match(self, rel: str, is_dir: bool) -> bool:
+        regex = self._dir if is_dir else self._any
+        return regex is not None and regex.fullmatch(rel) is not None
+
+
+class ProjectTree:
+    def __init__(self, root: Path):
+        self.root = root
+        self._ignore: Ignore | None = None
+        # Relative directory: (modification time, sorted directory names, sorted file names).
+        self._listings: dict[str, tuple[int, list[str], list[str]]] = {}
+        self.scans = 0
+
+    @property
+    def ignore(self) -> Ignore:
+        if self._ignore is None:
+            self._ignore = Ignore.read(self.root)
+        return self._ignore
+
+    def listdir(self, rel_dir: str) -> tuple[list[str], list[str]]:
+        """
+        Returns names of not ignored directories and files in a directory, relative to the root.
+        """
+        path = Path(self.root, rel_dir)
+        mtime_ns = os.stat(path).st_mtime_ns
+        listing = self._listings.get(rel_dir, None)
+        if listing is not None and listing[0] == mtime_ns:
+            return listing[1], listing[2]
+
+        self.scans += 1
+        prefix = rel_dir + "/" if rel_dir else ""
+        ignore = self.ignore
+        dirs = []
+        files = []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if ignore.match(prefix + entry.name, is_dir):
+                    continue
+                (dirs if is_dir else files).append(entry.name)
+        dirs.sort()
+        files.sort()
+        self._listings[rel_dir] = (mtime_ns, dirs, files)
+        return dirs, files
+
+    def walk(self, rel_dir: str = "", max_depth: int | None = None):
+        """
+        Yields `(relative directory, directory names, file names)` top-down, in sorted order. Directories deeper than `max_depth` below `rel_dir` are not listed.
+        """
+        stack = [(rel_dir, 0)]
+        while stack:
+            current, depth = stack.pop()
+            dirs, files = self.listdir(current)
+            yield current, dirs, files
+            if max_depth is not None and depth >= max_depth:
+                continue
+            prefix = current + "/" if current else ""
+            for name in reversed(dirs):
+                stack.append((prefix + name, depth + 1))
+
+    def glob(self, pattern: str) -> list[str]:
+        """
+        Returns relative paths of files matching a glob pattern, in walk order.
+
+        Only the directories, which the pattern can reach, are listed.
+        """
+        segments = pattern.strip("/").split("/")
+        # Literal leading segments narrow down where to start.
+        start = []
+        while len(segments) > 1 and not is_glob(segments[0]):
+            start.append(segments.pop(0))
+        rel_dir = "/".join(start)
+        if not Path(self.root, rel_dir).is_dir():
+            return []
+        max_depth = None if "**" in segments else len(segments) - 1
+        regex = re.compile(translate("/".join(start + segments)))
+        result = []
+        for current, _, files in self.walk(rel_dir, max_depth):
+            prefix = current + "/" if current else ""
+            for name in files:
+                if regex.fullmatch(prefix + name):
+                    result.append(prefix + name)
+        return result